@@ -0,0 +1,76 @@
+from __future__ import unicode_literals
+
+import pytest
+
+from zerotk.arc import ARC
+
+
+class Test:
+
+    def testARC(self):
+        cache = ARC(4)
+
+        cache[1] = 'one'
+        cache[2] = 'two'
+        assert cache.get(1) == 'one'  # 1 is now frequent (T2).
+        cache[3] = 'three'
+        cache[4] = 'four'
+        assert len(cache) == 4
+        assert cache.GetCurrentSize() == 4
+        assert cache.GetMaxSize() == 4
+
+        # Recent items (T1) are pushed out first.
+        cache[5] = 'five'
+        assert 2 not in cache
+        assert cache.keys() == [3, 4, 5, 1]
+
+        # A scan doesn't push out the frequent items.
+        for i in range(10, 30):
+            cache[i] = i
+            assert 1 in cache
+        assert len(cache) == 4
+
+        # A recent item remembered (B1) grows the target size of T1, entering T2.
+        assert 26 not in cache
+        cache[26] = 26
+        assert cache._p == 1
+        assert cache.keys() == [28, 29, 1, 26]
+
+        assert cache[1] == 'one'
+        assert cache.pop(1) == 'one'
+        assert cache.pop(1, None) is None
+        with pytest.raises(KeyError):
+            cache.pop(1)
+        with pytest.raises(KeyError):
+            cache[1]
+        assert cache.get(1, 'default') == 'default'
+
+        cache.clear()
+        assert len(cache) == 0
+
+        with pytest.raises(ValueError):
+            ARC(0)
+
+    def testARCRandom(self):
+        """
+        The maximum size is respected on random operations, remembering at most the same number
+        of keys.
+        """
+        import random
+
+        cache = ARC(20)
+        values = {}
+
+        rand = random.Random(0)
+        for _i in range(5000):
+            key = rand.randint(0, 60)
+            action = rand.random()
+            if action < 0.5:
+                cache[key] = values[key] = rand.randint(0, 30)
+            elif action < 0.9:
+                assert cache.get(key, values.get(key)) == values.get(key)
+            else:
+                cache.pop(key, None)
+            assert len(cache) <= 20
+            assert len(cache) + len(cache._b1) + len(cache._b2) <= 40
+            assert 0 <= cache._p <= 20
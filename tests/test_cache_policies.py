@@ -0,0 +1,221 @@
+"""
+Compares the Memoize prune methods replaying the accesses to the TerraFormer.Factory cache
+recorded from a real fix-format run.
+
+The trace format is one access per line: "<size> <version> <filename>". The size is the memory
+estimated for the TerraFormer instance (see zerotk.memory_size.GetDeepSize) and the version is
+incremented when the file changes on disk (as the Factory validator discards the cached
+instance).
+
+Record a new trace with:
+
+    python tests/test_cache_policies.py <trace> <source> [<source>...]
+
+test_cache_policies/factory_trace.txt was recorded from a fix-format of some python 2.7 standard
+library packages (email, json, distutils, logging, multiprocessing, unittest, sqlite3, wsgiref,
+importlib, compiler and bsddb).
+"""
+from __future__ import unicode_literals
+
+import io
+import os
+
+from zerotk.arc import ARC
+from zerotk.fifo import FIFO
+from zerotk.lru import LRU
+from zerotk.two_queue import TwoQueue
+
+
+# Prune methods bounded by the number of items.
+COUNT_POLICIES = [
+    ('FIFO', FIFO),
+    ('LRU', LRU),
+    ('2Q', TwoQueue),
+    ('ARC', ARC),
+]
+
+# Prune methods bounded by the size of the items (as with Memoize max_bytes).
+SIZE_POLICIES = [
+    ('LRU', lambda size: LRU(size, get_size=int)),
+    ('2Q', lambda size: TwoQueue(size, get_size=int)),
+]
+
+
+def LoadTrace(filename):
+    """
+    :param unicode filename:
+    :return list(tuple(tuple(unicode,int),int)):
+        The (key, size) of each access.
+    """
+    result = []
+    with io.open(filename, encoding='UTF-8') as stream:
+        for i_line in stream:
+            size, version, key = i_line.rstrip('\n').split(' ', 2)
+            result.append(((key, int(version)), int(size)))
+    return result
+
+
+_SENTINEL = []
+
+
+def Replay(trace, cache):
+    """
+    Replays the trace accesses on the given cache, the same way Memoize does: the size of the
+    value is stored on misses.
+
+    :param list trace:
+        See LoadTrace.
+    :param cache:
+    :return int:
+        The number of hits.
+    """
+    hits = 0
+    get = cache.get
+    for i_key, i_size in trace:
+        if get(i_key, _SENTINEL) is _SENTINEL:
+            cache[i_key] = i_size
+        else:
+            hits += 1
+    return hits
+
+
+def RecordTrace(trace_filename, *sources):
+    """
+    Runs fix-format (in a single process) on a copy of the given sources, recording the
+    accesses to TerraFormer.Factory.
+
+    :param unicode trace_filename:
+    :param unicode sources:
+        Directories with python sources.
+    """
+    import shutil
+    import tempfile
+
+    from zerotk.memory_size import GetDeepSize
+    from zerotk.terraformer import TerraFormer
+    from zerotk.terraformer import _terra_former
+    from zerotk.terraformer.tf_script import _FixFormat, _GetExtensions, _GetFilenames
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        copies = []
+        for i_source in sources:
+            copy = os.path.join(temp_dir, os.path.basename(os.path.abspath(i_source)))
+            shutil.copytree(i_source, copy)
+            copies.append(copy)
+
+        original_descriptor = TerraFormer.__dict__['Factory']
+        original_factory = TerraFormer.Factory
+        stamps = {}
+        versions = {}
+        sizes = {}
+        trace = []
+
+        def RecordingFactory(cls, filename, source=None):
+            result = original_factory(filename, source)
+            stamp = _terra_former._GetFactoryStamp(cls, filename)
+            if stamps.get(filename, stamp) != stamp:
+                versions[filename] = versions.get(filename, 0) + 1
+            stamps[filename] = stamp
+            key = (os.path.relpath(filename, temp_dir), versions.get(filename, 0))
+            if key not in sizes:
+                sizes[key] = GetDeepSize(result)
+            trace.append('%d %d %s\n' % (sizes[key], key[1], key[0].replace(os.sep, '/')))
+            return result
+
+        TerraFormer.Factory = classmethod(RecordingFactory)
+        try:
+            for i_filename in _GetFilenames(copies, _GetExtensions(True)):
+                _FixFormat(i_filename, refactor=None)
+        finally:
+            TerraFormer.Factory = original_descriptor
+    finally:
+        shutil.rmtree(temp_dir)
+
+    with io.open(trace_filename, 'w', encoding='UTF-8') as stream:
+        stream.writelines(trace)
+
+
+def testFactoryTrace(embed_data):
+    """
+    The Factory cache default size doesn't prune any instance that is used again (all misses are
+    the first access to each file version).
+    """
+    from zerotk.terraformer import TerraFormer
+
+    trace = LoadTrace(embed_data['factory_trace.txt'])
+    max_hits = len(trace) - len(set(i_key for i_key, _size in trace))
+
+    for _name, factory in SIZE_POLICIES:
+        assert Replay(trace, factory(TerraFormer.FACTORY_CACHE_MAX_BYTES)) == max_hits
+    for _name, factory in COUNT_POLICIES:
+        assert Replay(trace, factory(50)) == max_hits
+
+    # The scan resistant policies don't do worse than FIFO with small caches.
+    fifo_hits = Replay(trace, FIFO(5))
+    assert Replay(trace, TwoQueue(5)) >= fifo_hits
+    assert Replay(trace, ARC(5)) >= fifo_hits
+
+
+def testHitRatios(embed_data):
+    """
+    Hit ratio of each prune method replaying the Factory trace, for a range of cache sizes (set
+    PRINT_PERFORMANCE to see them).
+
+    Results 2026-10-19
+    ---------------------------------------------------------
+    1318 accesses, 247 keys (maximum hit ratio: 81.3%)
+
+    Bounded by the number of items:
+      size=   2  FIFO:  74.7%  LRU:  80.6%  2Q:  79.8%  ARC:  81.0%
+      size=   5  FIFO:  79.0%  LRU:  81.3%  2Q:  80.0%  ARC:  81.2%
+      size=  10  FIFO:  80.3%  LRU:  81.3%  2Q:  80.3%  ARC:  81.2%
+      size=  25  FIFO:  81.1%  LRU:  81.3%  2Q:  81.0%  ARC:  81.3%
+      size=  50  FIFO:  81.3%  LRU:  81.3%  2Q:  81.3%  ARC:  81.3%
+
+    Bounded by the size of the items:
+      size=   1%  LRU:  79.7%  2Q:  79.5%
+      size=   2%  LRU:  80.9%  2Q:  80.3%
+      size=   5%  LRU:  81.2%  2Q:  80.7%
+      size=  10%  LRU:  81.3%  2Q:  81.1%
+      size=  25%  LRU:  81.3%  2Q:  81.3%
+    ---------------------------------------------------------
+    """
+    PRINT_PERFORMANCE = False
+    output = []
+
+    trace = LoadTrace(embed_data['factory_trace.txt'])
+    keys_count = len(set(i_key for i_key, _size in trace))
+    max_hits = len(trace) - keys_count
+    output.append('%d accesses, %d keys (maximum hit ratio: %.1f%%)' % (
+        len(trace), keys_count, 100.0 * max_hits / len(trace)))
+
+    def HitRatios(policies, size):
+        result = []
+        for i_name, i_factory in policies:
+            hits = Replay(trace, i_factory(size))
+            assert hits <= max_hits
+            result.append('%s: %5.1f%%' % (i_name, 100.0 * hits / len(trace)))
+        return '  '.join(result)
+
+    output.append('')
+    output.append('Bounded by the number of items:')
+    for i_size in (2, 5, 10, 25, 50):
+        output.append('  size=%4d  %s' % (i_size, HitRatios(COUNT_POLICIES, i_size)))
+
+    output.append('')
+    output.append('Bounded by the size of the items:')
+    total_size = sum(dict(trace).values())
+    for i_ratio in (0.01, 0.02, 0.05, 0.1, 0.25):
+        output.append('  size=%4.0f%%  %s' % (
+            100 * i_ratio, HitRatios(SIZE_POLICIES, int(total_size * i_ratio))))
+
+    if PRINT_PERFORMANCE:
+        print('\n'.join(output))
+
+
+if __name__ == '__main__':
+    # python tests/test_cache_policies.py <trace> <source> [<source>...]
+    import sys
+
+    RecordTrace(*sys.argv[1:])
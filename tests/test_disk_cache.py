@@ -0,0 +1,195 @@
+from __future__ import unicode_literals
+
+import pytest
+
+from zerotk.disk_cache import DiskCache, TwoTierCache
+from zerotk.lru import LRU
+
+
+def testDiskCache(embed_data):
+    filename = embed_data['cache/test.sqlite']
+    cache = DiskCache(filename)
+    assert cache.Get('alpha', 1) is None
+    assert cache.Get('alpha', 1, 'default') == 'default'
+
+    assert cache.Set('alpha', 1, 'one')
+    assert cache.Set('alpha', (2, 'two'), [2, 'two'])
+    assert cache.Set('bravo', 1, 'ONE')
+    assert cache.Get('alpha', 1) == 'one'
+    assert cache.Get('alpha', (2, 'two')) == [2, 'two']
+    assert cache.Get('bravo', 1) == 'ONE'
+    assert cache.GetCount() == 3
+    assert cache.GetCount('alpha') == 2
+
+    # Persisted: a new instance (Ex.: on another run) finds the values.
+    cache.Close()
+    other = DiskCache(filename)
+    assert other.Get('alpha', 1) == 'one'
+
+    # Values that can't be serialized are just not stored.
+    assert not other.Set('alpha', 3, lambda: None)
+    assert other.Get('alpha', 3) is None
+
+    other.Clear('bravo')
+    assert other.GetCount() == 2
+    other.Clear()
+    assert other.GetCount() == 0
+
+    # Versions don't see each other values.
+    version_1 = DiskCache(filename, version='1')
+    version_2 = DiskCache(filename, version='2')
+    version_1.Set('alpha', 1, 'one')
+    assert version_2.Get('alpha', 1) is None
+    assert version_1.Get('alpha', 1) == 'one'
+
+
+def testDiskCacheMaxCount(embed_data):
+    cache = DiskCache(embed_data['max_count.sqlite'], max_count=2)
+    cache.Set('alpha', 1, 'one')
+    cache.Set('bravo', 2, 'two')
+    cache.Set('alpha', 3, 'three')
+    assert cache.GetCount() == 2
+    assert cache.Get('alpha', 1) is None
+    assert cache.Get('bravo', 2) == 'two'
+
+    # Setting again counts as the latest write.
+    cache.Set('bravo', 2, 'TWO')
+    cache.Set('alpha', 4, 'four')
+    assert cache.Get('bravo', 2) == 'TWO'
+    assert cache.Get('alpha', 3) is None
+    assert cache.GetCount() == 2
+
+
+def testDiskCacheErrors(embed_data):
+    # The "directory" is a file: the store can't be created.
+    with open(embed_data['not_a_directory'], 'w') as stream:
+        stream.write('not a directory')
+    cache = DiskCache(embed_data['not_a_directory/cache.sqlite'])
+    assert not cache.Set('alpha', 1, 'one')
+    assert cache.Get('alpha', 1) is None
+    assert not cache.Clear()
+    assert cache.GetCount() == 0
+
+
+def testDiskCacheSerializer(embed_data):
+    import json
+
+    class JsonSerializer(object):
+
+        def dumps(self, obj):
+            return json.dumps(obj).encode('UTF-8')
+
+        def loads(self, data):
+            return json.loads(data.decode('UTF-8'))
+
+    cache = DiskCache(embed_data['json.sqlite'], serializer=JsonSerializer())
+    cache.Set('alpha', [1, 2], {'one': 1})
+    assert cache.Get('alpha', [1, 2]) == {'one': 1}
+
+
+def testTwoTierCache(embed_data):
+    disk = DiskCache(embed_data['two_tier.sqlite'])
+    cache = TwoTierCache(LRU(2), disk, 'alpha')
+    cache[1] = 'one'
+    cache[2] = 'two'
+    cache[3] = 'three'
+    assert 1 not in cache
+    assert len(cache) == 2
+
+    # Promoted from disk.
+    assert cache.get(1) == 'one'
+    assert 1 in cache
+    assert cache.get(4, 'default') == 'default'
+    assert cache.GetCurrentSize() == 2
+    assert cache.GetMaxSize() == 2
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.get(1) is None
+
+
+def testMemoizeDiskCache(embed_data):
+    from zerotk.memoize import Memoize
+
+    filename = embed_data['memoize.sqlite']
+    calls = []
+
+    def CreateFunction():
+
+        @Memoize(maxsize=10, disk_cache=filename)
+        def Parse(source):
+            calls.append(source)
+            return source.split()
+
+        return Parse
+
+    parse = CreateFunction()
+    assert parse('alpha bravo') == ['alpha', 'bravo']
+    assert parse('alpha bravo') == ['alpha', 'bravo']
+    assert calls == ['alpha bravo']
+
+    # A new run: nothing in memory, but found on disk.
+    parse = CreateFunction()
+    assert parse('alpha bravo') == ['alpha', 'bravo']
+    assert parse('charlie') == ['charlie']
+    assert calls == ['alpha bravo', 'charlie']
+
+    parse.ClearCache()
+    parse = CreateFunction()
+    assert parse('charlie') == ['charlie']
+    assert calls == ['alpha bravo', 'charlie', 'charlie']
+
+    with pytest.raises(ValueError):
+        Memoize(ttl=10, disk_cache=filename)
+
+    with pytest.raises(TypeError):
+
+        class Alpha(object):
+
+            @Memoize(disk_cache=filename)
+            def Method(self):
+                pass
+
+
+def testMemoizeDiskCacheThreadSafe(embed_data, monkeypatch):
+    from zerotk.memoize import Memoize
+
+    disk = DiskCache(embed_data['thread_safe.sqlite'])
+    calls = []
+
+    def CreateFunction():
+        memoize = Memoize(maxsize=10, disk_cache=disk, thread_safe=True, stats=True)
+
+        def Parse(source):
+            calls.append(source)
+            return source.split()
+
+        return memoize, memoize(Parse)
+
+    # The disk is not accessed holding the lock.
+    memoize, parse = CreateFunction()
+    original_get = DiskCache.Get
+    original_set = DiskCache.Set
+
+    def Get(self, *args):
+        assert not memoize._lock.locked()
+        return original_get(self, *args)
+
+    def Set(self, *args):
+        assert not memoize._lock.locked()
+        return original_set(self, *args)
+
+    monkeypatch.setattr(DiskCache, 'Get', Get)
+    monkeypatch.setattr(DiskCache, 'Set', Set)
+
+    assert parse('alpha bravo') == ['alpha', 'bravo']
+    assert parse('alpha bravo') == ['alpha', 'bravo']
+    assert calls == ['alpha bravo']
+
+    # A new run: found on disk.
+    memoize, parse = CreateFunction()
+    assert parse('alpha bravo') == ['alpha', 'bravo']
+    assert parse('alpha bravo') == ['alpha', 'bravo']
+    assert calls == ['alpha bravo']
+    info = parse.CacheInfo()
+    assert (info.hits, info.misses) == (2, 0)
@@ -0,0 +1,181 @@
+from __future__ import unicode_literals
+
+import os
+
+import pytest
+
+from zerotk.easyfs import CreateFile
+from zerotk.terraformer._import_graph import ImportGraph
+from zerotk.text import dedent
+
+
+def _CreateProject(data_dir):
+    CreateFile(data_dir + '/alpha/__init__.py', dedent(
+        """
+        from . import bravo
+        """
+    ))
+    CreateFile(data_dir + '/alpha/bravo.py', dedent(
+        """
+        import os
+        from alpha.charlie import Charlie
+        from .charlie import Delta
+        """
+    ))
+    CreateFile(data_dir + '/alpha/charlie.py', dedent(
+        """
+        from alpha import bravo
+        import sys, os.path
+        """
+    ))
+    CreateFile(data_dir + '/zulu.py', dedent(
+        """
+        import alpha.bravo
+        """
+    ))
+
+
+def testImportGraph(embed_data):
+    data_dir = embed_data.get_data_dir()
+    _CreateProject(data_dir)
+    filenames = [
+        data_dir + '/alpha/__init__.py',
+        data_dir + '/alpha/bravo.py',
+        data_dir + '/alpha/charlie.py',
+        data_dir + '/zulu.py',
+    ]
+
+    graph = ImportGraph([data_dir])
+    assert graph.Update(filenames) == 4
+    assert graph.modules == [
+        'alpha', 'alpha.bravo', 'alpha.charlie', 'os', 'os.path', 'sys', 'zulu'
+    ]
+    assert graph.GetImports('alpha') == ['alpha.bravo']
+    assert graph.GetImports('alpha.bravo') == ['alpha.charlie', 'os']
+    assert graph.GetImports('alpha.charlie') == ['alpha.bravo', 'os.path', 'sys']
+    assert graph.GetImports('zulu') == ['alpha.bravo']
+    assert graph.GetImports('os') == []
+    assert graph.GetImports('missing') == []
+
+    # CSR representation
+    assert list(graph.offsets) == [0, 1, 3, 6, 6, 6, 6, 7]
+    assert [graph.modules[i] for i in graph.edges[1:3]] == ['alpha.charlie', 'os']
+    assert list(graph.edge_linenos[1:3]) == [2, 1]
+    assert graph.module_filenames[graph.GetModuleId('zulu')] == os.path.abspath(filenames[3])
+    assert graph.module_filenames[graph.GetModuleId('os')] is None
+
+    # Save/Load
+    graph_filename = data_dir + '/.graph'
+    graph.Save(graph_filename)
+    loaded = ImportGraph.Load(graph_filename)
+    assert loaded.modules == graph.modules
+    assert loaded.offsets == graph.offsets
+    assert loaded.edges == graph.edges
+    assert loaded.edge_linenos == graph.edge_linenos
+    assert loaded.GetImports('alpha.charlie') == ['alpha.bravo', 'os.path', 'sys']
+
+    # Files saved by another version (or not saved by Save) are rejected.
+    from six.moves import cPickle
+    for i_data in ({'version': ImportGraph.VERSION - 1}, ('alpha',)):
+        with open(graph_filename, 'wb') as oss:
+            cPickle.dump(i_data, oss, 2)
+        with pytest.raises(ValueError):
+            ImportGraph.Load(graph_filename)
+    graph.Save(graph_filename)
+
+    # Incremental update: only changed files are scanned, removed files are dropped.
+    assert loaded.Update(filenames[:3]) == 0
+    assert 'zulu' not in loaded.modules
+
+    CreateFile(data_dir + '/alpha/charlie.py', 'import zulu\n')
+    assert loaded.Update(filenames) == 2
+    assert loaded.GetImports('alpha.charlie') == ['zulu']
+    assert loaded.GetImports('alpha.bravo') == ['alpha.charlie', 'os']
+
+
+def testImportGraphErrors(embed_data):
+    data_dir = embed_data.get_data_dir()
+    CreateFile(data_dir + '/alpha.py', 'import bravo\n')
+    CreateFile(data_dir + '/bravo.py', 'import (\n')
+
+    graph = ImportGraph([data_dir])
+    graph.Update([data_dir + '/alpha.py', data_dir + '/bravo.py'])
+    assert graph.modules == ['alpha', 'bravo']
+    assert graph.GetImports('alpha') == ['bravo']
+    assert graph.files[os.path.abspath(data_dir + '/alpha.py')][3] is None
+    assert graph.files[os.path.abspath(data_dir + '/bravo.py')][3] is not None
+
+
+def testFindCycles(embed_data):
+    data_dir = embed_data.get_data_dir()
+    modules = {
+        'alpha': 'import bravo\nimport echo\n',
+        'bravo': 'import charlie\n',
+        'charlie': 'import alpha\nimport bravo\n',
+        'delta': 'import alpha\n',
+        'echo': 'import foxtrot\n',
+        'foxtrot': 'import echo\n',
+    }
+    for i_name, i_contents in modules.items():
+        CreateFile('%s/%s.py' % (data_dir, i_name), i_contents)
+
+    graph = ImportGraph([data_dir])
+    graph.Update(['%s/%s.py' % (data_dir, i) for i in modules])
+    assert [
+        [graph.modules[j] for j in i]
+        for i in graph.GetStronglyConnectedComponents()
+    ] == [['alpha', 'bravo', 'charlie'], ['echo', 'foxtrot']]
+    assert graph.FindCycles() == [
+        [('alpha', 'bravo', 1), ('bravo', 'charlie', 1), ('charlie', 'alpha', 1)],
+        [('echo', 'foxtrot', 1), ('foxtrot', 'echo', 1)],
+    ]
+
+
+def testFindCyclesDeepGraph():
+    """
+    The cycles detection is iterative, deep graphs must not reach the recursion limit.
+    """
+    from zerotk.terraformer._import_graph import _NewArray
+
+    count = 5000
+    graph = ImportGraph()
+    graph.modules = ['m%05d' % i for i in range(count)]
+    graph.offsets = _NewArray(range(count + 1))
+    graph.edges = _NewArray([(i + 1) % count for i in range(count)])
+    graph.edge_linenos = _NewArray([1] * count)
+    assert graph.GetStronglyConnectedComponents() == [list(range(count))]
+    assert len(graph.FindCycles()[0]) == count
+
+
+def testImporters(embed_data):
+    data_dir = embed_data.get_data_dir()
+    _CreateProject(data_dir)
+    CreateFile(data_dir + '/yankee.py', 'import (\n')
+    filenames = [
+        data_dir + '/alpha/__init__.py',
+        data_dir + '/alpha/bravo.py',
+        data_dir + '/alpha/charlie.py',
+        data_dir + '/zulu.py',
+        data_dir + '/yankee.py',
+    ]
+    graph = ImportGraph([data_dir])
+    graph.Update(filenames)
+    bravo, charlie, zulu, yankee = [os.path.abspath(filenames[i]) for i in (1, 2, 3, 4)]
+
+    assert graph.GetImporters('os') == [(bravo, 1)]
+    assert graph.GetImporters('alpha.charlie.Charlie') == [(bravo, 2)]
+    assert graph.GetImporters('alpha.charlie') == [(bravo, 2)]
+    assert graph.GetImporters('alpha.bravo') == [(charlie, 1), (zulu, 1)]
+    assert graph.GetImporters('missing') == []
+
+    # Files with errors are always affected.
+    assert graph.GetRefactorFilenames({'alpha.charlie.Charlie$': 'x'}) == [bravo, yankee]
+    assert graph.GetRefactorFilenames({'alpha': 'x', 'sys': 'y'}) == [charlie, yankee]
+
+    # The index is saved and updated.
+    graph.Save(data_dir + '/.graph')
+    graph = ImportGraph.Load(data_dir + '/.graph')
+    assert graph.GetImporters('os') == [(bravo, 1)]
+    CreateFile(data_dir + '/zulu.py', 'import os\n')
+    graph.Update(filenames)
+    assert graph.GetImporters('os') == [(bravo, 1), (zulu, 1)]
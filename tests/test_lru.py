@@ -2,7 +2,7 @@ from __future__ import unicode_literals
 
 import pytest
 
-from zerotk.lru import LRU, LRUWithRemovalMemo, _Node
+from zerotk.lru import HeapLRU, LRU, LRUWithRemovalMemo, _Node
 
 
 class Test:
@@ -193,6 +193,66 @@ class Test:
         assert 1 in lru
         assert 2 in lru
 
+    @pytest.mark.parametrize('weighted', [False, True])
+    def testLRUMatchesHeapLRU(self, weighted):
+        """
+        The linked list engine must evict exactly the same items as the heap one.
+        """
+        import random
+
+        get_size = (lambda x: x % 5 + 1) if weighted else (lambda x: 1)
+        lru = LRU(20, get_size=get_size)
+        heap_lru = HeapLRU(20, get_size=get_size)
+
+        rand = random.Random(0)
+        for _i in range(5000):
+            key = rand.randint(0, 40)
+            action = rand.random()
+            if action < 0.5:
+                lru[key] = heap_lru[key] = rand.randint(0, 30)
+            elif action < 0.9:
+                assert lru.get(key) == heap_lru.get(key)
+            else:
+                assert lru.pop(key, None) == heap_lru.pop(key, None)
+            assert lru._currsize == heap_lru._currsize
+
+        assert list(lru.iteritems()) == list(heap_lru.iteritems())
+
+    def testPerformance__flaky(self):
+        """
+        Mixed gets/sets over twice as many keys as the cache size (so there are many evictions).
+
+        Results 2026-10-19
+        ---------------------------------------------------------
+        size=  50  HeapLRU: 0.090s  LRU: 0.015s
+        size= 500  HeapLRU: 0.755s  LRU: 0.015s
+        ---------------------------------------------------------
+        """
+        import random
+        import timeit
+
+        PRINT_PERFORMANCE = False
+        count = 20000
+
+        def Check(lru_class, size):
+            rand = random.Random(0)
+            keys = [rand.randint(0, size * 2) for _i in range(count)]
+
+            def Run():
+                lru = lru_class(size)
+                get = lru.get
+                for i_key in keys:
+                    if get(i_key) is None:
+                        lru[i_key] = i_key
+
+            return min(timeit.repeat(Run, number=1, repeat=3))
+
+        for i_size in (50, 500):
+            heap_time = Check(HeapLRU, i_size)
+            linked_time = Check(LRU, i_size)
+            if PRINT_PERFORMANCE:
+                print('size=%4d  HeapLRU: %.3fs  LRU: %.3fs' % (i_size, heap_time, linked_time))
+
 #     def profile(self):
 #         @ProfileMethod('test.prof')
 #         def Check():
@@ -3,6 +3,7 @@ from __future__ import unicode_literals
 from collections import OrderedDict
 
 import pytest
+import six
 from zerotk.memoize import Memoize
 
 
@@ -166,6 +167,376 @@ class Test:
         Double(3)  # It has discarded this one, so, it has to be added again!
         assert counts['Double'] == 4
 
+    @pytest.mark.parametrize('prune_method, expected_calls', [
+        (Memoize.FIFO, 10),
+        (Memoize.LRU, 10),
+        (Memoize.TWO_QUEUE, 2),
+        (Memoize.ARC, 2),
+    ])
+    def testMemoizeScanResistant(self, prune_method, expected_calls):
+        calls = []
+
+        def Double(x):
+            calls.append(x)
+            return x * 2
+
+        Double = Memoize(10, prune_method)(Double)
+
+        # 0 is used again soon (so it's known to be used more than once) and then between long
+        # scans of values used only once.
+        for i in range(1, 200):
+            if i in (1, 13) or i % 20 == 0:
+                assert Double(0) == 0
+            assert Double(i) == i * 2
+        assert calls.count(0) == expected_calls
+        assert len(calls) == 199 + expected_calls
+
+    def testMemoizeScanResistantMaxBytes(self):
+        calls = []
+
+        @Memoize(max_bytes=100, get_size=len, prune_method=Memoize.TWO_QUEUE)
+        def Repeat(x, count):
+            calls.append(x)
+            return x * count
+
+        for i in range(1, 200):
+            if i in (1, 13) or i % 20 == 0:
+                assert Repeat('a', 20) == 'a' * 20
+            assert Repeat('b%03d' % i, 2) == 'b%03d' % i * 2
+        assert calls.count('a') == 2
+        assert Repeat.GetCacheSize() == 100
+
+        with pytest.raises(ValueError):
+            Memoize(max_bytes=100, prune_method=Memoize.ARC)
+
+    def testMemoizeMaxBytes(self):
+        calls = []
+
+        @Memoize(max_bytes=100, get_size=len)
+        def Repeat(x, count):
+            calls.append(x)
+            return x * count
+
+        assert Repeat.GetCacheSize() == 0
+        assert Repeat('a', 40) == 'a' * 40
+        assert Repeat('b', 50) == 'b' * 50
+        assert Repeat.GetCacheSize() == 90
+        assert Repeat('a', 40) == 'a' * 40
+        assert calls == ['a', 'b']
+
+        # Doesn't fit: "b" is the least recently used.
+        Repeat('c', 30)
+        assert Repeat.GetCacheSize() == 70
+        Repeat('a', 40)
+        Repeat('b', 50)
+        assert calls == ['a', 'b', 'c', 'b']
+
+        Repeat.ClearCache()
+        assert Repeat.GetCacheSize() == 0
+
+        class Alpha(object):
+
+            @Memoize(max_bytes=1000)
+            def Method(self, x):
+                return 'alpha' * x
+
+        alpha = Alpha()
+        assert Alpha.Method.GetCacheSize(alpha) == 0
+        alpha.Method(10)
+        assert 50 < Alpha.Method.GetCacheSize(alpha) < 1000
+
+        # Counting sizes by items.
+        @Memoize(maxsize=3)
+        def Double(x):
+            return x * 2
+
+        Double(1)
+        Double(2)
+        assert Double.GetCacheSize() == 2
+
+    def testMemoizeValidator(self):
+        versions = {'alpha': 1, 'bravo': 1}
+        calls = []
+
+        @Memoize(validator=lambda name: versions[name])
+        def Load(name):
+            calls.append(name)
+            return '%s-%d' % (name, versions[name])
+
+        assert Load('alpha') == 'alpha-1'
+        assert Load('bravo') == 'bravo-1'
+        assert Load('alpha') == 'alpha-1'
+        assert calls == ['alpha', 'bravo']
+
+        # Stale values are replaced.
+        versions['alpha'] = 2
+        assert Load('alpha') == 'alpha-2'
+        assert Load('alpha') == 'alpha-2'
+        assert Load('bravo') == 'bravo-1'
+        assert calls == ['alpha', 'bravo', 'alpha']
+        assert Load.GetCacheSize() == 2
+
+        class Alpha(object):
+
+            @Memoize(max_bytes=1000, get_size=len, validator=lambda self, name: versions[name])
+            def Load(self, name):
+                calls.append(name)
+                return name * versions[name]
+
+        alpha = Alpha()
+        del calls[:]
+        assert alpha.Load('bravo') == 'bravo'
+        assert alpha.Load('bravo') == 'bravo'
+        assert Alpha.Load.GetCacheSize(alpha) == 5
+        versions['bravo'] = 3
+        assert alpha.Load('bravo') == 'bravobravobravo'
+        assert Alpha.Load.GetCacheSize(alpha) == 15
+        assert calls == ['bravo', 'bravo']
+
+    def testMemoizeStats(self):
+        from zerotk.memoize import GetCacheInfos
+
+        @Memoize(maxsize=2, stats=True)
+        def Double(x):
+            return x * 2
+
+        info = Double.CacheInfo()
+        assert info.name == 'test_memoize.Double'
+        assert (info.hits, info.misses, info.evictions, info.currsize, info.maxsize) == \
+            (0, 0, 0, 0, 2)
+
+        Double(1)
+        Double(1)
+        Double(2)
+        Double(3)  # Evicts 1
+        Double(1)  # Evicts 2
+        info = Double.CacheInfo()
+        assert (info.hits, info.misses, info.evictions, info.currsize) == (1, 4, 2, 2)
+        assert info.miss_time >= 0.0
+        assert info.time_saved == info.miss_time / 4
+
+        # Stale values replaced count as evictions.
+        versions = {'alpha': 1}
+
+        @Memoize(stats=True, validator=lambda name: versions[name])
+        def Load(name):
+            return versions[name]
+
+        Load('alpha')
+        versions['alpha'] = 2
+        assert Load('alpha') == 2
+        assert Load('alpha') == 2
+        info = Load.CacheInfo()
+        assert (info.hits, info.misses, info.evictions, info.currsize) == (1, 2, 1, 1)
+
+        # Without stats only the sizes are available.
+        @Memoize(maxsize=3)
+        def Triple(x):
+            return x * 3
+
+        Triple(1)
+        assert Triple.CacheInfo() == ('test_memoize.Triple', None, None, None, 1, 3, 0.0)
+
+        infos = dict((i.name, i) for i in GetCacheInfos())
+        assert infos['test_memoize.Double'] == Double.CacheInfo()
+        assert infos['test_memoize.Triple'] == Triple.CacheInfo()
+
+        # Instance methods
+        class Alpha(object):
+
+            @Memoize(stats=True)
+            def Method(self, x):
+                return x
+
+        alpha = Alpha()
+        assert Alpha.Method.CacheInfo(alpha).hits is None
+        alpha.Method(1)
+        alpha.Method(1)
+        info = Alpha.Method.CacheInfo(alpha)
+        assert (info.hits, info.misses, info.evictions, info.currsize) == (1, 1, 0, 1)
+        assert Alpha.Method.CacheInfo(Alpha()).hits is None
+
+    def testPrintCacheInfos(self):
+        from zerotk.memoize import PrintCacheInfos
+
+        @Memoize(maxsize=10, stats=True)
+        def PrintCacheInfosFunction(x):
+            return x
+
+        PrintCacheInfosFunction(1)
+        PrintCacheInfosFunction(1)
+
+        stream = six.StringIO()
+        PrintCacheInfos(stream)
+        lines = stream.getvalue().splitlines()
+        assert lines[0].split() == \
+            ['hits', 'misses', 'evictions', 'currsize', 'maxsize', 'miss', 'time', 'saved', 'name']
+        line = [i for i in lines if i.endswith('.PrintCacheInfosFunction')][0]
+        assert line.split()[:5] == ['1', '1', '0', '1', '10']
+
+    def testMemoizeThreadSafe(self):
+        import threading
+        import time
+
+        calls = []
+        release = threading.Event()
+        memoize = Memoize(maxsize=10, stats=True, thread_safe=True)
+
+        @memoize
+        def Parse(name):
+            calls.append(name)
+            release.wait()
+            if name == 'error':
+                raise ValueError(name)
+            return name.upper()
+
+        results = []
+        errors = []
+
+        def Worker(name):
+            try:
+                results.append(Parse(name))
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [
+            threading.Thread(target=Worker, args=(i_name,))
+            for i_name in ['alpha'] * 8 + ['bravo'] * 4 + ['error'] * 4
+        ]
+        for i_thread in threads:
+            i_thread.start()
+        # Wait for all threads to ask for their values: 3 computing them, the others waiting.
+        def GetWaiters():
+            with memoize._lock:
+                return sum(i_flight.waiters for i_flight in memoize._in_flight.values())
+
+        while len(calls) < 3 or GetWaiters() < len(threads) - 3:
+            time.sleep(0.01)
+        release.set()
+        for i_thread in threads:
+            i_thread.join()
+
+        # Each value is computed once, the error is shared (and not cached).
+        assert sorted(calls) == ['alpha', 'bravo', 'error']
+        assert sorted(results) == ['ALPHA'] * 8 + ['BRAVO'] * 4
+        assert len(errors) == 4
+        info = Parse.CacheInfo()
+        assert (info.hits, info.misses, info.currsize) == (10, 2, 2)
+
+        with pytest.raises(ValueError):
+            Parse('error')
+        assert sorted(calls) == ['alpha', 'bravo', 'error', 'error']
+
+        Parse.ClearCache()
+        assert Parse('alpha') == 'ALPHA'
+        assert calls[-1] == 'alpha'
+
+        # Recursive calls for the same value don't dead-lock.
+        depth = [0]
+
+        @Memoize(thread_safe=True)
+        def Recursive(x):
+            depth[0] += 1
+            if depth[0] < 3:
+                return Recursive(x)
+            return x
+
+        class Alpha(object):
+
+            @Memoize(thread_safe=True)
+            def Method(self, x):
+                return x * 2
+
+        assert Recursive(1) == 1
+        assert depth == [3]
+        assert Alpha().Method(2) == 4
+
+    def testMemoizeThreadSafeStoreError(self):
+        import threading
+        import time
+
+        # Storing the value fails (the size may not be 0): the threads waiting for the value get the
+        # error and later calls compute it again instead of waiting forever.
+        started = threading.Event()
+        release = threading.Event()
+        memoize = Memoize(max_bytes=100, get_size=lambda x: 0, thread_safe=True)
+
+        @memoize
+        def Parse(name):
+            started.set()
+            release.wait()
+            return name.upper()
+
+        errors = []
+
+        def Worker():
+            try:
+                Parse('alpha')
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=Worker) for _i in range(3)]
+        for i_thread in threads:
+            i_thread.daemon = True
+        threads[0].start()
+        started.wait()
+        threads[1].start()
+
+        def GetWaiters():
+            with memoize._lock:
+                return sum(i_flight.waiters for i_flight in memoize._in_flight.values())
+
+        while GetWaiters() < 1:
+            time.sleep(0.01)
+        release.set()
+        for i_thread in threads[:2]:
+            i_thread.join(10)
+            assert not i_thread.is_alive()
+
+        assert len(errors) == 2
+        assert memoize._in_flight == {}
+
+        threads[2].start()
+        threads[2].join(10)
+        assert not threads[2].is_alive()
+        assert len(errors) == 3
+
+    def testMemoizeTTL(self, monkeypatch):
+        import time
+
+        now = [0.0]
+        monkeypatch.setattr(time, 'time', lambda: now[0])
+        monkeypatch.setattr(time, 'monotonic', lambda: now[0], raising=False)
+        calls = []
+
+        @Memoize(maxsize=2, ttl=10, stats=True)
+        def GetModuleName(filename):
+            calls.append(filename)
+            return filename[:-3]
+
+        assert GetModuleName('alpha.py') == 'alpha'
+        now[0] = 5.0
+        assert GetModuleName('bravo.py') == 'bravo'
+        assert GetModuleName('alpha.py') == 'alpha'
+        assert calls == ['alpha.py', 'bravo.py']
+
+        # Only the expired value is computed again.
+        now[0] = 12.0
+        assert GetModuleName('alpha.py') == 'alpha'
+        assert GetModuleName('bravo.py') == 'bravo'
+        assert calls == ['alpha.py', 'bravo.py', 'alpha.py']
+
+        # Combined with maxsize.
+        GetModuleName('charlie.py')
+        assert GetModuleName.GetCacheSize() == 2
+        info = GetModuleName.CacheInfo()
+        assert (info.hits, info.misses, info.evictions) == (2, 4, 2)
+
+        with pytest.raises(ValueError):
+            Memoize(ttl=10, max_bytes=1000)
+        with pytest.raises(ValueError):
+            Memoize(ttl=10, prune_method=Memoize.LRU)
+
     def testMemoize(self):
         counts = {
             'Double' : 0,
@@ -309,8 +680,84 @@ class Test:
         message = 'Can\'t use non-declared keyword arguments.'
         assert message in unicode(exception_info.value)
 
+    def testCacheKeyBuilder(self):
+        from zerotk.memoize import Memoize
+
+        def Check(func, calls):
+            memoize = Memoize()
+            memoize(func)
+            builder = memoize._CreateCacheKeyBuilder()
+            assert builder != memoize._GetCacheKey
+            for i_args, i_kwargs in calls:
+                try:
+                    expected = memoize._GetCacheKey(i_args, i_kwargs)
+                except ValueError:
+                    with pytest.raises(ValueError):
+                        builder(i_args, i_kwargs)
+                else:
+                    assert builder(i_args, i_kwargs) == expected
+
+        def NoDefaults(a, b):
+            pass
+
+        def Defaults(a, b=1, c=2):
+            pass
+
+        def VarArgs(a, b=1, *args):
+            pass
+
+        calls = [
+            (('a',), {}),
+            (('a', 'b'), {}),
+            (('a', 'b', 'c'), {}),
+            (('a',), {'b': 'b'}),
+            (('a',), {'c': 'c', 'b': 'b'}),
+            ((), {'a': 'a'}),
+        ]
+        Check(NoDefaults, calls)
+        Check(Defaults, calls)
+        Check(VarArgs, calls + [(('a', 'b', 'c', 'd'), {})])
+
+        memoize = Memoize()
+        memoize(Defaults)
+        with pytest.raises(ValueError):
+            memoize._CreateCacheKeyBuilder()(('a',), {'d': 'd'})
+
+        # Subclasses overriding _GetCacheKey are still used.
+        class LowerMemoize(Memoize):
+
+            def _GetCacheKey(self, args, kwargs):
+                return tuple(i.lower() for i in args)
+
+        calls = []
+
+        @LowerMemoize
+        def Upper(text):
+            calls.append(text)
+            return text.upper()
+
+        assert Upper('alpha') == 'ALPHA'
+        assert Upper('ALPHA') == 'ALPHA'
+        assert calls == ['alpha']
+
     def testPerformance__flaky(self):
         '''
+        Results 2026-10-19 (cache key builders specialized for each signature)
+        ---------------------------------------------------------
+        call_no_positional is 3.7 times slower than baseline.
+        call_with_defaults is 4.8 times slower than baseline.
+        call_passing_kwargs is 9.6 times slower than baseline.
+        call_method is 7.1 times slower than baseline.
+        ---------------------------------------------------------
+
+        Results 2026-10-19 (before the cache key builders)
+        ---------------------------------------------------------
+        call_no_positional is 5.0 times slower than baseline.
+        call_with_defaults is 18.3 times slower than baseline.
+        call_passing_kwargs is 61.5 times slower than baseline.
+        call_method is 20.0 times slower than baseline.
+        ---------------------------------------------------------
+
         Results 2014-07-02 (support for defaults and passing kwargs)
         ---------------------------------------------------------
         call_no_positional is 6.1 times slower than baseline.
@@ -394,6 +841,23 @@ class Test:
             )
         PrintPerformance(timing, 'call_passing_kwargs')
 
+        Check(
+            'call_method',
+            '''
+            from zerotk.memoize import Memoize
+
+            class Alpha(object):
+
+                @Memoize
+                def Foo(self, arg1, arg2=None):
+                    pass
+
+            alpha = Alpha()
+            ''',
+            "for _i in xrange(%d): alpha.Foo('arg1'); alpha.Foo('arg1', 'arg2')" % (for_size,)
+            )
+        PrintPerformance(timing, 'call_method')
+
     def profileMemoize(self):
         from ben10.debug.profiling import PrintProfileMultiple, ProfileMethod
 
@@ -0,0 +1,100 @@
+from __future__ import unicode_literals
+
+import pytest
+
+from zerotk.memoize import Memoize
+from zerotk.memoize_key import CreateIdentityKey, Freeze, FreezeKey, FrozenValue, IdentityKey
+
+
+class NotHashable(object):
+    __hash__ = None
+
+
+def testFreeze():
+    assert Freeze(1) == 1
+    assert Freeze((1, 'a')) == (1, 'a')
+    assert Freeze({'a': [1, 2]}) == Freeze({'a': [1, 2]})
+    assert Freeze({'a': [1, 2], 'b': None}) == Freeze({'b': None, 'a': [1, 2]})
+    assert Freeze({'a': [1, 2]}) != Freeze({'a': [2, 1]})
+    assert Freeze({'a': [1, 2]}) != Freeze({'a': (1, 2)})
+    assert Freeze([1]) != Freeze({1})
+    assert Freeze({1, 2}) == Freeze({2, 1})
+    assert Freeze(frozenset([1])) == frozenset([1])
+    assert Freeze([[1], {'a': {2}}]) == Freeze([[1], {'a': {2}}])
+
+    frozen = Freeze({'a': [1, 2]})
+    assert isinstance(frozen, FrozenValue)
+    assert hash(frozen) == hash(Freeze({'a': [1, 2]}))
+    assert repr(Freeze([1])) == 'FrozenValue((%r, (1,)))' % 'list'
+
+    # Other objects must be hashable.
+    with pytest.raises(TypeError):
+        Freeze([NotHashable()])
+
+
+def testIdentityKey():
+    alpha = {'a': 1}
+    assert IdentityKey(alpha) == IdentityKey(alpha)
+    assert IdentityKey(alpha) != IdentityKey({'a': 1})
+    assert IdentityKey(alpha, 1) != IdentityKey(alpha, 2)
+    assert hash(IdentityKey(alpha, 1)) == hash(IdentityKey(alpha, 1))
+    assert IdentityKey(alpha) != alpha
+
+    get_key = CreateIdentityKey(get_version=len)
+    assert get_key((alpha, 'a')) == (IdentityKey(alpha, 1), 'a')
+
+
+def testMemoizeKey():
+    calls = []
+
+    @Memoize(key=FreezeKey)
+    def GetNames(refactor, sort=False):
+        calls.append(refactor)
+        return sorted(refactor) if sort else list(refactor)
+
+    assert GetNames({'alpha': 'bravo'}) == ['alpha']
+    assert GetNames({'alpha': 'bravo'}) == ['alpha']
+    assert GetNames({'alpha': 'bravo'}, sort=False) == ['alpha']
+    assert len(calls) == 1
+    assert GetNames({'alpha': 'charlie'}) == ['alpha']
+    assert len(calls) == 2
+
+    # Identity plus version: changes to the object are noticed only through its version.
+    versions = {}
+    del calls[:]
+
+    @Memoize(key=CreateIdentityKey(get_version=lambda x: versions.get(id(x))))
+    def GetNames(refactor):
+        calls.append(refactor)
+        return list(refactor)
+
+    refactor = {'alpha': 'bravo'}
+    assert GetNames(refactor) == ['alpha']
+    refactor['charlie'] = 'delta'
+    assert GetNames(refactor) == ['alpha']
+    versions[id(refactor)] = 1
+    assert sorted(GetNames(refactor)) == ['alpha', 'charlie']
+    assert GetNames({'echo': 'foxtrot'}) == ['echo']
+    assert len(calls) == 3
+
+    # User supplied: ignore the second argument.
+    @Memoize(key=lambda key: key[0])
+    def First(alpha, bravo):
+        return alpha
+
+    assert First('a', ['ignored']) == 'a'
+    assert First('a', ['other']) == 'a'
+
+    # Instance methods
+    class Alpha(object):
+
+        @Memoize(key=FreezeKey)
+        def Method(self, values):
+            calls.append(values)
+            return len(values)
+
+    del calls[:]
+    alpha = Alpha()
+    assert alpha.Method([1, 2]) == 2
+    assert alpha.Method([1, 2]) == 2
+    assert len(calls) == 1
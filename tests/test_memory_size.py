@@ -0,0 +1,96 @@
+from __future__ import unicode_literals
+
+import sys
+
+from zerotk.memory_size import GetDeepSize, GetPytreeSize, RegisterSizeEstimator
+
+
+def testGetDeepSize():
+    value = 'alpha' * 100
+    assert GetDeepSize(value) == sys.getsizeof(value)
+
+    # Each object is counted once.
+    assert GetDeepSize([value, value]) == sys.getsizeof([value, value]) + sys.getsizeof(value)
+    assert GetDeepSize({value: [value]}) > GetDeepSize({value: None})
+
+    class Slotted(object):
+        __slots__ = ('value',)
+
+        def __init__(self, value):
+            self.value = value
+
+    class Plain(object):
+
+        def __init__(self, value):
+            self.value = value
+            self.function = testGetDeepSize
+
+    # The class itself (and functions) are not counted.
+    assert GetDeepSize(Slotted(value)) == sys.getsizeof(Slotted(value)) + sys.getsizeof(value)
+    plain = Plain(value)
+    attributes_size = sum(sys.getsizeof(i) for i in plain.__dict__)
+    assert GetDeepSize(plain) == \
+        sys.getsizeof(plain) + sys.getsizeof(plain.__dict__) + attributes_size + sys.getsizeof(value)
+
+    # Cycles
+    cycle = []
+    cycle.append(cycle)
+    assert GetDeepSize(cycle) == sys.getsizeof(cycle)
+
+    # Objects already seen are skipped.
+    seen = set()
+    first, second = [value], [value]
+    assert GetDeepSize(first, seen) == sys.getsizeof(first) + sys.getsizeof(value)
+    assert GetDeepSize(second, seen) == sys.getsizeof(second)
+
+
+def testRegisterSizeEstimator():
+
+    class Custom(object):
+        pass
+
+    class SubCustom(Custom):
+        pass
+
+    def Estimate(obj, seen):
+        seen.add(id(obj))
+        return 1000
+
+    RegisterSizeEstimator(Custom, Estimate)
+    assert GetDeepSize(SubCustom()) == 1000
+    assert GetDeepSize([Custom(), Custom()]) == sys.getsizeof([None, None]) + 2000
+
+
+def testGetPytreeSize():
+    from zerotk.terraformer import TerraFormer
+
+    small = TerraFormer(source='import alpha\n').code
+    large = TerraFormer(source='import alpha\n' * 100).code
+    assert 0 < GetPytreeSize(small) < GetPytreeSize(large)
+
+    # Sub-trees referenced by other objects are counted once (the estimator is registered by
+    # default).
+    seen = set()
+    size = GetDeepSize(large, seen)
+    assert size == GetPytreeSize(large)
+    assert GetDeepSize([large.children[0]], seen) == sys.getsizeof([None])
+
+
+def testPytreeEstimatorRegistration():
+    """
+    The lib2to3 trees estimator is only registered once lib2to3 is loaded: using memory_size
+    doesn't import it.
+    """
+    import subprocess
+
+    code = (
+        'import sys\n'
+        'from zerotk.memory_size import GetDeepSize\n'
+        'GetDeepSize([1, "a"])\n'
+        'assert "lib2to3.pytree" not in sys.modules\n'
+        'from lib2to3.pytree import Leaf\n'
+        'from zerotk.memory_size import GetPytreeSize\n'
+        'leaf = Leaf(1, "a")\n'
+        'assert GetDeepSize(leaf) == GetPytreeSize(leaf)\n'
+    )
+    assert subprocess.call([sys.executable, '-c', code]) == 0
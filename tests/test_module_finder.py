@@ -0,0 +1,40 @@
+from __future__ import unicode_literals
+
+import pytest
+
+from zerotk.module_finder import GetModuleNameResolver, ModuleNameResolver
+
+
+class Test:
+
+    def testModuleNameResolver(self):
+        resolver = ModuleNameResolver(['/alpha', '/alpha/bravo/', '/zulu'])
+
+        assert resolver.ModuleName('/alpha/charlie.py') == 'charlie'
+        assert resolver.ModuleName('/alpha/charlie/__init__.py') == 'charlie.__init__'
+
+        # Longest python-path has priority.
+        assert resolver.ModuleName('/alpha/bravo/delta/echo.py') == 'delta.echo'
+
+        # Matches path components, not string prefixes.
+        with pytest.raises(RuntimeError):
+            resolver.ModuleName('/zulu_yankee/charlie.py')
+
+        assert resolver.ModuleNames(
+            ['/zulu/x_ray.py', '/yankee/charlie.py', '/alpha/bravo.py']
+        ) == ['x_ray', None, 'bravo']
+
+
+    def testModuleNameResolverWindowsPaths(self):
+        resolver = ModuleNameResolver(['x:\\alpha\\source\\python'])
+        assert resolver.ModuleName('x:\\alpha\\source\\python\\alpha\\bravo.py') == 'alpha.bravo'
+        assert resolver.ModuleName('x:/alpha/source/python/alpha/bravo.py') == 'alpha.bravo'
+
+
+    def testGetModuleNameResolver(self):
+        resolver = GetModuleNameResolver(['/alpha'])
+        assert resolver.ModuleName('/alpha/bravo.py') == 'bravo'
+
+        # Resolvers are cached per python-path.
+        assert GetModuleNameResolver(['/alpha']) is resolver
+        assert GetModuleNameResolver(['/alpha', '/bravo']) is not resolver
@@ -0,0 +1,67 @@
+from __future__ import unicode_literals
+
+from zerotk.easyfs import CreateFile
+from zerotk.terraformer._prefilter import IsReorganized, RefactorPrefilter
+from zerotk.text import dedent
+
+
+def testRefactorPrefilter():
+    prefilter = RefactorPrefilter(['alpha.bravo.Charlie', 'delta$', 'echo.foxtrot'])
+
+    assert prefilter.Search(b'from alpha.bravo import Charlie\n')
+    assert prefilter.Search(b'import alpha.bravo.Charlie\n')
+    assert prefilter.Search(b'import delta\n')
+    assert prefilter.Search(b'from echo import foxtrot\n')
+    assert prefilter.Search(b'x = echo.x\n')
+
+    # Matches whole names only.
+    assert not prefilter.Search(b'import alpha.bravo_zulu\n')
+    assert not prefilter.Search(b'import zulu.alpha.bravo\n')
+    assert not prefilter.Search(b'import deltas\n')
+    assert not prefilter.Search(b'from alpha import bravo\n')
+
+    assert not RefactorPrefilter([]).Search(b'import alpha\n')
+
+
+def testIsReorganized(embed_data):
+    assert IsReorganized('')
+    assert IsReorganized('x = 1\n')
+    assert IsReorganized(
+        dedent(
+            """
+            '''
+            Doc.
+            '''
+            from __future__ import unicode_literals
+            from alpha import Bravo, Charlie as C
+            import delta.echo as foxtrot
+            import golf
+
+            x = 1
+            """
+        )
+    )
+
+    # Not sorted.
+    assert not IsReorganized('import golf\nimport alpha\n')
+    # Two import-statements in one line.
+    assert not IsReorganized('import golf, alpha\n')
+    # Multiple runs of import-statements.
+    assert not IsReorganized('import alpha\nx = 1\nimport golf\n')
+    assert not IsReorganized('import alpha\n\nimport golf\n')
+    # Local imports.
+    assert not IsReorganized('def F():\n    import alpha\n')
+    # Comments.
+    assert not IsReorganized('import alpha  # comment\n')
+    assert not IsReorganized('# comment\nimport alpha\n')
+    # Too long.
+    assert not IsReorganized('from alpha import ' + ', '.join(['Name%d' % i for i in range(20)]))
+    # The word "import" anywhere else.
+    assert not IsReorganized('"""\nimport here.\n"""\n')
+
+    # Import-from statements from the file package may be changed by FixLocalSymbols.
+    data_dir = embed_data.get_data_dir()
+    CreateFile(data_dir + '/alpha/__init__.py', '')
+    filename = data_dir + '/alpha/bravo.py'
+    assert IsReorganized('from zulu import Charlie\n', filename)
+    assert not IsReorganized('from zulu.alpha import Charlie\n', filename)
@@ -0,0 +1,59 @@
+from __future__ import unicode_literals
+
+import io
+import json
+
+from zerotk.easyfs import CreateFile
+from zerotk.terraformer._symbol_export import DumpBinary, DumpNdjson, LoadBinary
+from zerotk.text import dedent
+
+
+def testSymbolExport(embed_data):
+    data_dir = embed_data.get_data_dir()
+    filename = data_dir + '/alpha.py'
+    CreateFile(
+        filename,
+        dedent(
+            """
+            import bravo as charlie
+            from delta import Echo
+
+            class Foxtrot(Echo):
+
+                def Golf(self):
+                    return charlie.Hotel
+            """
+        ) + '\n'
+    )
+
+    records = [json.loads(i) for i in DumpNdjson(filename).decode('UTF-8').splitlines()]
+    assert [
+        (i['scope'], i['kind'], i['name'], i['import_as'], i['lineno'], i['column'])
+        for i in records
+    ] == [
+        ('', 'module', 'module', None, 1, 0),
+        ('', 'IMPORT-BLOCK', 'import-block #0', None, 1, 0),
+        ('', 'IMPORT', 'bravo', 'charlie', 1, 0),
+        ('', 'IMPORT-FROM', 'delta', None, 0, 0),
+        ('', 'IMPORT', 'delta.Echo', None, 2, 0),
+        ('', 'USE', 'Echo', None, 3, 0),
+        ('', 'class', 'Foxtrot', None, 0, 0),
+        ('Foxtrot', 'def', 'Golf', None, 6, 4),
+        ('Foxtrot.Golf', 'ARG', 'self', None, 6, 13),
+        ('Foxtrot.Golf', 'USE', 'charlie.Hotel', None, 7, 15),
+    ]
+    assert set(i['file'] for i in records) == {filename}
+
+    # The binary format has the same contents.
+    assert list(LoadBinary(io.BytesIO(DumpBinary(filename)))) == records
+
+    # Errors.
+    error_filename = data_dir + '/error.py'
+    CreateFile(error_filename, 'import (\n')
+    records = [json.loads(i) for i in DumpNdjson(error_filename).decode('UTF-8').splitlines()]
+    assert len(records) == 1
+    assert records[0]['file'] == error_filename
+    assert 'ParseError' in records[0]['error']
+
+    stream = io.BytesIO(DumpBinary(error_filename) + DumpBinary(filename))
+    assert [i.get('error', '').split(':')[0] for i in LoadBinary(stream)][:2] == ['ParseError', '']
@@ -0,0 +1,34 @@
+from __future__ import unicode_literals
+
+import random
+
+from zerotk.terraformer._symbol_index import SymbolIndex
+
+
+def testSymbolIndex():
+    index = SymbolIndex([(1, 10, 'module'), (2, 2, 'import'), (4, 8, 'class'), (5, 6, 'method')])
+    assert len(index) == 4
+    assert index.GetSymbolsAt(0) == []
+    assert index.GetSymbolsAt(2) == ['module', 'import']
+    assert index.GetSymbolsAt(5) == ['module', 'class', 'method']
+    assert index.GetSymbolsAt(8) == ['module', 'class']
+    assert index.GetSymbolsAt(11) == []
+    assert index.GetSymbolsInRange(2, 4) == ['module', 'import', 'class']
+    assert index.GetSymbolsInRange(3, 3) == ['module']
+    assert SymbolIndex().GetSymbolsAt(1) == []
+
+
+def testSymbolIndexRandom():
+    rand = random.Random(1)
+    spans = []
+    for i in range(500):
+        first = rand.randint(1, 1000)
+        spans.append((first, first + rand.choice([0, 0, 1, 5, 50, 500]), i))
+    index = SymbolIndex(spans)
+    ordered = sorted(spans, key=lambda x: (x[0], -x[1]))
+
+    for _i in range(200):
+        first = rand.randint(0, 1600)
+        last = first + rand.choice([0, 0, 3, 100])
+        expected = [k for i, j, k in ordered if i <= last and j >= first]
+        assert index.GetSymbolsInRange(first, last) == expected
@@ -360,6 +360,449 @@ def testReorganizeImports(embed_data, line_tester):
     )
 
 
+def testReorganizeImportsNodes():
+    """
+    The reorganized import-statements are real lib2to3 nodes: the same tree we get parsing the
+    generated source.
+    """
+    source = dedent(
+        '''
+        import zulu, alpha  # Comment
+        from bravo import Delta, Charlie, Echo, Foxtrot
+
+        def Function():
+            import yankee, xray; x = 1
+            return x
+        '''
+    ) + '\n'
+    terra = TerraFormer(source=source)
+    assert terra.ReorganizeImports(page_width=40)
+    source = terra.GenerateSource()
+    assert source == dedent(
+        '''
+        from bravo import (Charlie, Delta, Echo,
+            Foxtrot)
+        import alpha  # Comment
+        import zulu  # Comment
+
+        def Function():
+            import xray
+            import yankee; x = 1
+            return x
+        '''
+    ) + '\n'
+    assert terra.code == TerraFormer._Parse(source)
+
+    # Reorganizing again replaces the new nodes.
+    terra.ReorganizeImports(refactor={'yankee': 'charlie'})
+    source = terra.GenerateSource()
+    assert source == dedent(
+        '''
+        from bravo import Charlie, Delta, Echo, Foxtrot
+        import alpha  # Comment
+        import zulu  # Comment
+
+        def Function():
+            import charlie
+            import xray; x = 1
+            return x
+        '''
+    ) + '\n'
+    assert terra.code == TerraFormer._Parse(source)
+
+    # Relative, dotted, aliased and star imports, with the hanging style trailing comma.
+    terra = TerraFormer(
+        source=dedent(
+            '''
+            from alpha.bravo import charlie as C, delta
+            import os.path as P, sys
+            from . import echo
+            from foxtrot import *
+            '''
+        ) + '\n'
+    )
+    assert terra.ReorganizeImports(page_width=30, wrap_style='hanging')
+    source = terra.GenerateSource()
+    assert source == dedent(
+        '''
+        from . import echo
+        from alpha.bravo import (
+            charlie as C,
+            delta,
+        )
+        from foxtrot import *
+        import os.path as P
+        import sys
+        '''
+    ) + '\n'
+    assert terra.code == TerraFormer._Parse(source)
+
+
+def testCreateCodePerformance():
+    """
+    Time to create the reorganized import-statements nodes: building them directly (CreateCode)
+    against parsing the created text (set PRINT_PERFORMANCE to see them).
+
+    Results 2026-10-19
+    ---------------------------------------------------------
+    statements= 50  CreateCode: 0.0018s  parse CreateText: 0.0052s
+    statements=500  CreateCode: 0.0183s  parse CreateText: 0.0500s
+    ---------------------------------------------------------
+    """
+    import timeit
+
+    PRINT_PERFORMANCE = False
+
+    for i_count in (50, 500):
+        lines = []
+        for j in range(i_count):
+            lines.append('from package%d import (Alpha, Bravo as B, Charlie, Delta, Echo,' % j)
+            lines.append('    Foxtrot)  # Comment')
+        terra = TerraFormer(source='\n'.join(lines) + '\n')
+        import_block = terra.import_blocks[0]
+
+        def CreateCode():
+            return import_block.CreateCode(import_block._children, 0, 60)
+
+        def ParseCreateText():
+            statements = import_block.CreateText(import_block._children, 0, 60)
+            text = ''.join([i_text + i_comment + '\n' for i_text, i_comment in statements])
+            return TerraFormer._Parse(text).children[:-1]
+
+        assert CreateCode() == ParseCreateText()
+        code_time = min(timeit.repeat(CreateCode, number=1, repeat=3))
+        parse_time = min(timeit.repeat(ParseCreateText, number=1, repeat=3))
+        if PRINT_PERFORMANCE:
+            print('statements=%3d  CreateCode: %.4fs  parse CreateText: %.4fs' % (
+                i_count, code_time, parse_time))
+
+
+def testReorganizeImportsAfterComment():
+    """
+    The inline comment after a string statement (the module docstring) belongs to the statement
+    and doesn't take its EOL with it when the imports are reorganized.
+    """
+    source = dedent(
+        '''
+        """Docstring."""  # Comment
+        # Other comment
+
+        import zulu, alpha
+        '''
+    ) + '\n'
+    terra = TerraFormer(source=source)
+    assert terra.ReorganizeImports()
+    assert terra.GenerateSource() == dedent(
+        '''
+        """Docstring."""  # Comment
+        # Other comment
+
+        import alpha
+        import zulu
+        '''
+    ) + '\n'
+    assert terra.code == TerraFormer._Parse(terra.GenerateSource())
+
+    # Also when adding imports.
+    terra = TerraFormer(source='"""Docstring."""  # Comment\n\nx = 1\n')
+    terra.AddImportSymbol('__future__.unicode_literals')
+    terra.ReorganizeImports()
+    assert terra.GenerateSource() == \
+        '"""Docstring."""  # Comment\nfrom __future__ import unicode_literals\n\nx = 1\n'
+
+
+def testGetSymbolFromToken():
+    terra = TerraFormer(
+        source=dedent(
+            '''
+            import alpha
+            from bravo import Bravo, Charlie
+            from delta import Delta as MyDelta
+            '''
+        )
+    )
+    assert terra.GetSymbolFromToken('alpha').name == 'alpha'
+    assert terra.GetSymbolFromToken('Bravo').name == 'bravo.Bravo'
+    assert terra.GetSymbolFromToken('Delta').name == 'delta.Delta'
+    assert terra.GetSymbolFromToken('Zulu') is None
+    assert terra.GetSymbolFromName('bravo.Charlie').GetToken() == 'Charlie'
+    assert terra.GetSymbolFromName('Charlie') is None
+
+    assert {
+        k: v and v.name
+        for k, v in terra.GetSymbolsFromTokens(['Bravo', 'Zulu']).items()
+    } == {'Bravo': 'bravo.Bravo', 'Zulu': None}
+    assert {
+        k: v and v.GetToken()
+        for k, v in terra.GetSymbolsFromNames(['alpha', 'bravo.Charlie']).items()
+    } == {'alpha': 'alpha', 'bravo.Charlie': 'Charlie'}
+
+    # The indexes are updated by AddImportSymbol and ReorganizeImports (refactor).
+    terra.AddImportSymbol('__future__.unicode_literals')
+    assert terra.GetSymbolFromToken('unicode_literals').name == '__future__.unicode_literals'
+
+    terra.ReorganizeImports(refactor={'bravo': 'zulu'})
+    assert terra.GetSymbolFromToken('Bravo').name == 'zulu.Bravo'
+    assert terra.GetSymbolFromName('bravo.Bravo') is None
+    assert terra.GetSymbolFromName('zulu.Charlie').GetToken() == 'Charlie'
+    assert set([i.name for i in terra.symbols]) == {
+        '__future__.unicode_literals',
+        'alpha',
+        'zulu.Bravo',
+        'zulu.Charlie',
+        'delta.Delta',
+    }
+
+
+def testRemoveSymbolByIdentity():
+    """
+    Removing an import-symbol doesn't remove an equal one (same name) from another import-block.
+    """
+    terra = TerraFormer(
+        source=dedent(
+            '''
+            import alpha
+
+            def Function():
+                import alpha
+            '''
+        )
+    )
+    module_alpha, function_alpha = [
+        i_symbol
+        for i_import_block in terra.import_blocks
+        for i_symbol in i_import_block.Walk()
+        if i_symbol.name == 'alpha'
+    ]
+    assert module_alpha is not function_alpha
+    assert module_alpha == function_alpha
+    assert terra.GetSymbolFromName('alpha') is module_alpha
+
+    terra._ReplaceSymbols([(function_alpha, None)])
+    assert terra.GetSymbolFromName('alpha') is module_alpha
+    assert terra.GetSymbolFromToken('alpha') is module_alpha
+    assert [i.name for i in terra.symbols] == ['alpha']
+
+    terra._ReplaceSymbols([(module_alpha, None)])
+    assert terra.GetSymbolFromName('alpha') is None
+    assert terra.symbols == set()
+
+
+def testCreateText():
+    from zerotk.terraformer._symbol import ImportBlock
+
+    terra = TerraFormer(
+        source=dedent(
+            '''
+            import zulu as Z  # Zulu
+            from alpha import echo, delta, charlie as C, bravo
+            '''
+        )
+    )
+    import_block = terra.import_blocks[0]
+    assert import_block.CreateText(import_block._children, 0, 100) == [
+        ('from alpha import bravo, charlie as C, delta, echo', ''),
+        ('import zulu as Z', '  # Zulu'),
+    ]
+    assert import_block.CreateText(import_block._children, 4, 30) == [
+        ('    from alpha import (bravo,\n        charlie as C, delta,\n        echo)', ''),
+        ('    import zulu as Z', '  # Zulu'),
+    ]
+
+    # Wrap styles.
+    assert import_block.CreateText(import_block._children, 0, 30, wrap_style='hanging')[0] == (
+        'from alpha import (\n    bravo,\n    charlie as C,\n    delta,\n    echo,\n)',
+        ''
+    )
+    assert import_block.CreateText(import_block._children, 0, 40, wrap_style='grid')[0] == (
+        'from alpha import (bravo, charlie as C,\n                   delta, echo)',
+        ''
+    )
+
+    terra.ReorganizeImports(page_width=30, wrap_style='hanging')
+    assert terra.GenerateSource() == dedent(
+        '''
+        from alpha import (
+            bravo,
+            charlie as C,
+            delta,
+            echo,
+        )
+        import zulu as Z  # Zulu
+        '''
+    ) + '\n'
+
+
+def testWrapParts():
+    from zerotk.terraformer._wrap import WrapParts, WrapPrefixes
+
+    parts = [('', 'alpha'), (', ', 'bravo'), (', ', 'charlie')]
+    assert WrapParts(parts, 12, 0, 0) == 'alpha,\n    bravo,\n    charlie'
+    assert WrapParts(parts, 100, 0, 0) == 'alpha, bravo, charlie'
+    assert WrapParts(parts, 18, 0, 2, 'grid') == 'alpha, bravo,\n  charlie'
+    assert WrapParts(parts, 100, 4, 0, 'hanging') == \
+        '\n        alpha,\n        bravo,\n        charlie,\n    '
+    assert WrapPrefixes(parts, 12, 0, 0) == (['', ',\n    ', ',\n    '], '')
+
+    with pytest.raises(ValueError):
+        WrapParts(parts, 100, 0, 0, 'zigzag')
+
+
+def testSymbolsMemory():
+    '''
+    Memory used by the symbols tree (symbols instances, attributes dicts, children lists and
+    names), measured with sys.getsizeof on python 2.7 (64 bits).
+
+    Results 2026-10-19 (__slots__, lazy children lists and interned names)
+    ---------------------------------------------------------
+    3208 symbols: 163.0 bytes per symbol
+    ---------------------------------------------------------
+
+    Results < 2026-10-19
+    ---------------------------------------------------------
+    3208 symbols: 1264.5 bytes per symbol
+    ---------------------------------------------------------
+    '''
+    import sys
+
+    lines = []
+    for i in range(200):
+        lines.append('import module_%d' % i)
+        lines.append('from package_%d import Alpha%d, Bravo%d as B%d' % (i % 10, i, i, i))
+    for i in range(200):
+        lines.append('def Function%d(alpha, bravo):' % i)
+        lines.append('    charlie = module_%d.Call(alpha, bravo)' % i)
+        lines.append('    delta = Alpha%d' % i)
+    terra = TerraFormer(source='\n'.join(lines) + '\n')
+
+    symbols = list(terra.module.Walk())
+    names = {}
+    total = 0
+    for i_symbol in symbols:
+        assert not hasattr(i_symbol, '__dict__')
+        total += sys.getsizeof(i_symbol)
+        if isinstance(i_symbol._children, list):
+            total += sys.getsizeof(i_symbol._children)
+        names[id(i_symbol.name)] = i_symbol.name
+    total += sum(map(sys.getsizeof, names.values()))
+
+    # Symbols with the same name share the same string.
+    assert len(names) == len(set(names.values()))
+
+    PRINT_MEMORY = False
+    if PRINT_MEMORY:
+        print('%d symbols: %.1f bytes per symbol' % (len(symbols), float(total) / len(symbols)))
+
+
+def testFactoryCacheMemory():
+    TerraFormer.Factory.ClearCache()
+    assert TerraFormer.Factory.GetCacheSize() == 0
+
+    source = 'import alpha\n' * 100
+    terra = TerraFormer.Factory('alpha.py', source)
+    assert TerraFormer.Factory('alpha.py', source) is terra
+    size = TerraFormer.Factory.GetCacheSize()
+    assert size > len(source)
+
+    TerraFormer.Factory('bravo.py', source)
+    assert TerraFormer.Factory.GetCacheSize() > size
+
+    TerraFormer.Factory.ClearCache()
+    assert TerraFormer.Factory.GetCacheSize() == 0
+
+
+def testFactoryInvalidation(embed_data):
+    from zerotk.easyfs import CreateFile
+
+    filename = embed_data['testFactoryInvalidation.py']
+    CreateFile(filename, 'import alpha\n')
+    terra = TerraFormer.Factory(filename)
+    assert TerraFormer.Factory(filename) is terra
+
+    # Changed on disk: the stale instance is discarded.
+    CreateFile(filename, 'import bravo, alpha\n')
+    changed = TerraFormer.Factory(filename)
+    assert changed is not terra
+    assert changed.GenerateSource() == 'import bravo, alpha\n'
+    assert TerraFormer.Factory(filename) is changed
+
+    # Saved by TerraFormer itself (changing the size, so it doesn't depend on the mtime
+    # resolution).
+    changed.ReorganizeImports()
+    assert changed.Save()
+    saved = TerraFormer.Factory(filename)
+    assert saved is not changed
+    assert saved.GenerateSource() == 'import alpha\nimport bravo\n'
+
+
+def testUnusedImports():
+    terra = TerraFormer(
+        dedent(
+            """
+            # Header
+            from __future__ import unicode_literals
+            import os
+            import sys, re
+            from alpha import Bravo, Charlie as Delta, Echo  # @UnusedImport
+            from foxtrot import Golf, Hotel
+            import india.juliet
+            import kilo as lima
+
+            __all__ = ['Golf']
+
+            def Function(x):
+                try:
+                    import mike
+                except ImportError:
+                    pass
+                return sys.argv, x.Hotel, Delta(re=1), india.juliet.x
+            """
+        ) + '\n'
+    )
+    assert [(i.name, i.GetBoundName()) for i in terra.GetUnusedImports()] == [
+        ('os', 'os'),
+        ('foxtrot.Hotel', 'Hotel'),
+        ('kilo', 'lima'),
+        ('mike', 'mike'),
+    ]
+
+    # Only module level imports are removed: removing "mike" would leave an empty "try" body.
+    terra.ReorganizeImports(remove_unused=True)
+    assert terra.GenerateSource() == dedent(
+        """
+        # Header
+        from __future__ import unicode_literals
+        from alpha import Bravo, Charlie as Delta, Echo  # @UnusedImport
+        from foxtrot import Golf
+        import india.juliet
+        import re
+        import sys
+
+        __all__ = ['Golf']
+
+        def Function(x):
+            try:
+                import mike
+            except ImportError:
+                pass
+            return sys.argv, x.Hotel, Delta(re=1), india.juliet.x
+        """
+    ) + '\n'
+    assert terra.GetSymbolFromName('os') is None
+    assert terra.GetSymbolFromName('foxtrot.Hotel') is None
+    assert [i.name for i in terra.GetUnusedImports()] == ['mike']
+
+    # Removing all import-statements of a block keeps the preceding comments.
+    terra = TerraFormer('"""Doc."""\n# Comment\nimport os\n\nx = 1\n')
+    terra.ReorganizeImports(remove_unused=True)
+    assert terra.GenerateSource() == '"""Doc."""\n# Comment\n\nx = 1\n'
+
+    # Import-statements followed by ";" are kept.
+    terra = TerraFormer('import os; x = 1\n')
+    terra.ReorganizeImports(remove_unused=True)
+    assert terra.GenerateSource() == 'import os; x = 1\n'
+
+
 def testQuotedBlock():
     assert TerraFormer._QuotedBlock(
         'alpha\nbravo\ncharlie\n'
@@ -431,6 +874,107 @@ def test_rename(embed_data, line_tester):
     )
 
 
+def testGetSymbolsAt():
+    from zerotk.terraformer._symbol import ImportBlock
+
+    terra = TerraFormer(
+        source=dedent(
+            """
+            import os
+            from alpha import (Bravo,
+                Charlie)
+
+            class Zulu(Base):
+
+                def Method(self):
+                    return os.path.join('''
+                    ''')
+
+            def Function():
+                import sys
+            """
+        ) + '\n'
+    )
+
+    def GetSymbolsAt(lineno, symbol_class=None):
+        return [(i.PREFIX, i.name) for i in terra.GetSymbolsAt(lineno, symbol_class)]
+
+    assert GetSymbolsAt(2) == [
+        ('module', 'module'),
+        ('IMPORT-BLOCK', 'import-block #0'),
+        ('IMPORT', 'alpha.Bravo'),
+        ('IMPORT', 'alpha.Charlie'),
+    ]
+    assert GetSymbolsAt(3, ImportBlock) == [('IMPORT-BLOCK', 'import-block #0')]
+    assert GetSymbolsAt(5) == [('module', 'module'), ('class', 'Zulu'), ('USE', 'Base')]
+    assert GetSymbolsAt(9) == [
+        ('module', 'module'), ('class', 'Zulu'), ('def', 'Method'), ('USE', 'os.path')
+    ]
+    assert GetSymbolsAt(10) == [('module', 'module')]
+    assert GetSymbolsAt(12, ImportBlock) == [('IMPORT-BLOCK', 'import-block #1')]
+    assert [i.name for i in terra.GetSymbolsInRange(7, 11) if i.PREFIX == 'def'] == [
+        'Method', 'Function'
+    ]
+
+    # The index is built on the first query and rebuilt after the import-symbols change.
+    terra = TerraFormer(source='"""Doc."""\nimport alpha\nimport bravo\n')
+    assert terra._symbol_index is None
+    assert GetSymbolsAt(3) == [
+        ('module', 'module'), ('IMPORT-BLOCK', 'import-block #0'), ('IMPORT', 'bravo')
+    ]
+    terra.ReorganizeImports(refactor={'bravo': 'zulu'})
+    assert terra._symbol_index is None
+    assert GetSymbolsAt(3) == [
+        ('module', 'module'), ('IMPORT-BLOCK', 'import-block #0'), ('IMPORT', 'zulu')
+    ]
+
+
+def testReplaceNodes():
+    from lib2to3.fixer_util import Name
+    from zerotk.terraformer._symbol import Symbol
+
+    code = TerraFormer._Parse('alpha = [a, b, c, d, e]\n')
+    atom = code.children[0].children[0].children[2]
+    listmaker = atom.children[1]
+    a, _, b, _, c, _, d, _, e = listmaker.children
+
+    # Two runs: "a, b" and "d".
+    Symbol._ReplaceNodes(listmaker.children[0:3] + [d], [Name('x'), Name(', y')])
+    assert str(code) == 'alpha = [x, y, c,, e]\n'
+    assert a.parent is None and b.parent is None and d.parent is None
+    assert all(i.parent is listmaker for i in listmaker.children)
+
+    # Nodes already removed are ignored.
+    Symbol._ReplaceNodes([a, c], [])
+    assert str(code) == 'alpha = [x, y,,, e]\n'
+
+    Symbol._InsertCodeBeforeNode(e, Name('z', prefix=' '))
+    assert str(code) == 'alpha = [x, y,,, z e]\n'
+
+    # The siblings are up-to-date (python 3 lib2to3 caches them).
+    z = e.prev_sibling
+    assert str(z) == ' z'
+    assert z.next_sibling is e
+    assert e.next_sibling is None
+
+
+def testRenameSymbolUsages():
+    source = 'import cStringIO\n\nstreams = [\n%s]\n' % ''.join(
+        ['    cStringIO.StringIO(%d),\n' % i for i in range(500)]
+    )
+
+    terra = TerraFormer(source=source)
+    assert terra.RenameSymbolUsages({'cStringIO.StringIO': 'StringIO', 'zulu.Zulu': 'Zulu'}) == 500
+    assert terra.GenerateSource() == source.replace('cStringIO.StringIO(', 'StringIO(')
+
+    # Same results renaming one by one.
+    expected = TerraFormer(source=source)
+    for i_symbol in expected.module.Walk():
+        if i_symbol.PREFIX == 'USE' and i_symbol.name == 'cStringIO.StringIO':
+            i_symbol.Rename('StringIO')
+    assert expected.GenerateSource() == terra.GenerateSource()
+
+
 def testSymbolVisitor():
 
     def PrintScopes(scopes):
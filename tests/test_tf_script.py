@@ -21,12 +21,16 @@ def testDocs():
 
                 Commands:
                     symbols             List all symbols in the given python source code. Currently only lists IMPORTS.
+                    export-symbols      Exports the symbols of many python modules in a machine-readable format.
                     fix-format          Perform the format fixes on sources files, including tabs, eol, eol-spaces and imports.
                     add-import-symbol   Adds an import-symbol in all files.
                     fix-commit          Perform the format fixes on sources files on a git repository modified files.
                     fix-is-frozen       Fix some pre-determinated set of symbols usage with the format:
                     fix-encoding        Fix python module files encoding, converting all non-ascii encoded files to UTF-8.
                     fix-stringio        Fix StringIO usage.
+                    unused-imports      Lists the imports not used by the python modules.
+                    graph               Builds the graph of imports between all python modules in the given directories.
+                    cycles              Lists the import cycles between the python modules in the given directories.
 
             """
         )
@@ -65,6 +69,41 @@ def testSymbols(embed_data):
     )
 
 
+def testSymbolsMultipleFiles(embed_data):
+    """
+    Test tf symbols command with directories and many files.
+    """
+    data_dir = embed_data.get_data_dir()
+    source_dir = data_dir + '/testSymbolsMultipleFiles'
+    CreateFile(source_dir + '/bravo.py', 'import zulu\nimport charlie\n')
+    CreateFile(source_dir + '/alpha.py', 'import os\n\nfrom yankee import Yankee\n')
+    CreateFile(source_dir + '/empty.py', '')
+
+    app.TestScript(
+        dedent(
+            """
+                >terraformer symbols --single-job %(source_dir)s
+                %(source_dir)s/alpha.py:1: IMPORT os
+                %(source_dir)s/alpha.py:3: IMPORT yankee.Yankee
+                %(source_dir)s/bravo.py:1: IMPORT zulu
+                %(source_dir)s/bravo.py:2: IMPORT charlie
+            """ % locals()
+        )
+    )
+
+    app.TestScript(
+        dedent(
+            """
+                >terraformer symbols %(source_dir)s/bravo.py %(source_dir)s/alpha.py
+                %(source_dir)s/alpha.py:1: IMPORT os
+                %(source_dir)s/alpha.py:3: IMPORT yankee.Yankee
+                %(source_dir)s/bravo.py:1: IMPORT zulu
+                %(source_dir)s/bravo.py:2: IMPORT charlie
+            """ % locals()
+        )
+    )
+
+
 def testFixFormat(embed_data):
     """
     General test for tbe "tf fix-format" command.
@@ -116,6 +155,19 @@ def testFixFormat(embed_data):
         """
     )
 
+    # The wrap style is validated before processing any file.
+    assert CreateFile(filename, dedent(original), encoding='UTF-8')
+    app.TestScript(
+        dedent(
+            """
+                >terraformer fix-format --single-job --wrap-style=zigzag %(data_dir)s [retcode=1]
+                Unknown wrap style: zigzag (expected one of: fill, hanging, grid)
+
+            """ % locals()
+        )
+    )
+    assert GetFileContents(filename, encoding='UTF-8') == dedent(original)
+
 
 def test_fix_format_error(embed_data):
     """
@@ -359,3 +411,352 @@ def testFixIsFrozen(embed_data):
 
         """
     )
+
+
+def testGraph(embed_data):
+    """
+    Test "tf graph" command.
+    """
+    data_dir = embed_data.get_data_dir()
+    assert CreateFile(data_dir + '/source/alpha.py', 'import bravo\nimport os\n')
+    assert CreateFile(data_dir + '/source/bravo.py', 'import alpha\n')
+    source_dir = data_dir + '/source'
+    output = data_dir + '/graph.bin'
+
+    app.TestScript(
+        dedent(
+            """
+                >terraformer graph %(source_dir)s --output=%(output)s --single-job
+                3 modules, 3 imports (2 of 2 files scanned)
+            """ % locals()
+        )
+    )
+
+    # Incremental: nothing changed, nothing scanned.
+    app.TestScript(
+        dedent(
+            """
+                >terraformer graph %(source_dir)s --output=%(output)s --single-job
+                3 modules, 3 imports (0 of 2 files scanned)
+            """ % locals()
+        )
+    )
+
+    # Graphs saved by another version are rebuilt.
+    from six.moves import cPickle
+    with open(output, 'wb') as oss:
+        cPickle.dump({'version': 0}, oss, 2)
+    app.TestScript(
+        dedent(
+            """
+                >terraformer graph %(source_dir)s --output=%(output)s --single-job
+                3 modules, 3 imports (2 of 2 files scanned)
+            """ % locals()
+        )
+    )
+
+
+def testCycles(embed_data):
+    """
+    Test "tf cycles" command.
+    """
+    data_dir = embed_data.get_data_dir()
+    assert CreateFile(data_dir + '/source/alpha.py', 'import os\nimport bravo\n')
+    assert CreateFile(data_dir + '/source/bravo.py', 'import alpha\n')
+    assert CreateFile(data_dir + '/source/charlie.py', 'import alpha\n')
+    source_dir = data_dir + '/source'
+    output = data_dir + '/graph.bin'
+
+    app.TestScript(
+        dedent(
+            """
+                >terraformer cycles %(source_dir)s --output=%(output)s --single-job
+                alpha -> bravo -> alpha
+                - %(source_dir)s/alpha.py:2: bravo
+                - %(source_dir)s/bravo.py:1: alpha
+                1 cycles
+            """ % locals()
+        )
+    )
+
+    # Incremental: breaks the cycle.
+    assert CreateFile(data_dir + '/source/bravo.py', 'import charlie, os\n')
+    app.TestScript(
+        dedent(
+            """
+                >terraformer cycles %(source_dir)s --output=%(output)s --single-job
+                alpha -> bravo -> charlie -> alpha
+                - %(source_dir)s/alpha.py:2: bravo
+                - %(source_dir)s/bravo.py:1: charlie
+                - %(source_dir)s/charlie.py:1: alpha
+                1 cycles
+            """ % locals()
+        )
+    )
+
+
+def testUnusedImports(embed_data):
+    """
+    Test "tf unused-imports" command and the fix-format option to remove them.
+    """
+    filename = embed_data['testUnusedImports.py']
+    original = """
+        import os
+        import sys
+        from alpha import Bravo, Charlie
+
+        def Main():
+            return sys.argv, Charlie
+    """
+    assert CreateFile(filename, dedent(original), encoding='UTF-8')
+
+    app.TestScript(
+        dedent(
+            """
+                >terraformer unused-imports %(filename)s
+                %(filename)s:1: os
+                %(filename)s:3: alpha.Bravo
+            """ % locals()
+        )
+    )
+
+    app.TestScript(
+        dedent(
+            """
+                >terraformer fix-format --single-job --remove-unused-imports %(filename)s
+                - %(filename)s: FIXED
+            """ % locals()
+        )
+    )
+    assert GetFileContents(filename, encoding='UTF-8') == dedent(
+        """
+        from alpha import Charlie
+        import sys
+
+        def Main():
+            return sys.argv, Charlie
+
+        """
+    )
+
+
+def testUnusedImportsErrors(embed_data, monkeypatch):
+    """
+    "tf unused-imports" reports the files it can't parse and continues with the others.
+    """
+    from zerotk.terraformer import TerraFormer
+
+    data_dir = embed_data.get_data_dir()
+    source_dir = data_dir + '/source'
+    assert CreateFile(source_dir + '/alpha.py', 'import os\n')
+    assert CreateFile(source_dir + '/bravo.py', 'def (:\n')
+    assert CreateFile(source_dir + '/charlie.py', 'import sys\n' + '#' * 100 + '\n')
+
+    monkeypatch.setattr(TerraFormer, 'MAX_FILE_SIZE', 50)
+    _retcode, output = app.TestCall('terraformer unused-imports %s' % source_dir)
+    lines = output.splitlines()
+    assert '%s/alpha.py:1: os' % source_dir in lines
+    assert '- %s/charlie.py: FileTooBig (for TerraFormer)' % source_dir in lines
+    assert any(i.startswith('- %s/bravo.py: ERROR: ParseError: ' % source_dir) for i in lines)
+
+
+def testFixFormatImportIndex(embed_data):
+    """
+    With an imports index, "tf fix-format --refactor" only processes the affected files: the
+    imports of the other files are not reorganized (as they are without the index).
+    """
+    data_dir = embed_data.get_data_dir()
+    source_dir = data_dir + '/source'
+    assert CreateFile(source_dir + '/alpha.py', 'import zulu\nfrom bravo import Bravo\n')
+    assert CreateFile(source_dir + '/charlie.py', 'import zulu\nimport bravo\n')
+    assert CreateFile(source_dir + '/delta.py', 'import zulu\nimport alpha\n')
+    assert CreateFile(data_dir + '/refactor.ini', 'bravo.Bravo = echo.Bravo\n')
+    refactor = data_dir + '/refactor.ini'
+    index = data_dir + '/index.bin'
+
+    app.TestScript(
+        dedent(
+            """
+                >terraformer fix-format --single-job --refactor=%(refactor)s --import-index=%(index)s --python-path=%(source_dir)s %(source_dir)s
+                - %(source_dir)s/alpha.py: FIXED
+            """ % locals()
+        )
+    )
+    assert GetFileContents(source_dir + '/alpha.py') == 'from echo import Bravo\nimport zulu\n'
+    assert GetFileContents(source_dir + '/charlie.py') == 'import zulu\nimport bravo\n'
+    assert GetFileContents(source_dir + '/delta.py') == 'import zulu\nimport alpha\n'
+
+    # Without the index all the files are processed.
+    app.TestScript(
+        dedent(
+            """
+                >terraformer fix-format --single-job --sorted --refactor=%(refactor)s %(source_dir)s
+                - %(source_dir)s/alpha.py: skipped
+                - %(source_dir)s/charlie.py: FIXED
+                - %(source_dir)s/delta.py: FIXED
+            """ % locals()
+        )
+    )
+    assert GetFileContents(source_dir + '/charlie.py') == 'import bravo\nimport zulu\n'
+    assert GetFileContents(source_dir + '/delta.py') == 'import alpha\nimport zulu\n'
+
+
+def testFixFormatImportIndexPythonPath(embed_data):
+    """
+    "tf fix-format --import-index" uses the python-path stored in the index (built by the graph
+    command), not the given sources, that may be just some files.
+    """
+    from zerotk.terraformer._import_graph import ImportGraph
+
+    data_dir = embed_data.get_data_dir()
+    source_dir = data_dir + '/source'
+    assert CreateFile(source_dir + '/alpha/__init__.py', '')
+    assert CreateFile(source_dir + '/alpha/bravo.py', 'import zulu\nfrom alpha.charlie import Charlie\n')
+    assert CreateFile(source_dir + '/alpha/charlie.py', 'Charlie = 1\n')
+    assert CreateFile(source_dir + '/delta.py', 'import zulu\nimport alpha.charlie\n')
+    assert CreateFile(data_dir + '/refactor.ini', 'alpha.charlie.Charlie = echo.Charlie\n')
+    refactor = data_dir + '/refactor.ini'
+    index = data_dir + '/index.bin'
+    filename = source_dir + '/alpha/bravo.py'
+
+    # Without the index nor the python-path.
+    app.TestScript(
+        dedent(
+            """
+                >terraformer fix-format --single-job --refactor=%(refactor)s --import-index=%(index)s %(filename)s [retcode=1]
+                Import index not found: %(index)s (build it with the graph command or pass --python-path)
+            """ % locals()
+        )
+    )
+
+    app.TestScript(
+        dedent(
+            """
+                >terraformer graph %(source_dir)s --output=%(index)s --single-job
+                5 modules, 4 imports (4 of 4 files scanned)
+                >terraformer fix-format --single-job --refactor=%(refactor)s --import-index=%(index)s %(filename)s
+                - %(filename)s: FIXED
+            """ % locals()
+        )
+    )
+    assert GetFileContents(filename) == 'from echo import Charlie\nimport zulu\n'
+    assert GetFileContents(source_dir + '/delta.py') == 'import zulu\nimport alpha.charlie\n'
+    graph = ImportGraph.Load(index)
+    assert graph.python_path == [source_dir]
+    assert len(graph.files) == 4
+
+    # The index is not overwritten when built with another python-path.
+    index_contents = GetFileContents(index, binary=True)
+    other_dir = source_dir + '/alpha'
+    app.TestScript(
+        dedent(
+            """
+                >terraformer fix-format --single-job --refactor=%(refactor)s --import-index=%(index)s --python-path=%(other_dir)s %(filename)s [retcode=1]
+                The import index %(index)s was built with another python-path: %(source_dir)s
+            """ % locals()
+        )
+    )
+    assert GetFileContents(index, binary=True) == index_contents
+
+
+def testFixFormatRefactorPrefilter(embed_data, monkeypatch):
+    """
+    "tf fix-format --refactor" doesn't parse files without refactor names and already organized
+    imports.
+    """
+    from zerotk.terraformer import TerraFormer
+
+    data_dir = embed_data.get_data_dir()
+    source_dir = data_dir + '/source'
+    assert CreateFile(source_dir + '/alpha.py', 'from bravo import Bravo\nimport zulu\n')
+    assert CreateFile(source_dir + '/charlie.py', 'import yankee\nimport zulu\n')
+    assert CreateFile(source_dir + '/delta.py', 'import zulu\nimport alpha\n')
+    assert CreateFile(data_dir + '/refactor.ini', 'bravo.Bravo = echo.Bravo\n')
+    refactor = data_dir + '/refactor.ini'
+
+    parsed = []
+    original_init = TerraFormer.__init__
+
+    def TerraFormerInit(self, source=None, filename=None):
+        parsed.append(filename)
+        original_init(self, source=source, filename=filename)
+
+    monkeypatch.setattr(TerraFormer, '__init__', TerraFormerInit)
+
+    app.TestScript(
+        dedent(
+            """
+                >terraformer fix-format --single-job --sorted --refactor=%(refactor)s %(source_dir)s
+                - %(source_dir)s/alpha.py: FIXED
+                - %(source_dir)s/charlie.py: skipped
+                - %(source_dir)s/delta.py: FIXED
+            """ % locals()
+        )
+    )
+    assert GetFileContents(source_dir + '/alpha.py') == 'from echo import Bravo\nimport zulu\n'
+    assert sorted(parsed) == [source_dir + '/alpha.py', source_dir + '/delta.py']
+
+
+def testExportSymbols(embed_data):
+    """
+    Test "tf export-symbols" command.
+    """
+    import io
+    import json
+    from zerotk.terraformer._symbol_export import LoadBinary
+
+    data_dir = embed_data.get_data_dir()
+    source_dir = data_dir + '/source'
+    assert CreateFile(source_dir + '/alpha.py', 'import bravo\n')
+    assert CreateFile(source_dir + '/charlie.py', 'from delta import Echo as E\n')
+    output = data_dir + '/symbols.ndjson'
+
+    app.TestScript(
+        dedent(
+            """
+                >terraformer export-symbols --single-job --output=%(output)s %(source_dir)s
+            """ % locals()
+        )
+    )
+    with io.open(output, 'rb') as iss:
+        records = [json.loads(i) for i in iss.read().decode('UTF-8').splitlines()]
+    assert sorted(
+        (i['file'], i['kind'], i['name'], i['import_as']) for i in records if i['kind'] == 'IMPORT'
+    ) == [
+        (source_dir + '/alpha.py', 'IMPORT', 'bravo', None),
+        (source_dir + '/charlie.py', 'IMPORT', 'delta.Echo', 'E'),
+    ]
+
+    output = data_dir + '/symbols.bin'
+    app.TestScript(
+        dedent(
+            """
+                >terraformer export-symbols --single-job --output-format=binary --output=%(output)s %(source_dir)s
+            """ % locals()
+        )
+    )
+    with io.open(output, 'rb') as iss:
+        assert list(LoadBinary(iss)) == records
+
+
+def testIMapUnordered():
+    """
+    The parallel map yields the results as they complete, submitting a bounded number of calls.
+    """
+    from zerotk.terraformer.tf_script import _GetIMap, _IMapUnordered
+
+    assert sorted(_GetIMap(False)(abs, [-1, -2, -3])) == [1, 2, 3]
+
+    consumed = []
+
+    def Params():
+        for i in range(-10, 0):
+            consumed.append(i)
+            yield i
+
+    results = _IMapUnordered(abs, Params(), max_pending=2)
+    first = next(results)
+    # The initial 2 calls plus one more for each completed call.
+    assert len(consumed) <= 4
+    assert sorted([first] + list(results)) == list(range(1, 11))
+    assert len(consumed) == 10
@@ -0,0 +1,104 @@
+from __future__ import unicode_literals
+
+import pytest
+
+from zerotk.ttl import TTL
+
+
+class Test:
+
+    def testTTL(self):
+        now = [0.0]
+        ttl = TTL(10, timer=lambda: now[0])
+
+        ttl[1] = 'one'
+        now[0] = 5.0
+        ttl[2] = 'two'
+        assert ttl.get(1) == 'one'
+        assert ttl[2] == 'two'
+        assert 1 in ttl
+
+        # Lazy expiration on access.
+        now[0] = 10.0
+        assert 1 not in ttl
+        assert ttl.get(1, 'default') == 'default'
+        assert len(ttl) == 2  # Not swept yet.
+        with pytest.raises(KeyError):
+            ttl[1]
+        assert ttl[2] == 'two'
+
+        # Setting again renews the expiration.
+        ttl[2] = 'TWO'
+        assert len(ttl) == 1
+        now[0] = 19.0
+        assert ttl[2] == 'TWO'
+
+        assert ttl.pop(2) == 'TWO'
+        assert ttl.pop(2, None) is None
+        with pytest.raises(KeyError):
+            ttl.pop(2)
+
+        ttl[3] = 'three'
+        ttl.clear()
+        assert len(ttl) == 0
+
+        with pytest.raises(ValueError):
+            TTL(0)
+        with pytest.raises(ValueError):
+            TTL(1, maxsize=0)
+
+    def testTTLSweep(self):
+        now = [0.0]
+        ttl = TTL(10, sweep_interval=5, timer=lambda: now[0])
+        for i in range(10):
+            now[0] = float(i)
+            ttl[i] = i
+        assert len(ttl) == 10
+
+        # Sweeps in bulk when setting after the sweep interval (expired items not accessed).
+        now[0] = 14.5
+        ttl['new'] = 'new'
+        assert len(ttl) == 6
+        assert list(ttl._dict.keys()) == [5, 6, 7, 8, 9, 'new']
+
+        # Counts only the items not expired, without sweeping.
+        now[0] = 16.0
+        assert ttl.GetCurrentSize() == 4
+        assert len(ttl) == 6
+
+        now[0] = 100.0
+        assert ttl.GetCurrentSize() == 0
+        assert ttl.GetMaxSize() is None
+
+    def testTTLMaxSize(self):
+        now = [0.0]
+        ttl = TTL(10, maxsize=2, timer=lambda: now[0])
+        ttl[1] = 1
+        ttl[2] = 2
+        ttl[1] = 1  # Renewed: 2 is now the closest to expire.
+        ttl[3] = 3
+        assert list(ttl._dict.keys()) == [1, 3]
+        assert ttl.GetMaxSize() == 2
+
+    def testTTLDefaultTimer(self, monkeypatch):
+        import time
+
+        # A monotonic clock is used when available, not affected by changes of the system time.
+        now = [0.0]
+        monkeypatch.setattr(time, 'monotonic', lambda: now[0], raising=False)
+        monkeypatch.setattr(time, 'time', lambda: 1000000.0)
+        ttl = TTL(10)
+        ttl[1] = 'one'
+        now[0] = 5.0
+        assert ttl[1] == 'one'
+        now[0] = 10.0
+        assert 1 not in ttl
+
+        # Else time.time.
+        monkeypatch.delattr(time, 'monotonic')
+        monkeypatch.setattr(time, 'time', lambda: now[0])
+        ttl = TTL(10)
+        ttl[1] = 'one'
+        assert 1 in ttl
+        now[0] = 20.0
+        assert 1 not in ttl
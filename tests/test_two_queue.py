@@ -0,0 +1,129 @@
+from __future__ import unicode_literals
+
+import pytest
+
+from zerotk.two_queue import TwoQueue
+
+
+class Test:
+
+    def testTwoQueue(self):
+        cache = TwoQueue(4)
+
+        cache[1] = 'one'
+        cache[2] = 'two'
+        cache[3] = 'three'
+        cache[4] = 'four'
+        assert len(cache) == 4
+        assert cache.GetCurrentSize() == 4
+        assert cache.GetMaxSize() == 4
+
+        # New items are pushed out in insertion order (A1in), even if accessed.
+        assert cache[1] == 'one'
+        cache[5] = 'five'
+        assert 1 not in cache
+        assert cache.keys() == [2, 3, 4, 5]
+
+        # 1 is remembered: added again it goes to the main queue (Am).
+        cache[1] = 'one'
+        assert 2 not in cache
+        assert cache.keys() == [3, 4, 5, 1]
+        assert cache.get(1) == 'one'
+
+        # A scan doesn't push out the items in the main queue.
+        for i in range(10, 30):
+            cache[i] = i
+            assert 1 in cache
+        assert len(cache) == 4
+
+        assert cache.pop(1) == 'one'
+        assert cache.pop(1, None) is None
+        with pytest.raises(KeyError):
+            cache.pop(1)
+        with pytest.raises(KeyError):
+            cache[1]
+        assert cache.get(1, 'default') == 'default'
+
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.GetCurrentSize() == 0
+
+        with pytest.raises(ValueError):
+            TwoQueue(0)
+
+    def testTwoQueueSizes(self):
+        cache = TwoQueue(10, get_size=len)
+
+        cache['a'] = 'aaaa'
+        cache['b'] = 'bbbb'
+        assert cache.GetCurrentSize() == 8
+
+        # Replacing a value updates the size.
+        cache['a'] = 'aa'
+        assert cache.GetCurrentSize() == 6
+
+        cache['c'] = 'ccccc'
+        assert cache.keys() == ['b', 'c']
+        assert cache.GetCurrentSize() == 9
+
+        # Promoted to the main queue.
+        cache['a'] = 'aaaaa'
+        assert cache.keys() == ['c', 'a']
+        assert cache.GetCurrentSize() == 10
+
+        # Items larger than the cache are not stored.
+        cache['d'] = 'd' * 11
+        assert 'd' not in cache
+        assert cache.keys() == ['c', 'a']
+
+        with pytest.raises(ValueError):
+            cache['e'] = ''
+
+    def testTwoQueueKeepsItemSet(self):
+        """
+        The item just set is never pruned, even when other items of mixed sizes must be pruned
+        for it to fit.
+        """
+        cache = TwoQueue(100, get_size=lambda x: x)
+
+        cache['a'] = 40
+        cache['b'] = 70
+        cache['c'] = 20
+        assert cache.keys() == ['b', 'c']
+
+        # "a" is promoted to Am (alone there): the items in A1in are pruned instead.
+        cache['a'] = 90
+        assert cache.keys() == ['a']
+        assert cache.GetCurrentSize() == 90
+
+        # Growing an item in A1in (where it keeps its position) prunes the items after it.
+        cache = TwoQueue(100, get_size=lambda x: x)
+        cache['a'] = 10
+        cache['b'] = 20
+        cache['c'] = 30
+        cache['a'] = 60
+        assert cache.keys() == ['a', 'c']
+        assert cache.GetCurrentSize() == 90
+
+    def testTwoQueueRandom(self):
+        """
+        The sizes and the maximum size are respected on random operations.
+        """
+        import random
+
+        cache = TwoQueue(20, get_size=lambda x: x % 5 + 1)
+        values = {}
+
+        rand = random.Random(0)
+        for _i in range(5000):
+            key = rand.randint(0, 40)
+            action = rand.random()
+            if action < 0.5:
+                cache[key] = values[key] = rand.randint(0, 30)
+                assert key in cache
+            elif action < 0.9:
+                assert cache.get(key, values.get(key)) == values.get(key)
+            else:
+                cache.pop(key, None)
+            assert cache.GetCurrentSize() == sum(cache[i] % 5 + 1 for i in cache.keys())
+            assert cache.GetCurrentSize() <= 20
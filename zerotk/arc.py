@@ -0,0 +1,211 @@
+"""
+    ARC module.
+
+    ARC is a scan resistant cache that adapts how much of the cache is given to items accessed
+    once (recency) and to items accessed many times (frequency) to the workload.
+
+    Based on "ARC: A Self-Tuning, Low Overhead Replacement Cache" (Megiddo and Modha, 2003).
+"""
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+
+
+DEFAULT_ARC_SIZE = 50
+
+
+class ARC(object):
+    """
+    Adaptive Replacement Cache (ARC).
+
+    Items accessed once are kept in T1 and items accessed at least twice in T2 (both ordered by
+    access time). The keys pruned from each are remembered in B1 and B2 (the "ghosts"). A miss
+    on a key remembered in B1 means T1 should be larger (so the target size of T1 grows), a miss
+    on a key remembered in B2 means T2 should be larger.
+
+    A scan (many items accessed once) only cycles T1, keeping the items in T2.
+    """
+
+    def __init__(self, size=DEFAULT_ARC_SIZE):
+        """
+        :param int size:
+            The maximum number of items in this cache (the same number of keys is remembered).
+        """
+        if size <= 0:
+            raise ValueError('Size must be > 0. Found: %s' % (size,))
+
+        self._maxsize = size
+        # The target size of T1.
+        self._p = 0
+
+        # key -> value, least recently used first.
+        self._t1 = OrderedDict()
+        self._t2 = OrderedDict()
+        # key -> None, least recently pruned first.
+        self._b1 = OrderedDict()
+        self._b2 = OrderedDict()
+
+    def clear(self):
+        """
+        Clears the cache (including the remembered keys and the adaptation).
+        """
+        self._t1.clear()
+        self._t2.clear()
+        self._b1.clear()
+        self._b2.clear()
+        self._p = 0
+
+    def __len__(self):
+        """
+        :rtype: int
+        :returns:
+            The number of items in the cache.
+        """
+        return len(self._t1) + len(self._t2)
+
+    def GetCurrentSize(self):
+        """
+        :rtype: int
+        :returns:
+            The number of items in the cache.
+        """
+        return len(self)
+
+    def GetMaxSize(self):
+        """
+        :rtype: int
+        :returns:
+            The maximum number of items in the cache.
+        """
+        return self._maxsize
+
+    def __contains__(self, key):
+        """
+        :rtype: bool
+        :returns:
+            True if the key is in the cache and False otherwise (remembered keys are not in the
+            cache).
+        """
+        return key in self._t1 or key in self._t2
+
+    _SENTINEL = []
+
+    def get(self, key, default=None):
+        """
+        Gets an item from the cache, moving it to the most recently used position of T2.
+
+        :param object key:
+        :param object default:
+            Returned if the key is not in the cache.
+        """
+        SENTINEL = self._SENTINEL
+        value = self._t2.pop(key, SENTINEL)
+        if value is SENTINEL:
+            value = self._t1.pop(key, SENTINEL)
+            if value is SENTINEL:
+                return default
+        self._t2[key] = value
+        return value
+
+    def __getitem__(self, key):
+        """
+        :raises KeyError:
+            If the key is not in the cache.
+        """
+        result = self.get(key, self._SENTINEL)
+        if result is self._SENTINEL:
+            raise KeyError(key)
+        return result
+
+    def _Replace(self, in_b2):
+        """
+        Prunes one item from T1 or T2 (remembering its key in B1 or B2), according to the target
+        size of T1.
+
+        :param bool in_b2:
+            True if the item being added is remembered in B2.
+        """
+        t1 = self._t1
+        if t1 and (len(t1) > self._p or (in_b2 and len(t1) == self._p)):
+            key, _value = t1.popitem(last=False)
+            self._b1[key] = None
+        else:
+            key, _value = self._t2.popitem(last=False)
+            self._b2[key] = None
+
+    def __setitem__(self, key, value):
+        """
+        Sets an item in the cache, pruning items as needed so that the maximum size is not passed.
+
+        :param object key:
+        :param object value:
+        """
+        t1, t2, b1, b2 = self._t1, self._t2, self._b1, self._b2
+        maxsize = self._maxsize
+        SENTINEL = self._SENTINEL
+
+        if t1.pop(key, SENTINEL) is not SENTINEL or t2.pop(key, SENTINEL) is not SENTINEL:
+            # Already cached: handled as an access.
+            t2[key] = value
+            return
+
+        if key in b1:
+            self._p = min(maxsize, self._p + max(len(b2) // len(b1), 1))
+            del b1[key]
+            if len(t1) + len(t2) >= maxsize:
+                self._Replace(False)
+            t2[key] = value
+
+        elif key in b2:
+            self._p = max(0, self._p - max(len(b1) // len(b2), 1))
+            del b2[key]
+            if len(t1) + len(t2) >= maxsize:
+                self._Replace(True)
+            t2[key] = value
+
+        else:
+            l1 = len(t1) + len(b1)
+            total = l1 + len(t2) + len(b2)
+            if l1 >= maxsize:
+                if len(t1) < maxsize:
+                    b1.popitem(last=False)
+                    if len(t1) + len(t2) >= maxsize:
+                        self._Replace(False)
+                else:
+                    t1.popitem(last=False)
+            elif total >= maxsize:
+                if total >= 2 * maxsize:
+                    b2.popitem(last=False)
+                if len(t1) + len(t2) >= maxsize:
+                    self._Replace(False)
+            t1[key] = value
+
+    def __delitem__(self, key):
+        """
+        Deletes an item from the cache (and forgets it).
+
+        :raises KeyError:
+            If the key is not in the cache.
+        """
+        self.pop(key)
+
+    def pop(self, key, default=_SENTINEL):
+        SENTINEL = self._SENTINEL
+        value = self._t1.pop(key, SENTINEL)
+        if value is SENTINEL:
+            value = self._t2.pop(key, SENTINEL)
+        self._b1.pop(key, None)
+        self._b2.pop(key, None)
+        if value is SENTINEL:
+            if default is not SENTINEL:
+                return default
+            raise KeyError(key)
+        return value
+
+    def keys(self):
+        """
+        :rtype: list
+        :returns:
+            The keys in T1 and then in T2 (least recently used first).
+        """
+        return list(self._t1) + list(self._t2)
@@ -0,0 +1,285 @@
+"""
+Persistent caches, shared by processes and kept between runs. See Memoize "disk_cache" parameter.
+"""
+from __future__ import unicode_literals
+
+import os
+
+
+class PickleSerializer(object):
+    """
+    The default serializer for DiskCache: any object that can be pickled.
+    """
+
+    def __init__(self, protocol=2):
+        self._protocol = protocol
+
+    def dumps(self, obj):
+        from six.moves import cPickle
+        return cPickle.dumps(obj, self._protocol)
+
+    def loads(self, data):
+        from six.moves import cPickle
+        return cPickle.loads(data)
+
+
+class DiskCache(object):
+    """
+    A persistent key-value store in a sqlite file.
+
+    Values are stored by namespace (Ex.: the memoized function name) and key. Both keys and values
+    are serialized (keys must serialize the same way on each run to be found again). Any errors
+    reading or writing values (Ex.: objects that can't be serialized) are handled as misses, so the
+    store never breaks the cached computations.
+
+    Many processes can use the same file: each process opens its own connection (sqlite handles
+    the locking). Thread-safe.
+
+    The file grows with each value stored, unless bounded by max_count.
+    """
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS cache (
+            namespace TEXT NOT NULL,
+            key BLOB NOT NULL,
+            value BLOB NOT NULL,
+            PRIMARY KEY (namespace, key)
+        )
+    '''
+
+    def __init__(self, filename, serializer=None, version='', max_count=None):
+        """
+        :param unicode filename:
+            The sqlite file, created if needed.
+
+        :param serializer:
+            An object with the dumps(obj) -> bytes and loads(bytes) -> obj methods. Defaults to
+            PickleSerializer.
+
+        :param unicode version:
+            Added to all namespaces: change it to discard all values stored by a previous version
+            of the cached functions.
+
+        :param int max_count:
+            If given, only the values stored by the last max_count writes are kept (the oldest
+            values of all namespaces are removed first).
+        """
+        import threading
+
+        self.filename = filename
+        if serializer is None:
+            serializer = PickleSerializer()
+        self._serializer = serializer
+        self._version = version
+        self._max_count = max_count
+        self._lock = threading.Lock()
+        self._connection = None
+        self._connection_pid = None
+
+    def _GetConnection(self):
+        """
+        :return sqlite3.Connection:
+            The connection for this process (connections can't be shared with forked processes).
+        """
+        import sqlite3
+
+        pid = os.getpid()
+        if self._connection is None or self._connection_pid != pid:
+            directory = os.path.dirname(os.path.abspath(self.filename))
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            connection = sqlite3.connect(self.filename, timeout=60, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(self.SCHEMA)
+            connection.commit()
+            self._connection = connection
+            self._connection_pid = pid
+        return self._connection
+
+    def _GetNamespace(self, namespace):
+        if self._version:
+            return '%s:%s' % (namespace, self._version)
+        return namespace
+
+    def Get(self, namespace, key, default=None):
+        """
+        :param unicode namespace:
+        :param object key:
+        :param object default:
+        :return object:
+            The stored value or default if not found (or not readable).
+        """
+        import sqlite3
+
+        try:
+            key_data = sqlite3.Binary(self._serializer.dumps(key))
+            with self._lock:
+                row = self._GetConnection().execute(
+                    'SELECT value FROM cache WHERE namespace = ? AND key = ?',
+                    (self._GetNamespace(namespace), key_data),
+                ).fetchone()
+            if row is None:
+                return default
+            return self._serializer.loads(bytes(row[0]))
+        except Exception:
+            return default
+
+    def Set(self, namespace, key, value):
+        """
+        :param unicode namespace:
+        :param object key:
+        :param object value:
+        :return bool:
+            True if the value was stored.
+        """
+        import sqlite3
+
+        try:
+            key_data = sqlite3.Binary(self._serializer.dumps(key))
+            value_data = sqlite3.Binary(self._serializer.dumps(value))
+            with self._lock:
+                connection = self._GetConnection()
+                cursor = connection.execute(
+                    'INSERT OR REPLACE INTO cache (namespace, key, value) VALUES (?, ?, ?)',
+                    (self._GetNamespace(namespace), key_data, value_data),
+                )
+                if self._max_count is not None:
+                    # Rows are replaced with a new rowid, so the lowest rowids are the oldest.
+                    connection.execute(
+                        'DELETE FROM cache WHERE rowid <= ?',
+                        (cursor.lastrowid - self._max_count,),
+                    )
+                connection.commit()
+        except Exception:
+            return False
+        return True
+
+    def Clear(self, namespace=None):
+        """
+        Removes the stored values.
+
+        :param unicode namespace:
+            If given, removes only the values of this namespace.
+
+        :return bool:
+            True if the values were removed.
+        """
+        try:
+            with self._lock:
+                connection = self._GetConnection()
+                if namespace is None:
+                    connection.execute('DELETE FROM cache')
+                else:
+                    connection.execute(
+                        'DELETE FROM cache WHERE namespace = ?', (self._GetNamespace(namespace),))
+                connection.commit()
+        except Exception:
+            return False
+        return True
+
+    def GetCount(self, namespace=None):
+        """
+        :param unicode namespace:
+        :return int:
+            The number of stored values (of the given namespace, if any). 0 if the store can't be
+            read.
+        """
+        try:
+            with self._lock:
+                connection = self._GetConnection()
+                if namespace is None:
+                    row = connection.execute('SELECT COUNT(*) FROM cache').fetchone()
+                else:
+                    row = connection.execute(
+                        'SELECT COUNT(*) FROM cache WHERE namespace = ?',
+                        (self._GetNamespace(namespace),),
+                    ).fetchone()
+        except Exception:
+            return 0
+        return row[0]
+
+    def Close(self):
+        with self._lock:
+            if self._connection is not None and self._connection_pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+            self._connection_pid = None
+
+
+class TwoTierCache(object):
+    """
+    An in-memory cache (Ex.: FIFO or LRU) in front of a DiskCache.
+
+    Values not found in memory are searched on disk (and kept in memory when found). New values
+    are written to both.
+    """
+
+    def __init__(self, memory_cache, disk_cache, namespace):
+        """
+        :param memory_cache:
+            A cache with the dict interface, such as FIFO or LRU.
+        :param DiskCache disk_cache:
+        :param unicode namespace:
+            The namespace of the values on disk.
+        """
+        self._memory = memory_cache
+        self._disk = disk_cache
+        self._namespace = namespace
+
+    _SENTINEL = []
+
+    def get(self, key, default=None):
+        SENTINEL = self._SENTINEL
+        result = self._memory.get(key, SENTINEL)
+        if result is SENTINEL:
+            result = self._disk.Get(self._namespace, key, SENTINEL)
+            if result is SENTINEL:
+                return default
+            self._memory[key] = result
+        return result
+
+    def __setitem__(self, key, value):
+        self._memory[key] = value
+        self._disk.Set(self._namespace, key, value)
+
+    def __contains__(self, key):
+        return key in self._memory
+
+    def GetMemoryCache(self):
+        """
+        :return object:
+            The in-memory cache.
+        """
+        return self._memory
+
+    def GetFromDisk(self, key, default=None):
+        """
+        Obtains a value only from the disk (without keeping it in memory).
+        """
+        return self._disk.Get(self._namespace, key, default)
+
+    def SetOnDisk(self, key, value):
+        """
+        Sets a value only on the disk.
+        """
+        self._disk.Set(self._namespace, key, value)
+
+    def __len__(self):
+        """
+        :return int:
+            The number of values in memory.
+        """
+        return len(self._memory)
+
+    def clear(self):
+        """
+        Clears both the memory and disk tiers.
+        """
+        self._memory.clear()
+        self._disk.Clear(self._namespace)
+
+    def GetCurrentSize(self):
+        return self._memory.GetCurrentSize()
+
+    def GetMaxSize(self):
+        return self._memory.GetMaxSize()
@@ -37,3 +37,17 @@ class FIFO(OrderedDict):
             self.popitem(0)
 
         OrderedDict.__setitem__(self, key, value)
+
+    def GetCurrentSize(self):
+        """
+        :return int:
+            The number of items in the cache.
+        """
+        return len(self)
+
+    def GetMaxSize(self):
+        """
+        :return int:
+            The maximum number of items in the cache.
+        """
+        return self._maxsize
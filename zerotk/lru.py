@@ -1,9 +1,13 @@
 """
-    LRU module. Based around heapq.
+    LRU module.
+
+    LRU is based around a dict and a doubly linked list, with O(1) get, set, delete and evict.
+    HeapLRU is the previous implementation, based around heapq.
 """
 from __future__ import unicode_literals
 
 import itertools
+from functools import partial
 from heapq import heapify, heappop, heappush
 
 from zerotk.decorators import Override
@@ -71,14 +75,17 @@ class _Node(object):
 
 
 #=========================================================================
-# LRU
+# HeapLRU
 #=========================================================================
-class LRU(object):
+class HeapLRU(object):
     """
     Least Recently Used (LRU) cache.
 
     Based on heapq module (which is used to guarantee that the 1st item in _heap is
     always the item that has the lowest access time).
+
+    Accessing an item breaks the heap invariant, so the next eviction needs a heapify (O(n)) and
+    a delete is also O(n). Prefer LRU, kept for comparison.
     """
 
     def __init__(self, size=DEFAULT_LRU_SIZE, internal_dict=None, get_size=lambda x: 1):
@@ -132,6 +139,22 @@ class LRU(object):
         """
         return len(self._dict)
 
+    def GetCurrentSize(self):
+        """
+        :rtype: int
+        :returns:
+            The sum of the sizes (see get_size) of the items in the cache.
+        """
+        return self._currsize
+
+    def GetMaxSize(self):
+        """
+        :rtype: int
+        :returns:
+            The maximum sum of the sizes of the items in the cache.
+        """
+        return self._maxsize
+
     def __contains__(self, key):
         """
         :rtype: bool
@@ -373,6 +396,332 @@ class LRU(object):
         return list(self.itervalues())
 
 
+#=========================================================================
+# _LinkedNode
+#=========================================================================
+class _LinkedNode(_Node):
+    """
+    _Node that is also part of a circular doubly linked list.
+    """
+
+    __slots__ = 'prev next'.split()
+
+    def __init__(self, key, obj, node_time, size):
+        _Node.__init__(self, key, obj, node_time, size)
+        self.prev = self
+        self.next = self
+
+
+#=========================================================================
+# LRU
+#=========================================================================
+class LRU(object):
+    """
+    Least Recently Used (LRU) cache.
+
+    The nodes are stored in a dict (by key) and in a circular doubly linked list ordered by
+    access time: the node after the root is the least recently used and the node before the root
+    is the most recently used. Accessing a node moves it to the end of the list, evicting pops it
+    from the start, so get, set, delete and evict are O(1).
+    """
+
+    def __init__(self, size=DEFAULT_LRU_SIZE, internal_dict=None, get_size=lambda x: 1):
+        """
+        :param int size:
+            The maximum size for this cache.
+
+        :param dict internal_dict:
+            If passed, this will be used as the internal dictionary in this LRU.
+
+        :param callable get_size:
+            Returns the size of an object.
+        """
+        if size <= 0:
+            raise ValueError('Size must be > 0. Found: %s' % (size,))
+
+        # Sentinel of the circular list: never stored in the dict.
+        self._root = _LinkedNode(None, None, -1, 0)
+        if internal_dict is None:
+            self._dict = {}
+        else:
+            self._dict = internal_dict
+
+        self._maxsize = size
+        self._currsize = 0
+        self._get_size = get_size
+        self._next_access = partial(next, itertools.count(0))
+
+        # For speed
+        self._dict_get = self._dict.get
+
+    def clear(self):
+        """
+        Clears the LRU also reseting internal variables. The final state after a clear is the same
+        as if the LRU was recently created.
+        """
+        root = self._root
+        root.prev = root.next = root
+        self._dict.clear()
+        self._currsize = 0
+
+    def __len__(self):
+        """
+        :rtype: int
+        :returns:
+            The current size of the cache
+        """
+        return len(self._dict)
+
+    def GetCurrentSize(self):
+        """
+        :rtype: int
+        :returns:
+            The sum of the sizes (see get_size) of the items in the cache.
+        """
+        return self._currsize
+
+    def GetMaxSize(self):
+        """
+        :rtype: int
+        :returns:
+            The maximum sum of the sizes of the items in the cache.
+        """
+        return self._maxsize
+
+    def __contains__(self, key):
+        """
+        :rtype: bool
+        :returns:
+            True if the key is in the cache and False otherwise.
+        """
+        return key in self._dict
+
+    has_key = __contains__
+
+    def _MoveToEnd(self, node):
+        """
+        Marks the given node as the most recently used.
+
+        :param _LinkedNode node:
+        """
+        root = self._root
+        last = root.prev
+        if last is node:
+            return
+        node.prev.next = node.next
+        node.next.prev = node.prev
+        node.prev = last
+        node.next = root
+        last.next = root.prev = node
+
+    def _EvictWhile(self, currsize, add_size):
+        """
+        Removes the least recently used nodes while currsize + add_size exceeds the maximum size.
+
+        :param int currsize:
+        :param int add_size:
+        :return int:
+            The new current size.
+        """
+        root = self._root
+        maxsize = self._maxsize
+        dict_pop = self._dict.pop
+        while currsize + add_size > maxsize:
+            lru = root.next
+            next_node = lru.next
+            root.next = next_node
+            next_node.prev = root
+            dict_pop(lru.key)
+            currsize -= lru.size
+        return currsize
+
+    def __setitem__(self, key, obj):
+        """
+        Sets an item in the cache (with the proper access time)
+
+        :param object key:
+            The key to be set
+
+        :param object obj:
+            The value to be set
+        """
+        node = self._dict_get(key, None)
+        add_size = self._get_size(obj)
+        if add_size <= 0:
+            raise ValueError('Size for object may not be 0. Key: %s' % (key,))
+
+        currsize = self._currsize
+
+        if node is not None:
+            currsize -= node.size
+            node.obj = obj
+            node.size = add_size
+            node.node_time = self._next_access()
+            self._MoveToEnd(node)
+            currsize += add_size
+
+            # Note that the node itself is evicted (as the last one) if it doesn't fit.
+            if currsize > self._maxsize:
+                currsize = self._EvictWhile(currsize, 0)
+
+        else:
+            # Handle special case where we're inserting a value which can not
+            # fit in the LRU.
+            if add_size > self._maxsize:
+                self.clear()
+                return
+
+            # Make it smaller before putting the new item.
+            currsize = self._EvictWhile(currsize, add_size)
+
+            node = _LinkedNode(key, obj, self._next_access(), add_size)
+            root = self._root
+            last = root.prev
+            node.prev = last
+            node.next = root
+            last.next = root.prev = node
+            self._dict[key] = node
+            currsize += add_size
+
+        self._currsize = currsize
+
+    def __getitem__(self, key):
+        """
+        Gets an item from the cache (and updates the access time)
+
+        :param object key:
+            The key to be gotten
+
+        :rtype: object
+        :returns:
+            The value that was stored for the given item
+
+        :raises KeyError:
+            If the key is not available
+        """
+        node = self._dict[key]  # Can throw error here
+        node.node_time = self._next_access()
+        self._MoveToEnd(node)
+        return node.obj
+
+    def get(self, key, default=None):
+        """
+        Gets an item from the cache (and updates the access time if it exists)
+
+        :param object key:
+            The key to be gotten
+
+        :param object default:
+            This is the value to be returned if the key doesn't exist.
+
+        :rtype: object
+        :returns:
+            The value that was stored for the given item or the default value passed.
+        """
+        node = self._dict_get(key, None)
+        if node is None:
+            return default
+        node.node_time = self._next_access()
+        self._MoveToEnd(node)
+        return node.obj
+
+    def __delitem__(self, key):
+        """
+        Deletes an item from the cache
+
+        :param object key:
+            The key to be removed
+
+        :rtype: object
+        :returns:
+            The value that was stored for the given item
+
+        :raises KeyError:
+            If the key is not available
+        """
+        node = self._dict.pop(key)  # can throw KeyError here
+        self._currsize -= node.size
+        node.prev.next = node.next
+        node.next.prev = node.prev
+        node.prev = node.next = node
+        return node.obj
+
+    _SENTINEL = []
+
+    def pop(self, key, default=_SENTINEL):
+        try:
+            return self.__delitem__(key)
+        except KeyError:
+            if default is not self._SENTINEL:
+                return default
+            raise
+
+    #--- Iterating
+    def iternodes(self):
+        """
+        :rtype: iterator(_Node)
+        :returns:
+            Iterator that traverses nodes according to LRU
+            (the ones with lowest access time come before)
+        """
+        root = self._root
+        node = root.next
+        while node is not root:
+            yield node
+            node = node.next
+
+    def __iter__(self):
+        """
+        :rtype: iterator(key)
+        :returns:
+            Iterator that traverses keys according to LRU
+            (the ones with lowest access time come before)
+        """
+        for node in self.iternodes():
+            yield node.key
+
+    iterkeys = __iter__
+
+    def iteritems(self):
+        """
+        :rtype: iterator(key, value)
+        :returns:
+            Iterator that traverses (key, value) according to LRU
+            (the ones with lowest access time come before)
+        """
+        for node in self.iternodes():
+            yield node.key, node.obj
+
+    def itervalues(self):
+        """
+        :rtype: iterator(value)
+        :returns:
+            Iterator that passes values according to LRU
+            (the ones with lowest access time come before)
+        """
+        for node in self.iternodes():
+            yield node.obj
+
+    #--- Getting keys or values
+    def keys(self):
+        """
+        :rtype: list
+        :returns:
+            List of keys according to LRU
+            (the ones with lowest access time come before)
+        """
+        return list(self.iterkeys())
+
+    def values(self):
+        """
+        :rtype: list
+        :returns:
+            List of values according to LRU
+            (the ones with lowest access time come before)
+        """
+        return list(self.itervalues())
+
+
 #=========================================================================
 # _DictWithRemovalMemo
 #=========================================================================
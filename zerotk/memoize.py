@@ -1,10 +1,198 @@
 from __future__ import unicode_literals
 
-from collections import OrderedDict
+from collections import OrderedDict, namedtuple
+import os
 
 import six
 
 
+class CacheInfo(namedtuple(
+        'CacheInfo', 'name hits misses evictions currsize maxsize miss_time')):
+    """
+    Statistics of a Memoize cache. See Memoize "stats" parameter.
+
+    :ivar unicode name:
+        The memoized function qualified name.
+
+    :ivar int hits:
+    :ivar int misses:
+    :ivar int evictions:
+        The number of values pruned to respect the maximum size (or replaced because they were
+        stale or expired, see Memoize "validator" and "ttl"). hits, misses and evictions are None
+        when statistics are disabled.
+
+    :ivar int currsize:
+    :ivar int maxsize:
+        The current and maximum sizes of the cache: number of values or, with max_bytes, bytes.
+
+    :ivar float miss_time:
+        The total time (in seconds) spent computing the values on misses.
+    """
+
+    __slots__ = ()
+
+    @property
+    def time_saved(self):
+        """
+        Estimate of the time (in seconds) saved by the cache: hits times the average miss time.
+
+        :return float:
+        """
+        if not self.misses:
+            return 0.0
+        return self.hits * self.miss_time / self.misses
+
+
+class _CacheStats(object):
+    """
+    Counters of a cache, see CacheInfo.
+    """
+
+    __slots__ = ('hits', 'misses', 'evictions', 'miss_time')
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.miss_time = 0.0
+
+    def CreateCacheInfo(self, name, cache):
+        return CacheInfo(
+            name,
+            self.hits,
+            self.misses,
+            self.evictions,
+            cache.GetCurrentSize(),
+            cache.GetMaxSize(),
+            self.miss_time,
+        )
+
+
+def _CreateCacheInfo(name, stats, cache):
+    """
+    :param _CacheStats|None stats:
+        The cache counters, None if the memoize doesn't keep them.
+    :return CacheInfo:
+    """
+    if stats is None:
+        return CacheInfo(name, None, None, None, cache.GetCurrentSize(), cache.GetMaxSize(), 0.0)
+    return stats.CreateCacheInfo(name, cache)
+
+
+# Weak references to the memoized functions (but not instance methods, which have one cache for
+# each instance), in creation order. See GetCacheInfos.
+_registry = []
+
+
+def GetCacheInfos():
+    """
+    Obtains the statistics of all (alive) memoized functions, including classmethods.
+
+    Instance methods have one cache for each instance: use the method CacheInfo(self) instead.
+
+    :return list(CacheInfo):
+    """
+    result = []
+    for i_ref in _registry[:]:
+        call = i_ref()
+        if call is None:
+            _registry.remove(i_ref)
+        else:
+            result.append(call.CacheInfo())
+    return result
+
+
+def PrintCacheInfos(stream=None):
+    """
+    Prints a table with the statistics of all memoized functions. See GetCacheInfos.
+
+    :param file stream:
+        Defaults to sys.stdout.
+    """
+    import sys
+
+    if stream is None:
+        stream = sys.stdout
+
+    def Format(value, format_):
+        if value is None:
+            return '-'
+        return format_ % value
+
+    stream.write(
+        '%8s %8s %9s %12s %12s %10s %10s  %s\n' % (
+            'hits', 'misses', 'evictions', 'currsize', 'maxsize', 'miss time', 'saved', 'name'))
+    for i_info in GetCacheInfos():
+        stream.write(
+            '%8s %8s %9s %12d %12s %10.3f %10.3f  %s\n' % (
+                Format(i_info.hits, '%d'),
+                Format(i_info.misses, '%d'),
+                Format(i_info.evictions, '%d'),
+                i_info.currsize,
+                Format(i_info.maxsize, '%d'),
+                i_info.miss_time,
+                i_info.time_saved,
+                i_info.name,
+            )
+        )
+
+
+def _PrintCacheInfosAtExit():
+    import atexit
+    import sys
+
+    atexit.register(lambda: PrintCacheInfos(sys.stderr))
+
+
+if os.environ.get('ZEROTK_MEMOIZE_STATS'):
+    _PrintCacheInfosAtExit()
+
+
+def _GetThreadId():
+    from six.moves import _thread
+
+    return _thread.get_ident()
+
+
+class _Flight(object):
+    """
+    A value being computed by a thread, see Memoize "thread_safe" parameter.
+
+    :ivar int waiters:
+        The number of other threads that asked for the value (waiting for it).
+    """
+
+    __slots__ = ('thread_id', 'waiters', 'result', 'exc_info', '_event')
+
+    def __init__(self):
+        import threading
+
+        self.thread_id = _GetThreadId()
+        self.waiters = 0
+        self.result = None
+        self.exc_info = None
+        self._event = threading.Event()
+
+    def SetResult(self, result):
+        self.result = result
+        self._event.set()
+
+    def SetError(self, exc_info):
+        self.exc_info = exc_info
+        self._event.set()
+
+    def Wait(self):
+        """
+        Waits for the value, re-raising the error of the computing thread, if any.
+
+        :return object:
+        """
+        self._event.wait()
+        if self.exc_info is not None:
+            six.reraise(*self.exc_info)
+        return self.result
+
+
 class Memoize(object):
     """
     This class is meant to be used as a decorator.
@@ -24,8 +212,9 @@ class Memoize(object):
             return x * 2
 
     This implementation supposes that the arguments are already immutable and won't change.
-    If some function needs special behavior, this class should be subclassed and _GetCacheKey
-    should be overridden.
+    For functions receiving containers (dicts, lists, sets) use the "key" parameter with one of
+    the strategies from zerotk.memoize_key. If some function needs special behavior, this class
+    should be subclassed and _GetCacheKey should be overridden.
 
     Note that the 1st parameter will determine whether it should be used as an instance method
     or a function (It'll just check if the 1st parameter is 'self', and if it is, an
@@ -41,6 +230,10 @@ class Memoize(object):
     FIFO = 'FIFO'
     LRU = 'LRU'
 
+    # Scan resistant: values used once don't push out the values used over and over.
+    TWO_QUEUE = '2Q'
+    ARC = 'ARC'
+
     MEMO_INSTANCE_METHOD = 'instance_method'
     MEMO_FUNCTION = 'function'
     MEMO_FROM_ARGSPEC = 'from_argspec'
@@ -69,15 +262,30 @@ class Memoize(object):
         return ret
 
 
-    def __init__(self, maxsize=50, prune_method=FIFO, memo_target=MEMO_FROM_ARGSPEC):
+    def __init__(
+            self,
+            maxsize=50,
+            prune_method=FIFO,
+            memo_target=MEMO_FROM_ARGSPEC,
+            max_bytes=None,
+            get_size=None,
+            validator=None,
+            stats=None,
+            thread_safe=False,
+            ttl=None,
+            disk_cache=None,
+            key=None,
+        ):
         """
         :param int maxsize:
             The maximum size of the internal cache (default is 50).
 
         :param unicode prune_method:
-            This is according to the way used to prune entries. Right now only
-            pruning the oldest entry is supported (FIFO), but different ways could be
-            available (e.g.: pruning LRU seems a natural addition)
+            This is according to the way used to prune entries:
+            - FIFO: prunes the oldest entry;
+            - LRU: prunes the least recently used entry;
+            - TWO_QUEUE: 2Q, scan resistant (see zerotk.two_queue.TwoQueue);
+            - ARC: adaptive and scan resistant (see zerotk.arc.ARC).
 
         :param unicode memo_target:
             One of the constants MEMO_INSTANCE_METHOD or MEMO_FUNCTION or MEMO_FROM_ARGSPEC.
@@ -85,11 +293,86 @@ class Memoize(object):
             it'll fall to using the MEMO_INSTANCE_METHOD (otherwise the MEMO_FUNCTION is used)
             If the signature of the function is 'special' and doesn't follow the conventions,
             the memo_target MUST be specified.
+
+        :param int max_bytes:
+            If given, the cache is bounded by the memory used by the cached values (estimated by
+            get_size) instead of by the number of values (maxsize is ignored). Such caches prune
+            the least recently used values (LRU), unless the prune_method is TWO_QUEUE. Can't be
+            combined with ARC.
+
+        :param callable get_size:
+            get_size(value) -> int
+            Returns the memory used by a cached value, in bytes. Only used with max_bytes.
+            Defaults to zerotk.memory_size.GetDeepSize.
+
+        :param callable validator:
+            validator(*args, **kwargs) -> object
+            Called with the same arguments as the function on every call. Returns a cheap stamp
+            of the state the result depends on (Ex.: the mtime and size of a file). A cached value
+            is only reused if the stamp is still equal to the one obtained before computing it,
+            otherwise the stale value is replaced.
+
+        :param bool stats:
+            Collects hits, misses, evictions and miss time statistics, available with
+            CacheInfo() (see GetCacheInfos). This makes each call a little slower.
+            Defaults to True if the environment variable ZEROTK_MEMOIZE_STATS is set, so the
+            statistics can be collected on real workloads without changing the code (they are
+            printed to stderr on exit, see PrintCacheInfos).
+
+        :param bool thread_safe:
+            Allows calling the memoized function from many threads. The cache is protected by a
+            lock and calls for a value being computed by another thread wait for it instead of
+            computing it again (so each value is computed once). The lock is not held while
+            computing values.
+
+        :param float ttl:
+            If given, the cached values expire after this time (in seconds), see zerotk.ttl.TTL.
+            The cache is still bounded by maxsize (None for no limit), removing the values closest
+            to expire first (so prune_method must be FIFO). Can't be combined with max_bytes.
+
+        :param zerotk.disk_cache.DiskCache|unicode disk_cache:
+            If given, adds a persistent tier behind the in-memory cache (see
+            zerotk.disk_cache.TwoTierCache), so the values are reused across processes and runs.
+            Either a DiskCache or its filename. Only for functions (and classmethods) whose
+            arguments and results can be serialized (pickled, by default). Can't be combined with
+            ttl. Note that the file grows with each value stored: use a DiskCache with max_count
+            to bound it.
+
+        :param callable key:
+            key(cache_key) -> hashable
+            Converts the cache key (the tuple with the arguments, see _GetCacheKey) to the key
+            actually used, Ex.: to memoize functions receiving dicts or lists. See
+            zerotk.memoize_key for the available strategies (FreezeKey and CreateIdentityKey).
         """
+        if ttl is not None and max_bytes is not None:
+            raise ValueError('Memoize ttl can\'t be combined with max_bytes.')
+        if ttl is not None and prune_method != self.FIFO:
+            raise ValueError('Memoize ttl can\'t be combined with prune method: %s' % prune_method)
+        if max_bytes is not None and prune_method == self.ARC:
+            raise ValueError('Memoize ARC can\'t be combined with max_bytes.')
+        if ttl is not None and disk_cache is not None:
+            raise ValueError('Memoize ttl can\'t be combined with disk_cache.')
+        if isinstance(disk_cache, six.string_types):
+            from zerotk.disk_cache import DiskCache
+            disk_cache = DiskCache(disk_cache)
+        self._disk_cache = disk_cache
+        self._key = key
 
         self._prune_method = prune_method
         self._maxsize = maxsize
         self._memo_target = memo_target
+        self._max_bytes = max_bytes
+        self._get_size = get_size
+        self._validator = validator
+        if stats is None:
+            stats = bool(os.environ.get('ZEROTK_MEMOIZE_STATS'))
+        self._stats = stats
+        self._thread_safe = thread_safe
+        self._ttl = ttl
+        if thread_safe:
+            import threading
+            self._lock = threading.Lock()
+            self._in_flight = {}
 
 
     def _GetCacheKey(self, args, kwargs):
@@ -131,6 +414,53 @@ class Memoize(object):
         return args + tuple(list(argspec.values())[len(args):])
 
 
+    def _CreateCacheKeyBuilder(self):
+        """
+        Creates a function equivalent to _GetCacheKey, specialized for the decorated function
+        signature: the default values are stored in a tuple and the position of each argument in
+        a dict, so calls without keyword arguments only slice and concatenate tuples.
+
+        Subclasses overriding _GetCacheKey or _GetArgspecObject get _GetCacheKey itself.
+
+        :return callable:
+            GetCacheKey(args, kwargs) -> tuple
+        """
+        def IsOverridden(name):
+            return six.get_unbound_function(getattr(self.__class__, name)) is not \
+                six.get_unbound_function(getattr(Memoize, name))
+
+        if IsOverridden('_GetCacheKey') or IsOverridden('_GetArgspecObject'):
+            return self._GetCacheKey
+
+        has_default, argspec = self._argspec
+        defaults = tuple(argspec.values())
+        positions = dict((j, i) for i, j in enumerate(argspec))
+
+        def GetCacheKeyFromKwargs(args, kwargs):
+            values = list(defaults)
+            for i_name, i_value in six.iteritems(kwargs):
+                try:
+                    values[positions[i_name]] = i_value
+                except KeyError:
+                    raise ValueError('Can\'t use non-declared keyword arguments.')
+            return args + tuple(values[len(args):])
+
+        if has_default:
+
+            def GetCacheKey(args, kwargs):
+                if kwargs:
+                    return GetCacheKeyFromKwargs(args, kwargs)
+                return args + defaults[len(args):]
+
+        else:
+
+            def GetCacheKey(args, kwargs):
+                if kwargs:
+                    return GetCacheKeyFromKwargs(args, kwargs)
+                return args
+
+        return GetCacheKey
+
     def _GetArgspecObject(self, args, trail, kwargs, defaults):
         """
         Create the argspec object that helps when creating the cache key. Subclasses may want to customize the argspec
@@ -208,8 +538,17 @@ class Memoize(object):
                     # be used as a part of the cache key, so, all should work properly).
                     self._memo_target = self.MEMO_FUNCTION
 
+        if self._disk_cache is not None and self._memo_target == self.MEMO_INSTANCE_METHOD:
+            raise TypeError('Memoize disk_cache is not supported for instance methods.')
+        self._name = '%s.%s' % (func.__module__, func.__name__)
+
         # Register argspec details, these are used to normalize cache keys
         self._argspec = self._GetArgspecObject(*inspect.getargspec(func))
+        self._get_cache_key = self._CreateCacheKeyBuilder()
+        if self._key is not None:
+            get_arguments_key = self._get_cache_key
+            key = self._key
+            self._get_cache_key = lambda args, kwargs: key(get_arguments_key(args, kwargs))
 
         # Create call wrapper, and make it look like the real function
         call = self._CreateCallWrapper(func)
@@ -221,6 +560,19 @@ class Memoize(object):
 
 
     def _CreateCacheObject(self):
+        """
+        Creates the cache object we want, including the disk tier (if any).
+
+        :returns object:
+            See _CreateMemoryCacheObject.
+        """
+        result = self._CreateMemoryCacheObject()
+        if self._disk_cache is not None:
+            from zerotk.disk_cache import TwoTierCache
+            result = TwoTierCache(result, self._disk_cache, self._name)
+        return result
+
+    def _CreateMemoryCacheObject(self):
         """
         Creates the cache object we want.
 
@@ -230,7 +582,26 @@ class Memoize(object):
 
             This object has a dict interface.
         """
-        if self._prune_method == self.FIFO:
+        if self._ttl is not None:
+            from zerotk.ttl import TTL
+            return TTL(self._ttl, self._maxsize)
+
+        elif self._max_bytes is not None:
+            get_size = self._get_size
+            if get_size is None:
+                from zerotk.memory_size import GetDeepSize
+                get_size = GetDeepSize
+            if self._validator is not None:
+                # The cache stores (stamp, value) entries.
+                get_value_size = get_size
+                get_size = lambda entry: get_value_size(entry[1])
+            if self._prune_method == self.TWO_QUEUE:
+                from zerotk.two_queue import TwoQueue
+                return TwoQueue(self._max_bytes, get_size=get_size)
+            from zerotk.lru import LRU
+            return LRU(self._max_bytes, get_size=get_size)
+
+        elif self._prune_method == self.FIFO:
             from zerotk.fifo import FIFO
             return FIFO(self._maxsize)
 
@@ -238,10 +609,193 @@ class Memoize(object):
             from zerotk.lru import LRU
             return LRU(self._maxsize)
 
+        elif self._prune_method == self.TWO_QUEUE:
+            from zerotk.two_queue import TwoQueue
+            return TwoQueue(self._maxsize)
+
+        elif self._prune_method == self.ARC:
+            from zerotk.arc import ARC
+            return ARC(self._maxsize)
+
         else:
             raise AssertionError('Memoize prune method not supported: %s' % self._prune_method)
 
 
+    _SENTINEL = []
+
+    def _Lookup(self, cache, stats, key, stamp):
+        """
+        Obtains a value from the cache, considering the validator stamp.
+
+        :param _CacheStats|None stats:
+        :return object:
+            The cached value or _SENTINEL.
+        """
+        return self._GetValue(cache.get(key, self._SENTINEL), stats, stamp)
+
+    def _GetValue(self, entry, stats, stamp):
+        """
+        Obtains the value of a cache entry, considering the validator stamp.
+
+        :param object entry:
+            The entry stored in the cache or _SENTINEL.
+        :param _CacheStats|None stats:
+        :return object:
+            The cached value or _SENTINEL.
+        """
+        SENTINEL = self._SENTINEL
+        res = entry
+        if self._validator is not None and entry is not SENTINEL:
+            if entry[0] == stamp:
+                res = entry[1]
+            else:
+                res = SENTINEL
+                if stats is not None:
+                    stats.evictions += 1  # Stale
+        if res is not SENTINEL and stats is not None:
+            stats.hits += 1
+        return res
+
+    def _CreateEntry(self, stamp, res):
+        """
+        :return object:
+            The entry stored in the cache for the given value.
+        """
+        if self._validator is not None:
+            return (stamp, res)
+        return res
+
+    def _Store(self, cache, stats, key, stamp, res, miss_time):
+        """
+        Stores a value computed on a miss.
+
+        :param _CacheStats|None stats:
+        :param float miss_time:
+            The time spent computing the value.
+        """
+        if stats is None:
+            expected_len = None
+        else:
+            stats.misses += 1
+            stats.miss_time += miss_time
+            expected_len = len(cache) + (0 if key in cache else 1)
+
+        cache[key] = self._CreateEntry(stamp, res)
+
+        if stats is not None:
+            stats.evictions += expected_len - len(cache)
+
+    def _GetFromCacheOrCreate(self, cache, stats, key, func, args, kwargs):
+        """
+        The same as the inlined GetFromCacheOrCreate of the call wrappers, considering the
+        validator and updating the cache statistics (if any).
+
+        :param _CacheStats|None stats:
+        :param tuple args:
+            All the arguments for func (including self for instance methods).
+        """
+        stamp = None
+        if self._validator is not None:
+            stamp = self._validator(*args, **kwargs)
+        res = self._Lookup(cache, stats, key, stamp)
+        if res is self._SENTINEL:
+            if stats is None:
+                res = func(*args, **kwargs)
+                self._Store(cache, stats, key, stamp, res, 0.0)
+            else:
+                from timeit import default_timer
+
+                start = default_timer()
+                res = func(*args, **kwargs)
+                self._Store(cache, stats, key, stamp, res, default_timer() - start)
+        return res
+
+    def _GetFromCacheOrCreateThreadSafe(self, cache, stats, key, func, args, kwargs):
+        """
+        The same as _GetFromCacheOrCreate, but safe to call from many threads: the cache
+        is only accessed holding the lock and each missing value is computed only once. Other
+        threads asking for the same value (in flight) wait for it, sharing the value (or error).
+
+        With a disk_cache, only the memory tier is accessed holding the lock: the disk is read
+        (and written) by the thread computing the value.
+
+        :param _CacheStats|None stats:
+        :param tuple args:
+            All the arguments for func (including self for instance methods).
+        """
+        from timeit import default_timer
+
+        SENTINEL = self._SENTINEL
+        stamp = None
+        if self._validator is not None:
+            stamp = self._validator(*args, **kwargs)
+
+        two_tier_cache = None
+        if self._disk_cache is not None:
+            two_tier_cache = cache
+            cache = two_tier_cache.GetMemoryCache()
+
+        flight_key = (id(cache), key)
+        with self._lock:
+            res = self._Lookup(cache, stats, key, stamp)
+            if res is not self._SENTINEL:
+                return res
+            flight = self._in_flight.get(flight_key)
+            if flight is None:
+                flight = self._in_flight[flight_key] = _Flight()
+                owner = True
+            else:
+                flight.waiters += 1
+                owner = False
+
+        if not owner:
+            if flight.thread_id == _GetThreadId():
+                # Recursive call for the same value: waiting would dead-lock.
+                return func(*args, **kwargs)
+            res = flight.Wait()
+            if stats is not None:
+                with self._lock:
+                    stats.hits += 1
+            return res
+
+        # The in-flight entry is always removed and the flight always completed (with the value or
+        # the error), even if storing the value fails: otherwise the other threads would wait
+        # forever.
+        try:
+            try:
+                res = SENTINEL
+                if two_tier_cache is not None:
+                    res = self._GetValue(two_tier_cache.GetFromDisk(key, SENTINEL), None, stamp)
+                from_disk = res is not SENTINEL
+                if not from_disk:
+                    start = default_timer()
+                    res = func(*args, **kwargs)
+                    miss_time = default_timer() - start
+            except:
+                with self._lock:
+                    del self._in_flight[flight_key]
+                raise
+
+            with self._lock:
+                try:
+                    if from_disk:
+                        cache[key] = self._CreateEntry(stamp, res)
+                        if stats is not None:
+                            stats.hits += 1
+                    else:
+                        self._Store(cache, stats, key, stamp, res, miss_time)
+                finally:
+                    del self._in_flight[flight_key]
+        except:
+            import sys
+            flight.SetError(sys.exc_info())
+            raise
+        flight.SetResult(res)
+
+        if two_tier_cache is not None and not from_disk:
+            two_tier_cache.SetOnDisk(key, self._CreateEntry(stamp, res))
+        return res
+
     def _CreateCallWrapper(self, func):
         """
         This function creates a FIFO cache
@@ -249,25 +803,75 @@ class Memoize(object):
         :param object func:
             This is the function that is being cached.
         """
-        SENTINEL = []
+        import weakref
+
+        SENTINEL = self._SENTINEL
+        name = self._name
+        get_cache_key = self._get_cache_key
+
+        # Without options, the GetFromCacheOrCreate is inlined for speed.
+        inline = self._validator is None and not self._stats and not self._thread_safe
+        if self._thread_safe:
+            get_from_cache = self._GetFromCacheOrCreateThreadSafe
+        else:
+            get_from_cache = self._GetFromCacheOrCreate
+
         if self._memo_target == self.MEMO_INSTANCE_METHOD:
 
             outer_self = self
             cache_name = '__%s_cache__' % func.__name__
+            stats_name = '__%s_cache_stats__' % func.__name__
 
-            def Call(self, *args, **kwargs):
-                cache = getattr(self, cache_name, None)
-                if cache is None:
-                    cache = outer_self._CreateCacheObject()
-                    setattr(self, cache_name, cache)
-
-                #--- GetFromCacheOrCreate: inlined for speed
-                key = outer_self._GetCacheKey(args, kwargs)
-                res = cache.get(key, SENTINEL)
-                if res is SENTINEL:
-                    res = func(self, *args, **kwargs)
-                    cache[key] = res
-                return res
+            def CreateCache(self):
+                """
+                Creates the cache (and statistics) for a given instance.
+                """
+                if outer_self._stats:
+                    setattr(self, stats_name, _CacheStats())
+                cache = outer_self._CreateCacheObject()
+                setattr(self, cache_name, cache)
+                return cache
+
+            if self._thread_safe:
+                create_cache = CreateCache
+
+                def CreateCache(self):
+                    with outer_self._lock:
+                        cache = getattr(self, cache_name, None)
+                        if cache is None:
+                            cache = create_cache(self)
+                        return cache
+
+            if inline:
+
+                def Call(self, *args, **kwargs):
+                    cache = getattr(self, cache_name, None)
+                    if cache is None:
+                        cache = CreateCache(self)
+
+                    #--- GetFromCacheOrCreate: inlined for speed
+                    key = get_cache_key(args, kwargs)
+                    res = cache.get(key, SENTINEL)
+                    if res is SENTINEL:
+                        res = func(self, *args, **kwargs)
+                        cache[key] = res
+                    return res
+
+            else:
+
+                def Call(self, *args, **kwargs):
+                    cache = getattr(self, cache_name, None)
+                    if cache is None:
+                        cache = CreateCache(self)
+
+                    return get_from_cache(
+                        cache,
+                        getattr(self, stats_name, None),
+                        get_cache_key(args, kwargs),
+                        func,
+                        (self,) + args,
+                        kwargs,
+                    )
 
             def ClearCache(self):
                 """
@@ -275,25 +879,95 @@ class Memoize(object):
                 """
                 cache = getattr(self, cache_name, None)
                 if cache is not None:
-                    cache.clear()
+                    if outer_self._thread_safe:
+                        with outer_self._lock:
+                            cache.clear()
+                    else:
+                        cache.clear()
+
+            def GetCacheSize(self):
+                """
+                Returns the current size of the cache for a given instance (note that self must be
+                passed as a parameter): the number of values or, with max_bytes, their size in
+                bytes.
+                """
+                cache = getattr(self, cache_name, None)
+                if cache is None:
+                    return 0
+                if outer_self._thread_safe:
+                    with outer_self._lock:
+                        return cache.GetCurrentSize()
+                return cache.GetCurrentSize()
+
+            def GetCacheInfo(self):
+                """
+                Returns the statistics of the cache for a given instance (note that self must be
+                passed as a parameter).
+                """
+                cache = getattr(self, cache_name, None)
+                if cache is None:
+                    cache = outer_self._CreateCacheObject()
+                stats = getattr(self, stats_name, None)
+                if outer_self._thread_safe:
+                    with outer_self._lock:
+                        return _CreateCacheInfo(name, stats, cache)
+                return _CreateCacheInfo(name, stats, cache)
 
             Call.ClearCache = ClearCache
+            Call.GetCacheSize = GetCacheSize
+            Call.CacheInfo = GetCacheInfo
             return Call
 
         elif self._memo_target == self.MEMO_FUNCTION:
 
             # When it's a function, we can use the same cache the whole time (i.e.: it's global)
             cache = self._CreateCacheObject()
-            def Call(*args, **kwargs):
-                #--- GetFromCacheOrCreate: inlined for speed
-                key = self._GetCacheKey(args, kwargs)
-                res = cache.get(key, SENTINEL)
-                if res is SENTINEL:
-                    res = func(*args, **kwargs)
-                    cache[key] = res
-                return res
+            stats = None
+            if self._stats:
+                stats = _CacheStats()
+
+            if inline:
 
-            Call.ClearCache = cache.clear
+                def Call(*args, **kwargs):
+                    #--- GetFromCacheOrCreate: inlined for speed
+                    key = get_cache_key(args, kwargs)
+                    res = cache.get(key, SENTINEL)
+                    if res is SENTINEL:
+                        res = func(*args, **kwargs)
+                        cache[key] = res
+                    return res
+
+            else:
+
+                def Call(*args, **kwargs):
+                    return get_from_cache(
+                        cache, stats, get_cache_key(args, kwargs), func, args, kwargs)
+
+            clear_cache = cache.clear
+            get_cache_size = cache.GetCurrentSize
+            if self._thread_safe:
+
+                def clear_cache():
+                    with self._lock:
+                        cache.clear()
+
+                def get_cache_size():
+                    with self._lock:
+                        return cache.GetCurrentSize()
+
+            def GetCacheInfo():
+                """
+                Returns the statistics of the cache.
+                """
+                if self._thread_safe:
+                    with self._lock:
+                        return _CreateCacheInfo(name, stats, cache)
+                return _CreateCacheInfo(name, stats, cache)
+
+            Call.ClearCache = clear_cache
+            Call.GetCacheSize = get_cache_size
+            Call.CacheInfo = GetCacheInfo
+            _registry.append(weakref.ref(Call))
             return Call
 
         else:
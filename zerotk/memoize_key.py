@@ -0,0 +1,145 @@
+"""
+Key strategies for Memoize "key" parameter, to memoize functions receiving unhashable arguments
+(dicts, lists and sets).
+
+* FreezeKey: Structural keys. The containers are converted (recursively) to immutable values, so
+    equal containers produce the same key. Costs a traversal (and hashing) of the arguments on
+    each call.
+
+* CreateIdentityKey: Identity (plus version) keys, for large arguments that don't change (or that
+    have a version number that changes with them). Costs O(1) on each call, but equal containers
+    that are different objects produce different keys.
+
+A key strategy is any callable receiving the cache key (a tuple with the arguments) and returning
+a hashable key.
+"""
+from __future__ import unicode_literals
+
+
+class FrozenValue(object):
+    """
+    An immutable container created by Freeze, with its hash computed only once (when created).
+
+    Note that Freeze creates new FrozenValue instances on every call, so FreezeKey still
+    traverses and hashes the whole arguments on each call. For O(1) keys on big arguments use
+    CreateIdentityKey.
+    """
+
+    __slots__ = ('value', '_hash')
+
+    def __init__(self, value):
+        """
+        :param tuple value:
+            (type name, frozen contents)
+        """
+        self.value = value
+        self._hash = hash(value)
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, FrozenValue):
+            return False
+        return self._hash == other._hash and self.value == other.value
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'FrozenValue(%r)' % (self.value,)
+
+
+def Freeze(obj):
+    """
+    Converts the given object to an hashable equivalent: dicts, lists and sets (including
+    subclasses) are converted to FrozenValue instances, recursively. Tuples and frozensets are
+    frozen item by item. Other objects are returned as is (and must be hashable).
+
+    The container type is part of the result, so a list and a tuple with the same items are not
+    equal.
+
+    :param object obj:
+    :return object:
+    """
+    if isinstance(obj, tuple):
+        return tuple(Freeze(i) for i in obj)
+    if isinstance(obj, dict):
+        return FrozenValue(('dict', frozenset((Freeze(k), Freeze(v)) for k, v in obj.items())))
+    if isinstance(obj, list):
+        return FrozenValue(('list', tuple(Freeze(i) for i in obj)))
+    if isinstance(obj, (set, frozenset)):
+        frozen = frozenset(Freeze(i) for i in obj)
+        if isinstance(obj, frozenset):
+            return frozen
+        return FrozenValue(('set', frozen))
+    return obj
+
+
+def FreezeKey(key):
+    """
+    Key strategy: structural freezing of the arguments. See Freeze.
+
+    :param tuple key:
+    :return tuple:
+    """
+    return Freeze(key)
+
+
+class IdentityKey(object):
+    """
+    Key for an object compared by its identity and version.
+
+    Note that the key keeps a reference to the object, so its id can't be reused by another object
+    while the key is cached.
+    """
+
+    __slots__ = ('obj', 'version', '_hash')
+
+    def __init__(self, obj, version=None):
+        self.obj = obj
+        self.version = version
+        self._hash = hash((id(obj), version))
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        return isinstance(other, IdentityKey) and \
+            self.obj is other.obj and self.version == other.version
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'IdentityKey(%s at 0x%x, version=%r)' % (
+            self.obj.__class__.__name__, id(self.obj), self.version)
+
+
+def CreateIdentityKey(get_version=None, identity_types=(dict, list, set)):
+    """
+    Creates a key strategy using identity (plus version) for the arguments of the given types.
+    The other arguments are used as is (and must be hashable).
+
+    :param callable get_version:
+        get_version(obj) -> hashable
+        Returns the current version of an argument: a new version produces a new key. If None,
+        the arguments must not change while cached.
+
+    :param tuple(type) identity_types:
+
+    :return callable:
+    """
+
+    def GetKey(key):
+        result = []
+        for i_arg in key:
+            if isinstance(i_arg, identity_types):
+                version = None if get_version is None else get_version(i_arg)
+                i_arg = IdentityKey(i_arg, version)
+            result.append(i_arg)
+        return tuple(result)
+
+    return GetKey
@@ -0,0 +1,201 @@
+"""
+Estimates the memory used by objects, so caches can be bounded in bytes.
+
+GetDeepSize traverses the objects graph summing sys.getsizeof of each object reached (each object
+counted once). Estimators for specific types can be registered with RegisterSizeEstimator: lib2to3
+trees have a fast default estimator (GetPytreeSize) that doesn't go through each leaf attributes.
+
+Note that the results are estimates: shared objects (Ex.: interned strings) are counted for each
+graph they are reached from.
+"""
+from __future__ import unicode_literals
+
+import sys
+import types
+
+import six
+
+
+# Objects that are shared by everyone and never counted (nor traversed).
+_SHARED_TYPES = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    property,
+)
+if six.PY2:
+    _SHARED_TYPES += (types.ClassType,)
+
+_ATOMIC_TYPES = six.string_types + six.integer_types + (bytes, float, complex, bool, type(None))
+
+_ESTIMATORS = {}
+
+# Cache of the estimator for each type (including the types without an estimator), filled on
+# demand from _ESTIMATORS.
+_estimators_by_type = {}
+
+
+def RegisterSizeEstimator(type_, estimator):
+    """
+    Registers a function to estimate the size of instances of the given type (and subclasses).
+
+    :param type type_:
+
+    :param callable estimator:
+        estimator(obj, seen) -> int
+        Returns the size of obj, including the objects it references. Must add to the set "seen"
+        the id of all objects counted (so they are not counted again by GetDeepSize).
+    """
+    _ESTIMATORS[type_] = estimator
+    _estimators_by_type.clear()
+
+
+def _GetEstimator(type_):
+    try:
+        return _estimators_by_type[type_]
+    except KeyError:
+        _RegisterDefaultEstimators()
+        result = None
+        for i_type in type_.__mro__:
+            result = _ESTIMATORS.get(i_type)
+            if result is not None:
+                break
+        _estimators_by_type[type_] = result
+        return result
+
+
+def _GetSlots(type_):
+    """
+    :return list(unicode):
+        The names of all slots of the given type (including base classes).
+    """
+    result = []
+    for i_type in type_.__mro__:
+        slots = i_type.__dict__.get('__slots__', ())
+        if isinstance(slots, six.string_types):
+            slots = (slots,)
+        result += [i for i in slots if i not in ('__dict__', '__weakref__')]
+    return result
+
+
+def GetDeepSize(obj, seen=None):
+    """
+    Estimates the memory (in bytes) used by the given object and all objects reachable from it.
+
+    :param object obj:
+
+    :param set(int) seen:
+        The ids of the objects already counted, which are skipped. Updated with the objects
+        counted by this call.
+
+    :return int:
+    """
+    getsizeof = sys.getsizeof
+    if seen is None:
+        seen = set()
+
+    result = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        obj_id = id(obj)
+        if obj_id in seen:
+            continue
+        type_ = type(obj)
+        if isinstance(obj, _SHARED_TYPES):
+            continue
+
+        estimator = _GetEstimator(type_)
+        if estimator is not None:
+            result += estimator(obj, seen)
+            continue
+
+        seen.add(obj_id)
+        result += getsizeof(obj)
+        if isinstance(obj, _ATOMIC_TYPES):
+            continue
+
+        if isinstance(obj, dict):
+            stack += obj.keys()
+            stack += obj.values()
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack += obj
+        else:
+            obj_dict = getattr(obj, '__dict__', None)
+            if obj_dict is not None:
+                stack.append(obj_dict)
+            for i_slot in _GetSlots(type_):
+                value = getattr(obj, i_slot, None)
+                if value is not None:
+                    stack.append(value)
+    return result
+
+
+_pytree_node_size = None
+
+
+def GetPytreeSize(node, seen=None):
+    """
+    Fast estimate of the memory (in bytes) used by a lib2to3 tree.
+
+    Instead of going through the attributes of each node it uses the size of a typical node plus
+    the sizes of the variable parts: children lists and leaf strings.
+
+    :param lib2to3.pytree.Base node:
+    :param set(int) seen:
+        See GetDeepSize.
+    :return int:
+    """
+    global _pytree_node_size
+    from lib2to3.pytree import Leaf
+
+    getsizeof = sys.getsizeof
+    if seen is None:
+        seen = set()
+
+    if _pytree_node_size is None:
+        sample_leaf = Leaf(1, 'a', prefix=' ')
+        sample_leaf.lineno = sample_leaf.column = 1
+        _pytree_node_size = getsizeof(sample_leaf) + getsizeof(sample_leaf.__dict__)
+
+    node_size = _pytree_node_size
+    result = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        node_id = id(node)
+        if node_id in seen:
+            continue
+        seen.add(node_id)
+        result += node_size
+        if isinstance(node, Leaf):
+            result += getsizeof(node.value) + getsizeof(node._prefix)
+        else:
+            children = node.children
+            result += getsizeof(children)
+            stack += children
+    return result
+
+
+_default_estimators_registered = False
+
+
+def _RegisterDefaultEstimators():
+    """
+    Registers the lib2to3 trees estimator, once lib2to3 is loaded: there can't be trees before that
+    and we don't want to import lib2to3 just in case.
+
+    Called whenever an unknown type is found (see _GetEstimator).
+    """
+    global _default_estimators_registered
+    if _default_estimators_registered or 'lib2to3.pytree' not in sys.modules:
+        return
+    _default_estimators_registered = True
+
+    from lib2to3.pytree import Base
+
+    # Keeps the estimator registered by the user, if any.
+    if Base not in _ESTIMATORS:
+        RegisterSizeEstimator(Base, GetPytreeSize)
@@ -1,5 +1,6 @@
 from __future__ import unicode_literals
 from .is_frozen import IsFrozen
+from .memoize import Memoize
 import os
 import sys
 
@@ -204,6 +205,132 @@ class ModuleFinder(object):
         return result
 
 
+class ModuleNameResolver(object):
+    """
+    Converts python modules filenames into import like strings, like ModuleFinder.ModuleName, but
+    matching the filenames against a trie of the python-path directories.
+
+    The trie is built once (see GetModuleNameResolver) so each resolution is a single descent over
+    the filename path components, instead of normalizing and sorting the whole python-path on every
+    call.
+    """
+
+    # Trie node key marking that the path up to this node is a python-path directory.
+    _PYTHON_PATH_MARK = None
+
+    def __init__(self, python_path):
+        """
+        :param list(unicode) python_path:
+            The python-path directories (in filesystem format, as in sys.path).
+        """
+        self.python_path = list(python_path)
+        self._trie = {}
+        for i_python_path in self.python_path:
+            node = self._trie
+            for i_part in self._SplitPath(i_python_path, is_for_compare=True):
+                node = node.setdefault(i_part, {})
+            node[self._PYTHON_PATH_MARK] = i_python_path
+
+    @classmethod
+    def _SplitPath(cls, path, is_for_compare=False):
+        """
+        Splits the given path into its components.
+
+        :param unicode path:
+        :param bool is_for_compare:
+            If true, make all lowercase on win32 (see ModuleFinder._FormatAsModuleName).
+        :return list(unicode):
+        """
+        result = path.replace('\\', '/')
+        if is_for_compare and sys.platform == 'win32':
+            result = result.lower()
+        result = result.split('/')
+        # Ignore trailing slashes.
+        while len(result) > 1 and result[-1] == '':
+            del result[-1]
+        return result
+
+    def ModuleName(self, filename):
+        """
+        Given a module filename returns the module name for it considering the python-path.
+
+        The longest matching python-path directory has priority.
+
+        :param unicode filename:
+            The filename of the python module.
+
+        :return unicode:
+            The module name in the format:
+                xxx.yyy.zzz
+
+        :raises RuntimeError:
+            If the filename is not in any of the python-path directories.
+        """
+        result = self.ModuleNames([filename])[0]
+        if result is None:
+            python_path = '\n   - '.join(['\n'] + sorted(self.python_path))
+            raise RuntimeError(
+                'Python path not found for filename: %r\n'
+                ' Python Path:%s'
+                % (filename, python_path)
+            )
+        return result
+
+    def ModuleNames(self, filenames):
+        """
+        Batch version of ModuleName.
+
+        :param list(unicode) filenames:
+            The filenames of the python modules.
+
+        :return list(unicode|None):
+            The module names for each of the given filenames, in the same order. Filenames not
+            found in the python-path result in None.
+        """
+        mark = self._PYTHON_PATH_MARK
+        result = []
+        for i_filename in filenames:
+            i_filename = os.path.splitext(i_filename)[0]
+            parts = self._SplitPath(i_filename)
+            compare_parts = self._SplitPath(i_filename, is_for_compare=True)
+
+            # Only the module directories are matched against the python-path.
+            match = None
+            node = self._trie
+            for i, i_part in enumerate(compare_parts[:-1]):
+                node = node.get(i_part)
+                if node is None:
+                    break
+                if mark in node:
+                    match = i + 1
+
+            if match is None:
+                result.append(None)
+            else:
+                result.append('.'.join(parts[match:]))
+        return result
+
+
+def GetModuleNameResolver(python_path=None):
+    """
+    Returns a (cached) ModuleNameResolver for the given python-path.
+
+    :param list(unicode) python_path:
+        The python-path directories. Defaults to ModuleFinder.ObtainPythonPath(), that is, usually
+        sys.path.
+
+    :return ModuleNameResolver:
+    """
+    if python_path is None:
+        python_path = ModuleFinder.ObtainPythonPath()
+    return _CreateModuleNameResolver(tuple(python_path))
+
+
+@Memoize(maxsize=10, thread_safe=True)
+def _CreateModuleNameResolver(python_path):
+    return ModuleNameResolver(python_path)
+
+
 def ImportModule(p_import_path):
     """
         Import the module in the given import path.
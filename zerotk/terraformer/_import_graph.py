@@ -0,0 +1,477 @@
+from __future__ import unicode_literals
+
+from array import array
+import os
+
+import six
+
+
+def _ArrayToBytes(values):
+    """
+    :param array values:
+    :return bytes:
+    """
+    if six.PY2:
+        return values.tostring()
+    return values.tobytes()
+
+
+def _ArrayFromBytes(data):
+    """
+    :param bytes data:
+    :return array:
+    """
+    result = _NewArray()
+    if six.PY2:
+        result.fromstring(data)
+    else:
+        result.frombytes(data)
+    return result
+
+
+def _NewArray(values=()):
+    """
+    Creates an array of integers (module ids, offsets and line numbers).
+
+    On python 2 the typecode must be bytes (str).
+
+    :param iter(int) values:
+    :return array:
+    """
+    return array(str('i'), values)
+
+
+def ExtractImports(filename):
+    """
+    Extracts the import-symbols of the given python module.
+
+    This is a module level function so it can be used with multiprocessing.
+
+    :param unicode filename:
+
+    :return tuple(unicode,float,int,list(tuple(unicode,int,int)),unicode):
+        A tuple with the filename, its modification time and size, the list of imports as
+        (name, kind, lineno) and an error message (None if no errors occurred).
+    """
+    from ._terra_former import TerraFormer
+
+    stat = os.stat(filename)
+    imports = []
+    error = None
+    try:
+        terra = TerraFormer(filename=filename)
+    except Exception as e:
+        error = '%s: %s' % (e.__class__.__name__, e)
+    else:
+        imports = sorted([(i.name, i.kind, i.lineno) for i in terra.symbols])
+    return filename, stat.st_mtime, stat.st_size, imports, error
+
+
+class ImportGraph(object):
+    """
+    The graph of imports between python modules.
+
+    The graph is stored in a compact adjacency representation (CSR: compressed sparse rows):
+
+    * modules: The module names, sorted. The index of each module is its id.
+    * offsets: For each module id, the start of its imports in the edges arrays. The imports of
+      module i are edges[offsets[i]:offsets[i + 1]].
+    * edges: The ids of the imported modules.
+    * edge_linenos: The line number of the (first) import-statement for each edge.
+
+    Modules that are imported but not found in the scanned files (external modules) are also part
+    of the graph but, of course, have no imports.
+
+    The extracted imports of each scanned file are kept (see `files`) so updating the graph only
+    re-scans the files that changed.
+
+    The graph also keeps an inverted index from the imported names to the files importing them
+    (see `importers`), used to find the files affected by a refactor.
+    """
+
+    VERSION = 2
+
+    def __init__(self, python_path=()):
+        """
+        :param list(unicode) python_path:
+            The directories used to obtain the module name of the scanned files.
+            See zerotk.module_finder.ModuleNameResolver.
+        """
+        self.python_path = list(python_path)
+
+        # Maps filename -> (mtime, size, imports, error). See ExtractImports.
+        self.files = {}
+
+        self.modules = []
+        self.module_filenames = []
+        self.offsets = _NewArray([0])
+        self.edges = _NewArray()
+        self.edge_linenos = _NewArray()
+        self._module_ids = {}
+
+        # Maps imported name -> list of (filename, lineno). Import-from symbols are also indexed
+        # by their package name.
+        self.importers = {}
+
+    def Update(self, filenames, imap=six.moves.map):
+        """
+        Updates the graph with the given files, re-scanning only the files that changed since the
+        last update. Files no longer in the given list are removed from the graph.
+
+        :param list(unicode) filenames:
+            The python modules filenames.
+
+        :param callable imap:
+            The map function used to extract the imports of the (changed) files. Pass the map of
+            a process pool to extract the imports in parallel.
+
+        :return int:
+            The number of scanned files.
+        """
+        files = {}
+        scan = []
+        for i_filename in filenames:
+            i_filename = os.path.abspath(i_filename)
+            stat = os.stat(i_filename)
+            entry = self.files.get(i_filename)
+            if entry is not None and entry[:2] == (stat.st_mtime, stat.st_size):
+                files[i_filename] = entry
+            else:
+                scan.append(i_filename)
+
+        for i_filename, i_mtime, i_size, i_imports, i_error in imap(ExtractImports, scan):
+            files[i_filename] = (i_mtime, i_size, i_imports, i_error)
+
+        self.files = files
+        self._Build()
+        return len(scan)
+
+    def GetModuleName(self, filename):
+        """
+        Returns the module name for the given filename.
+
+        Files outside the python-path use their base name. Packages use the package name (not
+        "package.__init__").
+
+        :param unicode filename:
+        :return unicode:
+        """
+        from zerotk.module_finder import GetModuleNameResolver
+
+        result = GetModuleNameResolver(self.python_path).ModuleNames([filename])[0]
+        if not result:
+            result = os.path.splitext(os.path.basename(filename))[0]
+        if result.endswith('.__init__'):
+            result = result[:-len('.__init__')]
+        return result
+
+    @classmethod
+    def _ResolveImport(cls, module, is_package, name, kind, internal_modules):
+        """
+        Returns the module imported by an import-symbol.
+
+        :param unicode module:
+            The module with the import-statement.
+
+        :param bool is_package:
+            If the module is a package (__init__), used to resolve relative imports.
+
+        :param unicode name:
+        :param int kind:
+            The import-symbol name and kind.
+
+        :param set(unicode) internal_modules:
+            The modules found in the scanned files.
+
+        :return unicode:
+        """
+        from ._symbol import ImportSymbol
+
+        if kind == ImportSymbol.KIND_IMPORT_FROM:
+            package, token = name.rsplit('.', 1)
+        else:
+            package, token = name, None
+
+        # Relative imports: from . import alpha, from .alpha import Bravo
+        if package.startswith('.'):
+            level = len(package) - len(package.lstrip('.'))
+            base = module if is_package else module.rpartition('.')[0]
+            for _i in range(level - 1):
+                base = base.rpartition('.')[0]
+            package = '.'.join([i for i in (base, package[level:]) if i])
+
+        if token is not None:
+            candidate = package + '.' + token if package else token
+            if candidate in internal_modules:
+                return candidate
+        return package or None
+
+    def _Build(self):
+        """
+        Builds the compact adjacency representation from the extracted imports of the files.
+
+        Rebuilds all the rows (and the importers index) from self.files: a module added or
+        removed shifts the ids of the others and may change how the imports resolve. Only the
+        extraction of the imports, by far the most expensive part, is incremental.
+        """
+        file_modules = {}
+        for i_filename in self.files:
+            file_modules[i_filename] = self.GetModuleName(i_filename)
+        internal_modules = set(file_modules.values())
+
+        from ._symbol import ImportSymbol
+
+        imports = {}
+        importers = {}
+        for i_filename, (_mtime, _size, i_imports, _error) in six.iteritems(self.files):
+            module = file_modules[i_filename]
+            is_package = os.path.splitext(os.path.basename(i_filename))[0] == '__init__'
+            module_imports = imports.setdefault(module, {})
+            for j_name, j_kind, j_lineno in i_imports:
+                importers.setdefault(j_name, []).append((i_filename, j_lineno))
+                if j_kind == ImportSymbol.KIND_IMPORT_FROM:
+                    package = j_name.rsplit('.', 1)[0]
+                    importers.setdefault(package, []).append((i_filename, j_lineno))
+
+                imported = self._ResolveImport(module, is_package, j_name, j_kind, internal_modules)
+                if imported is None or imported == module:
+                    continue
+                lineno = module_imports.get(imported)
+                if lineno is None or j_lineno < lineno:
+                    module_imports[imported] = j_lineno
+
+        for i_importers in six.itervalues(importers):
+            i_importers.sort()
+        self.importers = importers
+
+        modules = set(imports)
+        for i_module_imports in six.itervalues(imports):
+            modules.update(i_module_imports)
+        self.modules = sorted(modules)
+        self._module_ids = dict((j, i) for i, j in enumerate(self.modules))
+
+        module_filenames = dict((j, i) for i, j in six.iteritems(file_modules))
+        self.module_filenames = [module_filenames.get(i) for i in self.modules]
+
+        self.offsets = _NewArray([0])
+        self.edges = _NewArray()
+        self.edge_linenos = _NewArray()
+        for i_module in self.modules:
+            module_imports = imports.get(i_module, {})
+            for j_id, j_lineno in sorted(
+                    (self._module_ids[k], l) for k, l in six.iteritems(module_imports)):
+                self.edges.append(j_id)
+                self.edge_linenos.append(j_lineno)
+            self.offsets.append(len(self.edges))
+
+    def GetModuleId(self, module):
+        """
+        :param unicode module:
+        :return int|None:
+        """
+        return self._module_ids.get(module)
+
+    def GetImports(self, module):
+        """
+        Returns the modules imported by the given module.
+
+        :param unicode module:
+        :return list(unicode):
+        """
+        module_id = self._module_ids.get(module)
+        if module_id is None:
+            return []
+        edges = self.edges[self.offsets[module_id]:self.offsets[module_id + 1]]
+        return [self.modules[i] for i in edges]
+
+    def GetImporters(self, name):
+        """
+        Returns the import-statements importing the given name.
+
+        :param unicode name:
+            An import-symbol name (Ex.: alpha.bravo.Charlie) or the package of import-from
+            symbols (Ex.: alpha.bravo).
+
+        :return list(tuple(unicode,int)):
+            The (filename, lineno) of each import-statement.
+        """
+        return self.importers.get(name, [])
+
+    def GetRefactorFilenames(self, refactor):
+        """
+        Returns the files affected by the given refactor, that is, the files importing any of the
+        refactor names. See ImportBlock.Refactor.
+
+        Files with errors are always included since their imports are unknown.
+
+        :param dict(unicode,unicode) refactor:
+        :return list(unicode):
+        """
+        result = set()
+        for i_name in refactor:
+            if i_name.endswith('$'):
+                i_name = i_name[:-1]
+            result.update(i for i, _j in self.GetImporters(i_name))
+        for i_filename, (_mtime, _size, _imports, i_error) in six.iteritems(self.files):
+            if i_error is not None:
+                result.add(i_filename)
+        return sorted(result)
+
+    def GetStronglyConnectedComponents(self):
+        """
+        Returns the strongly connected components of the graph with more than one module, that is,
+        the groups of modules importing each other.
+
+        Uses an iterative version of Tarjan's algorithm so deep graphs don't hit the recursion
+        limit.
+
+        :return list(list(int)):
+            The module ids of each component, sorted.
+        """
+        offsets = self.offsets
+        edges = self.edges
+        count = len(self.modules)
+        index = [-1] * count
+        lowlink = [0] * count
+        on_stack = [False] * count
+        stack = []
+        counter = 0
+        result = []
+
+        for i_root in range(count):
+            if index[i_root] != -1:
+                continue
+            index[i_root] = lowlink[i_root] = counter
+            counter += 1
+            stack.append(i_root)
+            on_stack[i_root] = True
+            work = [(i_root, offsets[i_root])]
+            while work:
+                module_id, position = work[-1]
+                if position < offsets[module_id + 1]:
+                    work[-1] = (module_id, position + 1)
+                    imported_id = edges[position]
+                    if index[imported_id] == -1:
+                        index[imported_id] = lowlink[imported_id] = counter
+                        counter += 1
+                        stack.append(imported_id)
+                        on_stack[imported_id] = True
+                        work.append((imported_id, offsets[imported_id]))
+                    elif on_stack[imported_id]:
+                        lowlink[module_id] = min(lowlink[module_id], index[imported_id])
+                    continue
+
+                work.pop()
+                if work:
+                    parent_id = work[-1][0]
+                    lowlink[parent_id] = min(lowlink[parent_id], lowlink[module_id])
+                if lowlink[module_id] == index[module_id]:
+                    component = []
+                    while True:
+                        imported_id = stack.pop()
+                        on_stack[imported_id] = False
+                        component.append(imported_id)
+                        if imported_id == module_id:
+                            break
+                    if len(component) > 1:
+                        result.append(sorted(component))
+
+        return sorted(result)
+
+    def GetShortestCycle(self, component):
+        """
+        Returns the shortest cycle passing through the first module of the given component.
+
+        :param list(int) component:
+            The module ids of a strongly connected component.
+            See GetStronglyConnectedComponents.
+
+        :return list(tuple(int,int,int)):
+            The edges of the cycle as (module_id, imported_id, lineno).
+        """
+        offsets = self.offsets
+        edges = self.edges
+        members = set(component)
+        start = component[0]
+
+        # Breadth-first search from start until an edge back to start is found. Maps each
+        # visited module to the edge position used to reach it.
+        reached_by = {start: None}
+        queue = [start]
+        for module_id in queue:
+            for i_position in range(offsets[module_id], offsets[module_id + 1]):
+                imported_id = edges[i_position]
+                if imported_id == start:
+                    cycle = [(module_id, i_position)]
+                    while reached_by[module_id] is not None:
+                        module_id, position = reached_by[module_id]
+                        cycle.append((module_id, position))
+                    return [(i, edges[j], self.edge_linenos[j]) for i, j in reversed(cycle)]
+                if imported_id in members and imported_id not in reached_by:
+                    reached_by[imported_id] = (module_id, i_position)
+                    queue.append(imported_id)
+        return []
+
+    def FindCycles(self):
+        """
+        Returns one minimal import cycle for each group of modules importing each other.
+
+        :return list(list(tuple(unicode,unicode,int))):
+            The edges of each cycle as (module, imported module, lineno).
+        """
+        result = []
+        for i_component in self.GetStronglyConnectedComponents():
+            cycle = self.GetShortestCycle(i_component)
+            result.append([(self.modules[i], self.modules[j], k) for i, j, k in cycle])
+        return result
+
+    def Save(self, filename):
+        """
+        Saves the graph in the given filename.
+
+        :param unicode filename:
+        """
+        from six.moves import cPickle
+
+        data = {
+            'version': self.VERSION,
+            'python_path': self.python_path,
+            'files': self.files,
+            'modules': self.modules,
+            'module_filenames': self.module_filenames,
+            'offsets': _ArrayToBytes(self.offsets),
+            'edges': _ArrayToBytes(self.edges),
+            'edge_linenos': _ArrayToBytes(self.edge_linenos),
+            'importers': self.importers,
+        }
+        with open(filename, 'wb') as oss:
+            cPickle.dump(data, oss, 2)
+
+    @classmethod
+    def Load(cls, filename):
+        """
+        Loads a graph saved with Save.
+
+        :param unicode filename:
+        :return ImportGraph:
+        :raises ValueError:
+            If the file was saved by another version of ImportGraph.
+        """
+        from six.moves import cPickle
+
+        with open(filename, 'rb') as iss:
+            data = cPickle.load(iss)
+        version = data.get('version') if isinstance(data, dict) else None
+        if version != cls.VERSION:
+            raise ValueError('Unsupported import graph version: %r' % (version,))
+
+        result = cls(data['python_path'])
+        result.files = data['files']
+        result.modules = data['modules']
+        result.module_filenames = data['module_filenames']
+        result.offsets = _ArrayFromBytes(data['offsets'])
+        result.edges = _ArrayFromBytes(data['edges'])
+        result.edge_linenos = _ArrayFromBytes(data['edge_linenos'])
+        result.importers = data['importers']
+        result._module_ids = dict((j, i) for i, j in enumerate(result.modules))
+        return result
@@ -0,0 +1,147 @@
+"""
+Cheap checks made on the raw file contents to avoid parsing files that a refactor won't change.
+"""
+from __future__ import unicode_literals
+
+import re
+
+from zerotk.memoize import Memoize
+
+from ._wrap import WRAP_FILL
+
+
+class RefactorPrefilter(object):
+    """
+    Matches, in a single pass over the raw bytes, any name a refactor could change.
+
+    The refactor keys are dotted names (Ex.: alpha.bravo.Charlie). A file can only import such a
+    symbol if it contains its package name (alpha.bravo), either as "import alpha.bravo.Charlie"
+    or "from alpha.bravo import Charlie". Keys without package (Ex.: alpha) are searched as is.
+
+    All the names are combined in a single compiled regular expression.
+    """
+
+    def __init__(self, names):
+        """
+        :param iter(unicode) names:
+            The refactor keys. See ImportBlock.Refactor.
+        """
+        needles = set()
+        for i_name in names:
+            if i_name.endswith('$'):
+                i_name = i_name[:-1]
+            needles.add(i_name.rsplit('.', 1)[0])
+
+        if needles:
+            # Longest first so the alternation prefers the most specific names.
+            alternatives = b'|'.join(
+                re.escape(i.encode('UTF-8'))
+                for i in sorted(needles, key=lambda x: (-len(x), x))
+            )
+            self._regex = re.compile(b'(?<![\\w.])(?:' + alternatives + b')(?!\\w)')
+        else:
+            self._regex = None
+
+    def Search(self, contents):
+        """
+        :param bytes contents:
+            The raw contents of a file.
+
+        :return bool:
+            Returns True if the contents may contain an import affected by the refactor.
+        """
+        if self._regex is None:
+            return False
+        return self._regex.search(contents) is not None
+
+
+@Memoize(maxsize=10, thread_safe=True)
+def GetRefactorPrefilter(names):
+    """
+    Returns a (cached) RefactorPrefilter for the given refactor keys.
+
+    :param frozenset(unicode) names:
+    :return RefactorPrefilter:
+    """
+    return RefactorPrefilter(names)
+
+
+_IMPORT_NAME_RE = re.compile(r'^import (\w+(?:\.\w+)*(?: as \w+)?(?:, \w+(?:\.\w+)*(?: as \w+)?)*)$')
+_IMPORT_FROM_RE = re.compile(r'^from (\.*\w+(?:\.\w+)*|\.+) import (\w+(?: as \w+)?(?:, \w+(?: as \w+)?)*)$')
+_IMPORT_WORD_RE = re.compile(r'\bimport\b')
+
+
+def IsReorganized(source, filename=None, page_width=100, wrap_style=WRAP_FILL):
+    """
+    Checks, without parsing, if the import-statements of the given source are already organized,
+    that is, if ImportBlock.Reorganize would produce the same text.
+
+    This only recognizes the simplest (and most common) layout: all import-statements in a
+    single run of one-line, module level statements without comments. Returns False for anything
+    else (including any other occurrence of the "import" word), in which case the file must be
+    parsed.
+
+    :param unicode source:
+    :param unicode filename:
+        The source filename. Import-from statements that may be affected by
+        ImportBlock.FixLocalSymbols (importing from the package containing the file) are not
+        handled either.
+    :param int page_width:
+    :param unicode wrap_style:
+    :return bool:
+    """
+    import os
+    from ._symbol import ImportBlock, ImportSymbol
+
+    local_package = None
+    if filename is not None:
+        directory = os.path.dirname(os.path.abspath(filename))
+        if os.path.isfile(os.path.join(directory, '__init__' + ImportBlock.PYTHON_EXT)):
+            local_package = os.path.basename(directory)
+
+    if '\r' in source or '\\' in source:
+        return False
+
+    lines = source.split('\n')
+    start = None
+    end = None
+    for i, i_line in enumerate(lines):
+        if not _IMPORT_WORD_RE.search(i_line):
+            continue
+        if end is not None and end != i:
+            return False  # Only one run of import-statements.
+        if start is None:
+            start = i
+        end = i + 1
+
+    if start is None:
+        return True
+
+    # Comments preceding the import-statements belong to their prefix and may be rearranged.
+    for i_line in reversed(lines[:start]):
+        if '#' in i_line:
+            return False
+        if i_line.strip():
+            break
+
+    block = ImportBlock(None, None, [], 0, 0, 0)
+    for i_line in lines[start:end]:
+        match = _IMPORT_NAME_RE.match(i_line)
+        if match is not None:
+            package, names, kind = None, match.group(1), ImportSymbol.KIND_IMPORT_NAME
+        else:
+            match = _IMPORT_FROM_RE.match(i_line)
+            if match is None:
+                return False
+            package, names, kind = match.group(1), match.group(2), ImportSymbol.KIND_IMPORT_FROM
+            if local_package is not None and package.rsplit('.', 1)[-1] == local_package:
+                return False
+
+        for j_name in names.split(', '):
+            j_name, _as, import_as = j_name.partition(' as ')
+            if package is not None:
+                j_name = package + '.' + j_name
+            block.ObtainImportSymbol(j_name, import_as=import_as or None, kind=kind)
+
+    statements = block.CreateText(block._children, 0, page_width, wrap_style=wrap_style)
+    return [i + j for i, j in statements] == lines[start:end]
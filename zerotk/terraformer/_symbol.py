@@ -6,13 +6,41 @@ import six
 
 from zerotk.decorators import Comparable, Override
 
+from ._wrap import WRAP_FILL, WrapPrefixes
+
+
+# Shared (immutable) children for symbols without children. The list is only allocated when the
+# first child is added.
+_NO_CHILDREN = ()
+
+def InternNames(symbol):
+    """
+    Makes the symbols with the same name (and the imports with the same alias) share the same
+    string, for all the symbols under the given one.
+
+    The table only lives during the call, so the names of discarded modules are not kept. We can't
+    use the builtin intern because it only accepts bytes on python 2.
+
+    :param Symbol symbol:
+    """
+    names = {}
+    for i_symbol in symbol.Walk():
+        i_symbol.name = names.setdefault(i_symbol.name, i_symbol.name)
+        import_as = getattr(i_symbol, 'import_as', None)
+        if import_as is not None:
+            i_symbol.import_as = names.setdefault(import_as, import_as)
+
 
 class Symbol(object):
     """
     Represents a python symbol definition.
     This is also the base class for other kinds of symbols.
+
+    Symbols use __slots__ because we create lots of them when analyzing whole packages.
     """
 
+    __slots__ = ('name', 'code', 'code_replace', 'lineno', 'column', 'parent', '_children')
+
     PREFIX = 'DEF'
 
     def __init__(self, parent, name, code, code_replace=None):
@@ -31,7 +59,7 @@ class Symbol(object):
 
         # Tree structure
         self.parent = None
-        self._children = []
+        self._children = _NO_CHILDREN
         self.SetParent(parent)
 
     def SetParent(self, parent):
@@ -39,6 +67,8 @@ class Symbol(object):
             self.RemoveFromParent()
         self.parent = parent
         if self.parent:
+            if self.parent._children is _NO_CHILDREN:
+                self.parent._children = []
             self.parent._children.append(self)
 
     def RemoveFromParent(self):
@@ -69,7 +99,7 @@ class Symbol(object):
             else:
                 SymbolArgument(self, i_arg.value, i_arg)
 
-    def CreateCode(self, indent, page_width):
+    def CreateCode(self, indent, page_width, wrap_style=WRAP_FILL):
         """
         Create a lib2to3 code for this symbol.
 
@@ -77,13 +107,39 @@ class Symbol(object):
         of these.
 
         :param int indent:
-            The indentation of the code. This is counted as the number of spaces, so for our
-            standards this should be multiple of 4.
+            The indentation of the code, in number of spaces.
 
         :param int page_width:
             The generated code will have at most this width (in characters).
 
+        :param unicode wrap_style:
+            How to wrap statements that don't fit in the page-width. One of _wrap.WRAP_STYLES.
+
         :return list(lib2to3.Node):
+            A simple_stmt node for each generated statement, with the indentation in its prefix.
+            These are the same nodes we get parsing the text created by CreateText.
+        """
+        raise NotImplementedError()
+
+    def CreateText(self, indent, page_width, wrap_style=WRAP_FILL):
+        """
+        Create the source code text for this symbol.
+
+        For now only import-block related symbols have this implemented, but later we'll have more
+        of these.
+
+        :param int indent:
+            The indentation of the code, in number of spaces.
+
+        :param int page_width:
+            The generated code will have at most this width (in characters).
+
+        :param unicode wrap_style:
+            How to wrap statements that don't fit in the page-width. One of _wrap.WRAP_STYLES.
+
+        :return list(tuple(unicode,unicode)):
+            A list of (statement, comment) pairs, one for each generated statement. The statement
+            text includes the indentation but neither the inline comment nor the EOL.
         """
         raise NotImplementedError()
 
@@ -108,17 +164,72 @@ class Symbol(object):
         if not isinstance(code, list):
             code = [code]
 
-        pos = node.parent.children.index(node)
-        new_children = []
-        for i, i_child in enumerate(node.parent.children):
-            if i == pos:
-                new_children += code
-            new_children.append(i_child)
+        cls._SpliceNodes([(node, code)], [])
+
+    @classmethod
+    def _ReplaceNodes(cls, nodes, code=()):
+        """
+        Replaces the given nodes by the given code, inserted in the place of the first node.
+
+        Nodes without parent (already removed) are ignored.
 
-        for j_node in code:
-            j_node.parent = node.parent
-        node.parent.children = new_children
-        node.parent.changed()
+        :param list(lib2to3.Node) nodes:
+        :param list(lib2to3.Node) code:
+        """
+        nodes = [i for i in nodes if i.parent is not None]
+        if not nodes:
+            return
+        cls._SpliceNodes([(nodes[0], list(code))], nodes)
+
+    @classmethod
+    def _SpliceNodes(cls, inserts, removes):
+        """
+        Inserts and removes many nodes rebuilding each affected parent's children list only once.
+
+        Calling _InsertCodeBeforeNode and lib2to3's Node.remove for each change is quadratic on the
+        number of changes under the same parent.
+
+        :param list(tuple(lib2to3.Node,list(lib2to3.Node))) inserts:
+            List of (node, code) to insert code before node.
+
+        :param list(lib2to3.Node) removes:
+            List of nodes to remove.
+        """
+        # Maps id(parent) -> (parent, {id(node): code}, set(id(node)))
+        splices = {}
+
+        def GetSplice(node):
+            if not node.parent:
+                raise TypeError(
+                    "Can't splice node that doesn't have a parent.")
+            result = splices.get(id(node.parent))
+            if result is None:
+                result = splices[id(node.parent)] = (node.parent, {}, set())
+            return result
+
+        for i_node, i_code in inserts:
+            GetSplice(i_node)[1].setdefault(id(i_node), []).extend(i_code)
+        for i_node in removes:
+            GetSplice(i_node)[2].add(id(i_node))
+
+        for i_parent, i_inserts, i_removes in six.itervalues(splices):
+            new_children = []
+            for j_child in i_parent.children:
+                code = i_inserts.get(id(j_child))
+                if code is not None:
+                    for k_node in code:
+                        k_node.parent = i_parent
+                    new_children += code
+                if id(j_child) in i_removes:
+                    j_child.parent = None
+                else:
+                    new_children.append(j_child)
+            i_parent.children = new_children
+            # Python 3 lib2to3 caches the siblings of the children (python 2 doesn't).
+            invalidate_sibling_maps = getattr(i_parent, 'invalidate_sibling_maps', None)
+            if invalidate_sibling_maps is not None:
+                invalidate_sibling_maps()
+            i_parent.changed()
 
 
 #=========================================================================
@@ -130,6 +241,8 @@ class Scope(Symbol):
     Symbols that define a scope derive from this class (Eg.: method, class), giving it a prefix.
     """
 
+    __slots__ = ('nested',)
+
     def __init__(self, parent, name, code, code_replace=None):
         Symbol.__init__(self, parent, name, code, code_replace=code_replace)
 
@@ -147,6 +260,8 @@ class SymbolArgument(Symbol):
     Represents a argument symbol definition.
     """
 
+    __slots__ = ()
+
     PREFIX = 'ARG'
 
 
@@ -158,14 +273,88 @@ class SymbolUsage(Symbol):
     a locally defined symbol such as a class, method or variable.
     """
 
+    __slots__ = ()
+
     PREFIX = 'USE'
 
     def Rename(self, symbol):
+        self.RenameMany([(self, symbol)])
+
+    @classmethod
+    def RenameMany(cls, renames):
+        """
+        Renames many symbol-usages at once, changing each parent node only once.
+
+        :param list(tuple(SymbolUsage,unicode)) renames:
+            List of (symbol-usage, new name).
+        """
         from lib2to3.fixer_util import Name
-        node = Name(symbol, self.code.prefix)
-        self._InsertCodeBeforeNode(self.code, node)
-        for i_node in self.code_replace:
-            i_node.remove()
+
+        inserts = []
+        removes = []
+        for i_usage, i_symbol in renames:
+            inserts.append((i_usage.code, [Name(i_symbol, i_usage.code.prefix)]))
+            removes += i_usage.code_replace
+        cls._SpliceNodes(inserts, removes)
+
+
+#=========================================================================
+# Import-statements nodes
+#=========================================================================
+def _CreateDottedNodes(name, prefix=''):
+    """
+    Creates the lib2to3 nodes of a (dotted) name, as the parser does.
+
+    Ex.:
+        alpha -> [NAME]
+        alpha.bravo -> [dotted_name]
+        ..alpha -> [DOT, DOT, NAME]
+
+    :param unicode name:
+    :param unicode prefix:
+        The prefix of the first node.
+    :return list(lib2to3.Node):
+    """
+    from lib2to3.pgen2 import token
+    from lib2to3.pygram import python_symbols
+    from lib2to3.pytree import Leaf, Node
+
+    # The leading dots of relative imports.
+    stripped = name.lstrip('.')
+    result = [Leaf(token.DOT, '.') for _i in range(len(name) - len(stripped))]
+    if stripped:
+        names = stripped.split('.')
+        children = [Leaf(token.NAME, names[0])]
+        for i_name in names[1:]:
+            children += [Leaf(token.DOT, '.'), Leaf(token.NAME, i_name)]
+        if len(children) == 1:
+            result += children
+        else:
+            result.append(Node(python_symbols.dotted_name, children))
+    result[0].prefix = prefix
+    return result
+
+
+def _CreateStatementNode(symbol_type, children, comment):
+    """
+    Creates a simple_stmt node with an import statement and the EOL.
+
+    :param int symbol_type:
+        The import statement type: python_symbols.import_name or import_from.
+    :param list(lib2to3.Node) children:
+        The children of the import statement.
+    :param unicode comment:
+        The inline comment, that goes in the prefix of the EOL.
+    :return lib2to3.Node:
+    """
+    from lib2to3.pgen2 import token
+    from lib2to3.pygram import python_symbols
+    from lib2to3.pytree import Leaf, Node
+
+    return Node(
+        python_symbols.simple_stmt,
+        [Node(symbol_type, children), Leaf(token.NEWLINE, '\n', prefix=comment)]
+    )
 
 
 #=========================================================================
@@ -191,6 +380,8 @@ class ImportSymbol(Symbol):
         Optional rename of the import (import XXX as YYY)
     """
 
+    __slots__ = ('import_as', 'comment', 'kind')
+
     PREFIX = 'IMPORT'
 
     KIND_IMPORT_NAME = 298
@@ -281,6 +472,24 @@ class ImportSymbol(Symbol):
         else:
             return self.name
 
+    def GetBoundName(self):
+        """
+        Returns the name this import binds in the module namespace, that is, the name the code
+        uses to reach the imported symbol.
+
+        Example:
+            import alpha.bravo -> alpha
+            import alpha.bravo as charlie -> charlie
+            from alpha import Bravo -> Bravo
+
+        :return str:
+        """
+        if self.import_as:
+            return self.import_as
+        if self.kind == self.KIND_IMPORT_FROM:
+            return self.GetToken()
+        return self.name.split('.', 1)[0]
+
     def _cmpkey(self):
         """
         Implements @Comparable._cmpkey.
@@ -294,50 +503,44 @@ class ImportSymbol(Symbol):
             index = 1
         return index, self.name
 
-    def CreateNameNode(self, prefix=' '):
+    def GetNameParts(self, prefix=' '):
         """
-        Creates a lib2to3.Node containing the name part of the import-symbol.
-        This is REused by CreateCode implementation for this class and the "ImportFromScope."
+        Returns the name part of the import-symbol as (prefix, value) pairs.
+        This is reused by CreateText implementation for this class and the "ImportFromScope".
 
         :param str prefix:
-            The node prefix.
+            The prefix of the first part.
 
-        :return lib2to3.Node:
+        :return list(tuple(unicode,unicode)):
         """
-        from lib2to3 import pygram
-        from lib2to3.fixer_util import Name
-        from lib2to3.pytree import Node
-
+        result = [(prefix, self.GetToken())]
         if self.import_as is not None:
-            return Node(
-                pygram.python_symbols.import_as_name,
-                [
-                    Name(self.GetToken(), prefix=prefix),
-                    Name('as', prefix=' '),
-                    Name(self.import_as, prefix=' ')
-                ]
-            )
-        else:
-            return Name(self.GetToken(), prefix=prefix)
+            result += [(' ', 'as'), (' ', self.import_as)]
+        return result
+
+    @Override(Symbol.CreateText)
+    def CreateText(self, indent, page_width, wrap_style=WRAP_FILL):
+        assert self.kind == self.KIND_IMPORT_NAME
+
+        text = ' ' * indent + 'import' + ''.join([i + j for i, j in self.GetNameParts()])
+        return [(text, self.comment)]
 
     @Override(Symbol.CreateCode)
-    def CreateCode(self, indent, page_width):
-        from lib2to3 import pygram
-        from lib2to3.fixer_util import Name, Newline
+    def CreateCode(self, indent, page_width, wrap_style=WRAP_FILL):
+        from lib2to3.fixer_util import Name
+        from lib2to3.pygram import python_symbols
         from lib2to3.pytree import Node
 
         assert self.kind == self.KIND_IMPORT_NAME
 
-        name_node = self.CreateNameNode()
-        new_line = Newline()
-        new_line.prefix = self.comment
-        result = Node(
-            pygram.python_symbols.simple_stmt,
-            prefix=' ' * indent,
-            children=[Name('import'), name_node, new_line]
-        )
-        return [result]
-
+        name_node = _CreateDottedNodes(self.name, prefix=' ')[0]
+        if self.import_as is not None:
+            name_node = Node(
+                python_symbols.dotted_as_name,
+                [name_node, Name('as', prefix=' '), Name(self.import_as, prefix=' ')]
+            )
+        children = [Name('import', prefix=' ' * indent), name_node]
+        return [_CreateStatementNode(python_symbols.import_name, children, self.comment)]
 
 #=========================================================================
 # ImportFromScope
@@ -366,6 +569,8 @@ class ImportFromScope(Scope):
         from charlie import Charlie
     """
 
+    __slots__ = ()
+
     PREFIX = 'IMPORT-FROM'
 
     def Copy(self, name):
@@ -396,91 +601,125 @@ class ImportFromScope(Scope):
             index = -101
         return index, self.name
 
-    @Override(Symbol.CreateCode)
-    def CreateCode(self, indent, page_width):
-        from lib2to3 import pygram
-        from lib2to3.fixer_util import Name, Newline
-        from lib2to3.pytree import Node
-
-        def _CreateCode(indent, package, symbols, comment):
-            """
-            Create code:
-                from <package> import <symbols> # <comment>
-            """
-            # children: the children nodes for the final from-import statement
-            children = [
-                Name('from', prefix=' ' * indent),
-                Name(package, prefix=' '),
-                Name('import', prefix=' '),
-            ]
-
-            # name_leaf: list of leaf nodes with the symbols to import
-            name_leafs = []
-            symbols = sorted(symbols)
-            for i, i_symbol in enumerate(symbols):
-                prefix = ' ' if i == 0 else ', '
-                name_leafs.append(i_symbol.CreateNameNode(prefix))
-
-            # nodes_wrap: if true, we need to wrap the import statement
-            nodes_wrap = False
-            line_len = 0
-            line_len += six.moves.reduce(
-                lambda x, y: x + y,
-                map(len, map(str, children)),
-                0
-            )
-            line_len += six.moves.reduce(
-                lambda x, y: x + y,
-                map(len, map(str, name_leafs)),
-                0
-            )
-            if line_len > page_width:
-                # Add parenthesis around the "from" names
-                name_leafs[0].prefix = ''
-                name_leafs.insert(0, Name('(', prefix=' '))
-                name_leafs.append(Name(')'))
-                nodes_wrap = True
-
-            # Adds the name_leafs to the children list
-            children += [Node(pygram.python_symbols.import_as_names, name_leafs)]
-
-            # from_import: the final node for the import statement
-            from_import = Node(pygram.python_symbols.import_from, children)
-
-            # result: a simple-statement node with the import statement and
-            # EOL.
-            new_line = Newline()
-            new_line.prefix = comment
-            result = Node(
-                pygram.python_symbols.simple_stmt,
-                children=[
-                    from_import,
-                    new_line,
-                ],
-            )
-
-            # Wrap nodes if necessary (see nodes_wrap above)
-            if nodes_wrap:
-                ImportBlock.TextWrapForNode(result, page_width, indent)
-
-            return result
+    def _GroupChildren(self):
+        """
+        Use some criteria to separate this import-from-package children into many statements:
+        * has_star: "from XXX import *" must be alone in a line.
+        * comment: inline comments must be preserved for each different statement.
 
-        # Use some criteria to separate this import-from-package children into many statements:
-        # * has_star: "from XXX import *" must be alone in a line.
-        # * comment: inline comments must be preserved for each different statement.
+        :return list(tuple(unicode,list(ImportSymbol))):
+            The (comment, symbols) for each statement, in the order they must be generated.
+        """
         groups = {}
         for i_child in self._children:
             has_star = i_child.name.endswith('*')
             key = has_star, i_child.comment
             groups.setdefault(key, []).append(i_child)
+        return [(i_comment, i_symbols) for (_has_star, i_comment), i_symbols in sorted(six.iteritems(groups))]
 
+    def _WrapStatements(self, indent, page_width, wrap_style):
+        """
+        Computes the import-statements of this package, wrapping the imported names when needed.
+
+        This is shared by the CreateText and CreateCode implementations.
+
+        :return list(tuple(unicode,list(tuple(unicode,unicode)),unicode|None,unicode)):
+            The (head, parts, closing_prefix, comment) for each statement:
+            * head: The "from XXX import" text, with the indentation.
+            * parts: The (prefix, value) parts of the imported names (see
+              ImportSymbol.GetNameParts) with the wrapped prefixes.
+            * closing_prefix: The prefix of the closing parenthesis or None when the names don't
+              need to be wrapped (and have no parenthesis).
+            * comment: The inline comment.
+        """
         result = []
-        for (_has_star, i_comment), i_symbols in sorted(six.iteritems(groups)):
-            node = _CreateCode(indent, self.name, i_symbols, i_comment)
-            result.append(node)
+        for i_comment, i_symbols in self._GroupChildren():
+            head = '%sfrom %s import' % (' ' * indent, self.name)
+            parts = []
+            for i, i_symbol in enumerate(sorted(i_symbols)):
+                parts += i_symbol.GetNameParts(' ' if i == 0 else ', ')
+
+            line_len = len(head)
+            for i_prefix, i_value in parts:
+                line_len += len(i_prefix) + len(i_value)
 
+            closing_prefix = None
+            if line_len > page_width:
+                # Add parenthesis around the "from" names, wrapping them.
+                parts[0] = ('', parts[0][1])
+                prefixes, closing_prefix = WrapPrefixes(
+                    parts, page_width, indent, len(head) + 2, wrap_style)
+                parts = [(i_prefix, i_value) for i_prefix, (_i, i_value) in zip(prefixes, parts)]
+            result.append((head, parts, closing_prefix, i_comment))
         return result
 
+    @Override(Symbol.CreateText)
+    def CreateText(self, indent, page_width, wrap_style=WRAP_FILL):
+        result = []
+        for i_head, i_parts, i_closing_prefix, i_comment in \
+                self._WrapStatements(indent, page_width, wrap_style):
+            names = ''.join([i + j for i, j in i_parts])
+            if i_closing_prefix is None:
+                text = i_head + names
+            else:
+                text = i_head + ' (' + names + i_closing_prefix + ')'
+            result.append((text, i_comment))
+        return result
+
+    @Override(Symbol.CreateCode)
+    def CreateCode(self, indent, page_width, wrap_style=WRAP_FILL):
+        from lib2to3.fixer_util import Comma, Name
+        from lib2to3.pgen2 import token
+        from lib2to3.pygram import python_symbols
+        from lib2to3.pytree import Leaf, Node
+
+        def SplitComma(prefix):
+            """
+            Returns the comma (if any) and the remaining of a wrapped prefix.
+            """
+            if ',' in prefix:
+                return True, prefix[prefix.index(',') + 1:]
+            return False, prefix
+
+        result = []
+        for _i_head, i_parts, i_closing_prefix, i_comment in \
+                self._WrapStatements(indent, page_width, wrap_style):
+            # Groups the parts by imported name: a name starts with the first part or with a comma,
+            # the other parts are the "as" and the alias.
+            names = []
+            for j_prefix, j_value in i_parts:
+                comma, j_prefix = SplitComma(j_prefix)
+                if comma:
+                    names.append(Comma())
+                if comma or not names:
+                    token_type = token.STAR if j_value == '*' else token.NAME
+                    names.append([Leaf(token_type, j_value, prefix=j_prefix)])
+                else:
+                    names[-1].append(Name(j_value, prefix=j_prefix))
+            if i_closing_prefix is not None:
+                comma, i_closing_prefix = SplitComma(i_closing_prefix)
+                if comma:
+                    names.append(Comma())
+
+            names = [
+                j_name if not isinstance(j_name, list)
+                else j_name[0] if len(j_name) == 1
+                else Node(python_symbols.import_as_name, j_name)
+                for j_name in names
+            ]
+            if len(names) > 1:
+                names = [Node(python_symbols.import_as_names, names)]
+            if i_closing_prefix is not None:
+                names = [Leaf(token.LPAR, '(', prefix=' ')] + names + \
+                    [Leaf(token.RPAR, ')', prefix=i_closing_prefix)]
+
+            children = [Name('from', prefix=' ' * indent)]
+            children += _CreateDottedNodes(self.name, prefix=' ')
+            children.append(Name('import', prefix=' '))
+            children += names
+            result.append(
+                _CreateStatementNode(python_symbols.import_from, children, i_comment))
+        return result
 
 #=========================================================================
 # ClassScope
@@ -490,6 +729,8 @@ class ClassScope(Scope):
     Represents a class symbol declaration, which also declares a scope.
     """
 
+    __slots__ = ()
+
     PREFIX = 'class'
 
 
@@ -501,6 +742,8 @@ class FunctionScope(Scope):
     Represents a function symbol declaration, which also declares a scope.
     """
 
+    __slots__ = ()
+
     PREFIX = 'def'
 
 
@@ -512,6 +755,8 @@ class ModuleScope(Scope):
     Represents a module declaration, which also declares a scope.
     """
 
+    __slots__ = ()
+
     PREFIX = 'module'
 
 
@@ -524,6 +769,8 @@ class ImportBlock(Scope):
     reorganizing and refactoring algorithms.
     """
 
+    __slots__ = ('id',)
+
     PREFIX = 'IMPORT-BLOCK'
 
     PYTHON_EXT = '.py'
@@ -543,7 +790,11 @@ class ImportBlock(Scope):
             * Suffix the old symbol name with '$' if you want it in the end of the symbol.
             * Prefix the new value with "from " to force "import-from" syntax even if the symbol
               was originally imported as an "import-name".
+
+        :return list(tuple(ImportSymbol,ImportSymbol)):
+            The replaced import-symbols, as (old, new) pairs.
         """
+        result = []
         for i_import_symbol in [i for i in self._WalkImportSymbols()]:
             new_name = refactor.get(i_import_symbol.name)
             if new_name is None:
@@ -561,7 +812,7 @@ class ImportBlock(Scope):
                 else:
                     kind = i_import_symbol.kind
 
-                self.ObtainImportSymbol(
+                new_symbol = self.ObtainImportSymbol(
                     new_name,
                     import_as=i_import_symbol.import_as,
                     comment=i_import_symbol.comment,
@@ -569,6 +820,8 @@ class ImportBlock(Scope):
                     lineno=i_import_symbol.lineno,
                 )
                 i_import_symbol.RemoveFromParent()
+                result.append((i_import_symbol, new_symbol))
+        return result
 
     def FixLocalSymbols(self, filename):
         """
@@ -602,7 +855,8 @@ class ImportBlock(Scope):
                 ]
 
         :param str filename:
-        :return:
+        :return list(tuple(ImportSymbol,ImportSymbol)):
+            The replaced import-symbols, as (old, new) pairs.
         """
 
         def LocalImportRename(import_symbol, filename):
@@ -665,11 +919,12 @@ class ImportBlock(Scope):
 
             return result.name
 
+        result = []
         for i_import_symbol in [i for i in self._WalkImportSymbols()]:
             new_name = LocalImportRename(i_import_symbol, filename)
 
             if new_name:
-                self.ObtainImportSymbol(
+                new_symbol = self.ObtainImportSymbol(
                     new_name,
                     import_as=i_import_symbol.import_as,
                     comment=i_import_symbol.comment,
@@ -677,6 +932,8 @@ class ImportBlock(Scope):
                     lineno=i_import_symbol.lineno,
                 )
                 i_import_symbol.RemoveFromParent()
+                result.append((i_import_symbol, new_symbol))
+        return result
 
     def _WalkImportSymbols(self):
         """
@@ -694,57 +951,140 @@ class ImportBlock(Scope):
             else:
                 raise TypeError()
 
-    def Reorganize(self, page_width=100, refactor={}, filename=None):
+    def CanRemoveImports(self):
+        """
+        Returns whether import-statements can be removed from this import-block without breaking
+        the code.
+
+        Only module level blocks qualify: removing the only import-statement of a suite (Ex.: an
+        "if" or "try" body) or one followed by a ";" would produce invalid code.
+
+        :return bool:
+        """
+        from lib2to3.pgen2 import token
+
+        if not isinstance(self.parent, ModuleScope) or self.column != 0:
+            return False
+        if self.code_replace:
+            next_node = self.code_replace[-1].next_sibling
+            if next_node is not None and next_node.type == token.SEMI:
+                return False
+        return True
+
+    def RemoveImports(self, symbols):
+        """
+        Removes the given import-symbols from this import-block.
+
+        :param list(ImportSymbol) symbols:
+            The import-symbols to remove. Symbols from other import-blocks are ignored.
+
+        :return list(tuple(ImportSymbol,None)):
+            The removed import-symbols as (old, None) pairs.
+        """
+        remove = set(id(i) for i in symbols)
+        result = []
+        for i_import_symbol in list(self._WalkImportSymbols()):
+            if id(i_import_symbol) not in remove:
+                continue
+            scope = i_import_symbol.parent
+            i_import_symbol.RemoveFromParent()
+            if isinstance(scope, ImportFromScope) and not scope._children:
+                scope.RemoveFromParent()
+            result.append((i_import_symbol, None))
+        return result
+
+    def Reorganize(
+            self, page_width=100, refactor={}, filename=None, wrap_style=WRAP_FILL, remove=()):
         """
         Reorganize the import-statements replacing the previous code by brand new import-statements.
 
         :param int page_width:
         :param dict refactor:
         :param str filename:
-        :return:
+        :param unicode wrap_style:
+        :param list(ImportSymbol) remove:
+            Import-symbols to remove (Ex.: unused imports), only if this block allows it.
+            See CanRemoveImports.
+        :return list(tuple(ImportSymbol,ImportSymbol)):
+            The import-symbols replaced by the refactor and local-symbols fixes, as (old, new)
+            pairs. Removed import-symbols are returned as (old, None).
         """
+        from lib2to3.pgen2 import token
+
+        result = []
+        if remove and self.CanRemoveImports():
+            result += self.RemoveImports(remove)
+
+        if self.code_replace:
+            code_replace = self._GetStatementNodes(self.code_replace)
+            if self.code is self.code_replace[0]:
+                self.code = code_replace[0]
+            self.code_replace = code_replace
+
         if self._children:
 
             if refactor:
-                self.Refactor(refactor)
+                result += self.Refactor(refactor)
             if filename:
-                self.FixLocalSymbols(filename)
+                result += self.FixLocalSymbols(filename)
 
             symbol_imports = self._children
 
-            # Create new nodes with all the import-statements.
+            # Create the code with all the import-statements.
             nodes = self.CreateCode(
                 symbol_imports,
                 self.column,
                 page_width=page_width,
                 filename=filename,
+                wrap_style=wrap_style,
             )
+            assert len(nodes) > 0
 
             # Some extra fixes on new created nodes.
+            semicolon = False
             if self.code_replace:
-                assert len(nodes) > 0
-                assert len(self.code_replace) > 0
-
                 # Copies the prefix from the replaced code.
                 nodes[0].prefix = self.code_replace[0].prefix
 
-                # Remove EOL from new nodes under certain conditions:
+                # Keeps the last statement as a small statement, without EOL (and inline comment),
+                # when the replaced code is followed by ";".
                 next_node = self.code_replace[-1].next_sibling
-                if next_node and next_node.value == ';':
-                    del nodes[-1].children[-1]
-
-            # Insert new nodes before the marked position.
-            self._InsertCodeBeforeNode(self.code, nodes)
-
-            # Delete the code this code block replaces.
-            for i_node in self.code_replace:
-                i_node.remove()
+                if next_node is not None and next_node.type == token.SEMI:
+                    semicolon = True
+                    nodes[-1] = nodes[-1].children[0]
+                    nodes[-1].remove()
+
+            # Replaces the code this code block replaces by the new code, or inserts it before the
+            # marked position.
+            if semicolon:
+                # The last statement goes in the place of the last replaced node (before the ";") and
+                # the others before the statement containing it.
+                last = self.code_replace[-1]
+                position = last.parent if self.code_replace[0] is self.code else self.code
+                self._SpliceNodes(
+                    [(position, nodes[:-1]), (last, nodes[-1:])],
+                    self.code_replace,
+                )
+            elif self.code_replace and self.code_replace[0] is self.code:
+                self._ReplaceNodes(self.code_replace, nodes)
+            else:
+                self._InsertCodeBeforeNode(self.code, nodes)
+                self._ReplaceNodes(self.code_replace)
 
             self.code = nodes[0]
             self.code_replace = nodes
         else:
-            for i_node in self.code_replace:
-                i_node.remove()
+            if self.code_replace:
+                # Keeps the comments and line-ends preceding the removed import-statements.
+                node = self.code_replace[-1]
+                while node.next_sibling is None and node.parent is not None:
+                    node = node.parent
+                next_node = node.next_sibling
+                if next_node is not None:
+                    next_node.prefix = self.code_replace[0].prefix + next_node.prefix
+            self._ReplaceNodes(self.code_replace)
+            self.code_replace = []
+        return result
 
     def ObtainImportFromScope(self, name):
         """
@@ -786,87 +1126,60 @@ class ImportBlock(Scope):
             result = parent._children[index]
         return result
 
-    def CreateCode(self, symbols, indent, page_width, filename=None):
+    @classmethod
+    def _GetStatementNodes(cls, nodes):
+        """
+        Returns the given nodes replacing the ones that make a whole statement (all the children
+        of a simple_stmt) by the statement node, so they are replaced as a whole.
+
+        :param list(lib2to3.Node) nodes:
+        :return list(lib2to3.Node):
         """
-        Create lib2to3 nodes from the internal information.
+        from lib2to3.pygram import python_symbols
+
+        node_ids = set(id(i) for i in nodes)
+        result = []
+        for i_node in nodes:
+            parent = i_node.parent
+            if parent is not None and parent.type == python_symbols.simple_stmt and \
+                    all(id(j) in node_ids for j in parent.children):
+                if not result or result[-1] is not parent:
+                    result.append(parent)
+            else:
+                result.append(i_node)
+        return result
+
+    def CreateText(self, symbols, indent, page_width, filename=None, wrap_style=WRAP_FILL):
+        """
+        Create the import-statements text from the internal information.
 
         :param int page_width:
             The algorithm tries to respect this page-width for all statements.
 
         :param str filename:
             The name of the module we're working on.
-            This is necessary for the local-imports algorithm.
+
+        :param unicode wrap_style:
+            How to wrap statements that don't fit in the page-width. One of _wrap.WRAP_STYLES.
+
+        :return list(tuple(unicode,unicode)):
+            A list of (statement, comment) pairs. See Symbol.CreateText.
         """
         result = []
         for i_symbol in sorted(symbols):
-            result += i_symbol.CreateCode(indent, page_width)
+            result += i_symbol.CreateText(indent, page_width, wrap_style)
         return result
 
-    @classmethod
-    def _WalkLeafs(cls, node):
-        from lib2to3.pytree import Leaf
-
-        if isinstance(node, Leaf):
-            yield node
-        else:
-            for i_child in node.children:
-                for j_leaf in cls._WalkLeafs(i_child):
-                    yield j_leaf
-
-    @classmethod
-    def TextWrapForNode(cls, node, max_width, indent, start_at='(', end_at=')'):
+    def CreateCode(self, symbols, indent, page_width, filename=None, wrap_style=WRAP_FILL):
         """
-        Wrap the given node so it fits in max-width.
-
-        Changes the nodes in-place.
+        Create the import-statements code from the internal information.
 
-        :param lib2to3.pytree.Node:
-            Return a simple_stmt parser-node with the import statement code..Node node:
+        See CreateText for the parameters.
 
-        :param int max_width:
-            The number of columns to wrap the text.
-
-        :param int indent:
-            The text indentation in number of characters, not in number of "tabs".
-
-        :param str start_at:
-            The value of the node to enable the wrapping.
-            Some lines should no be broken until a given symbol such as open parenthesis.
-
-        :param str end_at:
-            The value of the node to disable the wrapping.
-        """
-        started = False
-        cumulative_len = 0
-        symbols_count = 0
-        for i_leaf in cls._WalkLeafs(node):
-            # TODO: BEN-28: [terraformer] Consider the EOL prefix in the
-            # cumulative_len, since it can contain comments
-            if i_leaf.value == '\n':
-                break
-
-            if not started:
-                leaf_len = len(str(i_leaf))
-                cumulative_len += leaf_len
-                started = i_leaf.value == start_at
-            elif i_leaf.value == end_at:
-                break
-            else:
-                symbols_count += 1
-
-                if i_leaf.prefix not in (', ', ',\n', '\n', ' ', ''):
-                    raise NotImplementedError(
-                        'Unexpected token prefix "%s"' % i_leaf.prefix)
-
-                leaf_len = len(str(i_leaf))
-                cumulative_len += leaf_len
-
-                if cumulative_len >= max_width:
-                    if ',' in i_leaf.prefix:
-                        i_leaf.prefix = ','
-                    else:
-                        i_leaf.prefix = ''
-                    indentation = ' ' * (4 + indent)
-                    i_leaf.prefix += '\n' + indentation
-                    leaf_len = len(indentation) + len(str(i_leaf.value))
-                    cumulative_len = leaf_len
+        :return list(lib2to3.Node):
+            A simple_stmt node for each import-statement. See Symbol.CreateCode.
+        """
+        result = []
+        for i_symbol in sorted(symbols):
+            result += i_symbol.CreateCode(indent, page_width, wrap_style)
+        return result
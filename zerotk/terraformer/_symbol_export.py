@@ -0,0 +1,197 @@
+"""
+Machine-readable export of the symbols of python modules.
+
+Two formats are available:
+
+* ndjson: One JSON object per line for each symbol:
+    {"column": 0, "file": "alpha.py", "import_as": null, "kind": "IMPORT", "lineno": 1,
+     "name": "bravo", "scope": ""}
+
+  Files that can't be parsed produce a single line with the "file" and "error" keys.
+
+* binary: A compact format with one block per file, read by LoadBinary. All integers are
+  unsigned little-endian, strings are UTF-8 prefixed by their length (uint32).
+
+    block := filename error string_count strings* symbol_count symbols*
+    symbol := kind(uint8) scope(uint32) name(uint32) import_as(uint32) lineno(uint32) column(uint32)
+
+  The scope, name and import_as are indexes on the block strings. import_as is NO_STRING when
+  the symbol has no alias.
+"""
+from __future__ import unicode_literals
+
+import struct
+
+import six
+
+
+FORMAT_NDJSON = 'ndjson'
+FORMAT_BINARY = 'binary'
+
+FORMATS = (FORMAT_NDJSON, FORMAT_BINARY)
+
+# The symbol kinds (Symbol.PREFIX), indexed by their code in the binary format.
+KINDS = ('module', 'IMPORT-BLOCK', 'IMPORT-FROM', 'IMPORT', 'class', 'def', 'ARG', 'DEF', 'USE')
+
+NO_STRING = 0xFFFFFFFF
+
+_SYMBOL_STRUCT = struct.Struct(str('<BIIIII'))
+_UINT32_STRUCT = struct.Struct(str('<I'))
+
+
+def IterSymbolRecords(terra):
+    """
+    Iterates over the symbols of the given TerraFormer.
+
+    The scope is the dotted path of the classes and functions enclosing the symbol. Import-blocks
+    and import-from scopes are just containers and don't add to the path.
+
+    :param TerraFormer terra:
+    :return iter(tuple(unicode,unicode,unicode,unicode,int,int)):
+        The (scope, kind, name, import_as, lineno, column) for each symbol, in the symbols tree
+        order.
+    """
+    from ._symbol import ClassScope, FunctionScope, ImportSymbol
+
+    stack = [(terra.module, '')]
+    while stack:
+        symbol, scope = stack.pop()
+        import_as = symbol.import_as if isinstance(symbol, ImportSymbol) else None
+        yield scope, symbol.PREFIX, symbol.name, import_as, symbol.lineno, symbol.column
+
+        if isinstance(symbol, (ClassScope, FunctionScope)):
+            scope = scope + '.' + symbol.name if scope else symbol.name
+        stack += [(i, scope) for i in reversed(symbol._children)]
+
+
+def _ExtractRecords(filename):
+    """
+    :param unicode filename:
+    :return tuple(list,unicode):
+        The symbols records (see IterSymbolRecords) and the error message (None if no errors).
+    """
+    from ._terra_former import TerraFormer
+
+    try:
+        terra = TerraFormer(filename=filename)
+    except Exception as e:
+        return [], '%s: %s' % (e.__class__.__name__, e)
+    return list(IterSymbolRecords(terra)), None
+
+
+def DumpNdjson(filename):
+    """
+    Exports the symbols of the given python module in the NDJSON format.
+
+    This is a module level function so it can be used with multiprocessing.
+
+    :param unicode filename:
+    :return bytes:
+    """
+    import json
+
+    records, error = _ExtractRecords(filename)
+    if error is not None:
+        lines = [{'file': filename, 'error': error}]
+    else:
+        lines = [
+            {
+                'file': filename,
+                'scope': scope,
+                'kind': kind,
+                'name': name,
+                'import_as': import_as,
+                'lineno': lineno,
+                'column': column,
+            }
+            for scope, kind, name, import_as, lineno, column in records
+        ]
+    return ''.join([json.dumps(i, sort_keys=True) + '\n' for i in lines]).encode('UTF-8')
+
+
+def _PackString(value):
+    value = value.encode('UTF-8')
+    return _UINT32_STRUCT.pack(len(value)) + value
+
+
+def DumpBinary(filename):
+    """
+    Exports the symbols of the given python module in the binary format.
+
+    This is a module level function so it can be used with multiprocessing.
+
+    :param unicode filename:
+    :return bytes:
+    """
+    records, error = _ExtractRecords(filename)
+
+    strings = {}
+
+    def StringIndex(value):
+        if value is None:
+            return NO_STRING
+        return strings.setdefault(value, len(strings))
+
+    kinds = dict((j, i) for i, j in enumerate(KINDS))
+    symbols = [
+        _SYMBOL_STRUCT.pack(
+            kinds[kind],
+            StringIndex(scope),
+            StringIndex(name),
+            StringIndex(import_as),
+            lineno,
+            column,
+        )
+        for scope, kind, name, import_as, lineno, column in records
+    ]
+
+    result = [_PackString(filename), _PackString(error or '')]
+    result.append(_UINT32_STRUCT.pack(len(strings)))
+    result += [_PackString(i) for i in sorted(strings, key=strings.get)]
+    result.append(_UINT32_STRUCT.pack(len(symbols)))
+    result += symbols
+    return b''.join(result)
+
+
+def LoadBinary(stream):
+    """
+    Reads symbols exported with DumpBinary.
+
+    :param file stream:
+        A binary stream.
+
+    :return iter(dict):
+        The symbols as the objects of the NDJSON format.
+    """
+
+    def ReadUInt32():
+        data = stream.read(_UINT32_STRUCT.size)
+        if not data:
+            return None
+        return _UINT32_STRUCT.unpack(data)[0]
+
+    def ReadString():
+        return stream.read(ReadUInt32()).decode('UTF-8')
+
+    while True:
+        size = ReadUInt32()
+        if size is None:
+            break
+        filename = stream.read(size).decode('UTF-8')
+        error = ReadString()
+        strings = [ReadString() for _i in range(ReadUInt32())]
+        symbols_count = ReadUInt32()
+        if error:
+            yield {'file': filename, 'error': error}
+        for _i in range(symbols_count):
+            kind, scope, name, import_as, lineno, column = _SYMBOL_STRUCT.unpack(
+                stream.read(_SYMBOL_STRUCT.size))
+            yield {
+                'file': filename,
+                'scope': strings[scope],
+                'kind': KINDS[kind],
+                'name': strings[name],
+                'import_as': None if import_as == NO_STRING else strings[import_as],
+                'lineno': lineno,
+                'column': column,
+            }
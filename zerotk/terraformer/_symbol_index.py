@@ -0,0 +1,117 @@
+"""
+Line-interval index over symbols.
+"""
+from __future__ import unicode_literals
+
+
+def GetNodeLineSpan(node):
+    """
+    Returns the first and last lines of the given node, ignoring its prefix (comments and
+    line-ends before the node) and the trailing empty leafs (dedents and end-marker).
+
+    :param lib2to3.Node node:
+    :return tuple(int,int):
+    """
+    from lib2to3.pytree import Leaf
+
+    first = node
+    while not isinstance(first, Leaf):
+        first = first.children[0]
+
+    last = node
+    while not isinstance(last, Leaf):
+        children = last.children
+        i = len(children) - 1
+        while i > 0 and isinstance(children[i], Leaf) and not children[i].value:
+            i -= 1
+        last = children[i]
+
+    return first.lineno, last.lineno + last.value.rstrip('\r\n').count('\n')
+
+
+class SymbolIndex(object):
+    """
+    Index of symbols by their line spans, answering "which symbols are at line N" (or in a range
+    of lines) in logarithmic time.
+
+    The spans are sorted by their first line and stored as an implicit balanced binary tree: the
+    node of a range of the sorted arrays is the middle element, the left and right halves are its
+    sub-trees. Each node also stores the maximum last line of its sub-tree, so queries skip the
+    sub-trees ending before the queried lines.
+    """
+
+    def __init__(self, spans=()):
+        """
+        :param list(tuple(int,int,Symbol)) spans:
+            The (first line, last line, symbol) for each symbol.
+        """
+        spans = sorted(spans, key=lambda x: (x[0], -x[1]))
+        self._firsts = [i[0] for i in spans]
+        self._lasts = [i[1] for i in spans]
+        self._symbols = [i[2] for i in spans]
+        self._max_lasts = list(self._lasts)
+        self._ComputeMaxLasts(0, len(spans))
+
+    def __len__(self):
+        return len(self._symbols)
+
+    def _ComputeMaxLasts(self, start, stop):
+        """
+        Computes the maximum last line of the sub-tree over the given range.
+
+        The recursion depth is logarithmic.
+
+        :param int start:
+        :param int stop:
+        :return int:
+        """
+        if start >= stop:
+            return 0
+        middle = (start + stop) // 2
+        result = max(
+            self._lasts[middle],
+            self._ComputeMaxLasts(start, middle),
+            self._ComputeMaxLasts(middle + 1, stop),
+        )
+        self._max_lasts[middle] = result
+        return result
+
+    def GetSymbolsInRange(self, first, last):
+        """
+        Returns the symbols whose spans intersect the given range of lines.
+
+        :param int first:
+        :param int last:
+        :return list(Symbol):
+            The symbols sorted by their first line, outer symbols first.
+        """
+        result = []
+        stack = [(0, len(self._symbols))]
+        while stack:
+            start, stop = stack.pop()
+            if start >= stop:
+                continue
+            middle = (start + stop) // 2
+            if self._max_lasts[middle] < first:
+                continue
+            stack.append((start, middle))
+            if self._firsts[middle] <= last:
+                if self._lasts[middle] >= first:
+                    result.append(middle)
+                stack.append((middle + 1, stop))
+        return [self._symbols[i] for i in sorted(result)]
+
+    def GetSymbolsAt(self, lineno, symbol_class=None):
+        """
+        Returns the symbols spanning the given line.
+
+        :param int lineno:
+        :param type symbol_class:
+            If given, returns only instances of this class. Ex.: ImportBlock
+        :return list(Symbol):
+            The symbols sorted by their first line, outer symbols first.
+        """
+        result = self.GetSymbolsInRange(lineno, lineno)
+        if symbol_class is not None:
+            result = [i for i in result if isinstance(i, symbol_class)]
+        return result
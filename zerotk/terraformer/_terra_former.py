@@ -1,10 +1,14 @@
 from __future__ import unicode_literals
 
+import os
+
 import six
 from zerotk.memoize import Memoize
 
 from zerotk.easyfs import GetFileContents
-from zerotk.module_finder import ModuleFinder
+from zerotk.module_finder import GetModuleNameResolver
+
+from ._wrap import WRAP_FILL
 
 
 class FileTooBigError(RuntimeError):
@@ -18,6 +22,22 @@ class FileTooBigError(RuntimeError):
         RuntimeError.__init__(self, 'File %s too big: %d' % (filename, size))
 
 
+def _GetFactoryStamp(cls, filename, source=None):
+    """
+    Validator for the TerraFormer.Factory cache: the instances created from a file are reused
+    only while the file modification time and size don't change.
+
+    :return tuple|None:
+    """
+    if source is not None:
+        return None  # The source is part of the cache key.
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return stat.st_mtime, stat.st_size
+
+
 class TerraFormer(object):
     """
     Python code refactoring class.
@@ -34,6 +54,10 @@ class TerraFormer(object):
 
     MAX_FILE_SIZE = 500000
 
+    # Memory budget of the Factory cache, per process. lib2to3 trees are large: a 200KB module
+    # takes around 50MB.
+    FACTORY_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
     def __init__(self, source=None, filename=None):
         if source is None:
             # Stores the original loaded sources into __source.
@@ -54,12 +78,22 @@ class TerraFormer(object):
         self.names = set()
         self.import_blocks = []
 
+        # Indexes over self.symbols: token/name -> list of import-symbols.
+        # Kept up-to-date by _AddSymbol/_RemoveSymbol.
+        self._symbols_by_token = {}
+        self._symbols_by_name = {}
+
         self.code = self._Parse(self.__original_source)
 
         from ._visitor import ASTVisitor
         visitor = ASTVisitor()
         visitor.Visit(self.code)
-        self.module, self.symbols, self.import_blocks = visitor._module, visitor.symbols, visitor.import_blocks
+        self.module, self.import_blocks = visitor._module, visitor.import_blocks
+        # The symbol-index is built on the first query (see _GetSymbolIndex).
+        self._symbol_spans = visitor.symbol_spans
+        self._symbol_index = None
+        for i_symbol in visitor.symbols:
+            self._AddSymbol(i_symbol)
 
     def GenerateSource(self):
         """
@@ -70,11 +104,17 @@ class TerraFormer(object):
         return six.text_type(self.code)
 
     @classmethod
-    @Memoize(maxsize=1000)
+    @Memoize(max_bytes=FACTORY_CACHE_MAX_BYTES, validator=_GetFactoryStamp, thread_safe=True)
     def Factory(cls, filename, source=None):
         """
         Creates a TerraFormer instance using a cache to speed up.
 
+        Instances created from files are discarded when the file changes on disk (including when
+        saved by TerraFormer.Save).
+
+        The cache is bounded by the estimated memory of the cached instances (see
+        FACTORY_CACHE_MAX_BYTES). Use TerraFormer.Factory.GetCacheSize() for the current usage.
+
         :param str filename: Python module filename.
 
         :param str source: Optinal python module sources.
@@ -172,6 +212,57 @@ class TerraFormer(object):
                 for j_leaf in cls.WalkLeafs(i_child):
                     yield j_leaf
 
+    def _AddSymbol(self, symbol):
+        """
+        Adds the given import-symbol to self.symbols, updating the lookup indexes.
+
+        self.symbols compares import-symbols by name, so an import-symbol equal to one already
+        added (Eg.: the same import in another import-block) is not added.
+
+        :param ImportSymbol symbol:
+        """
+        if symbol in self.symbols:
+            return
+        self.symbols.add(symbol)
+        self._symbol_index = None
+        self._symbols_by_token.setdefault(symbol.GetToken(), []).append(symbol)
+        self._symbols_by_name.setdefault(symbol.name, []).append(symbol)
+
+    def _RemoveSymbol(self, symbol):
+        """
+        Removes the given import-symbol from self.symbols, updating the lookup indexes.
+
+        Only removes the given instance: an equal import-symbol (from another import-block) that
+        is the one in self.symbols is kept.
+
+        :param ImportSymbol symbol:
+        """
+        if not any(i is symbol for i in self._symbols_by_name.get(symbol.name, ())):
+            return
+        self.symbols.discard(symbol)
+        self._symbol_index = None
+        for i_index, i_key in (
+                (self._symbols_by_token, symbol.GetToken()),
+                (self._symbols_by_name, symbol.name)):
+            symbols = i_index.get(i_key, [])
+            symbols[:] = [i for i in symbols if i is not symbol]
+            if not symbols:
+                i_index.pop(i_key, None)
+
+    def _ReplaceSymbols(self, replacements):
+        """
+        Updates self.symbols (and indexes) with the replacements made by the import-blocks.
+
+        :param list(tuple(ImportSymbol,ImportSymbol)) replacements:
+            List of (old, new) import-symbols.
+        """
+        for i_old, i_new in replacements:
+            if i_old is i_new:
+                continue
+            self._RemoveSymbol(i_old)
+            if i_new is not None:
+                self._AddSymbol(i_new)
+
     def GetSymbolFromToken(self, token):
         """
         Returns the symbol instance for the given token.
@@ -179,8 +270,100 @@ class TerraFormer(object):
         :param unicode token:
         :return Symbol:
         """
-        tokens = {i.GetToken(): i for i in self.symbols}
-        return tokens.get(token)
+        symbols = self._symbols_by_token.get(token)
+        if symbols:
+            return symbols[-1]
+        return None
+
+    def GetSymbolsFromTokens(self, tokens):
+        """
+        Returns the symbol instances for the given tokens.
+
+        :param list(unicode) tokens:
+        :return dict(unicode,Symbol):
+            Maps each token to its symbol instance (None if the token is not found).
+        """
+        return {i: self.GetSymbolFromToken(i) for i in tokens}
+
+    def GetSymbolFromName(self, name):
+        """
+        Returns the symbol instance for the given (full) import-symbol name.
+
+        :param unicode name:
+            Ex.: alpha.bravo.Charlie
+        :return Symbol:
+        """
+        symbols = self._symbols_by_name.get(name)
+        if symbols:
+            return symbols[-1]
+        return None
+
+    def GetSymbolsFromNames(self, names):
+        """
+        Returns the symbol instances for the given (full) import-symbol names.
+
+        :param list(unicode) names:
+        :return dict(unicode,Symbol):
+            Maps each name to its symbol instance (None if the name is not found).
+        """
+        return {i: self.GetSymbolFromName(i) for i in names}
+
+    def GetSymbolsAt(self, lineno, symbol_class=None):
+        """
+        Returns the symbols spanning the given line.
+
+        The lines refer to the source as parsed, changes made by ReorganizeImports, for instance,
+        are not reflected. Import-symbols replaced (Eg.: by ReorganizeImports refactor) are listed
+        in the line of the original ones.
+
+        :param int lineno:
+        :param type symbol_class:
+            If given, returns only instances of this class. Ex.: ImportBlock
+        :return list(Symbol):
+            The symbols sorted by their first line, outer symbols first.
+        """
+        return self._GetSymbolIndex().GetSymbolsAt(lineno, symbol_class)
+
+    def GetSymbolsInRange(self, first, last):
+        """
+        Returns the symbols whose lines intersect the given range of lines.
+
+        See GetSymbolsAt.
+
+        :param int first:
+        :param int last:
+        :return list(Symbol):
+        """
+        return self._GetSymbolIndex().GetSymbolsInRange(first, last)
+
+    def _GetSymbolIndex(self):
+        """
+        Returns the symbol-index, building it if needed.
+
+        The index is built on the first query, and again after the import-symbols change (see
+        _AddSymbol and _RemoveSymbol): import-symbols removed from the module are left out and
+        the ones added use their lineno.
+
+        :return SymbolIndex:
+        """
+        from ._symbol import ImportSymbol
+        from ._symbol_index import SymbolIndex
+
+        if self._symbol_index is None:
+            spans = []
+            indexed = set()
+            for i_span in self._symbol_spans:
+                symbol = i_span[2]
+                if isinstance(symbol, ImportSymbol):
+                    if symbol.parent is None:
+                        continue
+                    indexed.add(id(symbol))
+                spans.append(i_span)
+            for i_symbol in self.symbols:
+                if id(i_symbol) not in indexed:
+                    spans.append((i_symbol.lineno, i_symbol.lineno, i_symbol))
+            self._symbol_index = SymbolIndex(spans)
+        return self._symbol_index
 
     def GetModuleName(self):
         """
@@ -194,16 +377,77 @@ class TerraFormer(object):
             The module name in the format:
                 xxx.yyy.zzz
         """
-        module_finder = ModuleFinder()
         try:
-            return module_finder.ModuleName(self.filename).rsplit('.', 1)[0]
+            return GetModuleNameResolver().ModuleName(self.filename).rsplit('.', 1)[0]
         except RuntimeError:
             return None
 
+    def GetUsedNames(self):
+        """
+        Returns the names used by the module code, in a single walk over the tree.
+
+        This is a conservative approximation: every name found outside import-statements counts,
+        no matter the scope, except for attribute names (the "bravo" in "alpha.bravo"). Strings
+        containing a single identifier also count, to handle __all__ and getattr uses.
+
+        :return set(unicode):
+        """
+        from lib2to3.pygram import python_symbols as syms
+        from lib2to3.pgen2 import token
+
+        skip_types = (syms.import_name, syms.import_from)
+        result = set()
+        nodes = [self.code]
+        while nodes:
+            node = nodes.pop()
+            if node.type == token.NAME:
+                previous = node.prev_sibling
+                if previous is not None and previous.type == token.DOT:
+                    continue  # Attribute name: alpha.bravo
+                result.add(node.value)
+            elif node.type == token.STRING:
+                value = node.value.lstrip('uUbBrR').strip('\'"')
+                if value.replace('_', 'a').isalnum():
+                    result.add(value)
+            elif node.type not in skip_types:
+                nodes.extend(node.children)
+        return result
+
+    def GetUnusedImports(self, used_names=None):
+        """
+        Returns the import-symbols not used by the module code.
+
+        Never reports __future__ imports, star imports, imports marked with "@UnusedImport" or
+        "noqa" comments or any import of package modules (__init__), since these usually exist to
+        export the symbols.
+
+        :param set(unicode) used_names:
+            The names used by the module code. Uses GetUsedNames if None.
+
+        :return list(ImportSymbol):
+            The unused import-symbols, sorted by line number.
+        """
+        if self.filename and os.path.basename(self.filename) == '__init__.py':
+            return []
+        if used_names is None:
+            used_names = self.GetUsedNames()
+
+        result = []
+        for i_symbol in self.symbols:
+            if i_symbol.name.startswith('__future__.') or i_symbol.name.endswith('*'):
+                continue
+            if '@UnusedImport' in i_symbol.comment or 'noqa' in i_symbol.comment:
+                continue
+            if i_symbol.GetBoundName() not in used_names:
+                result.append(i_symbol)
+        return sorted(result, key=lambda x: (x.lineno, x.name))
+
     def ReorganizeImports(
         self,
         refactor={},
-        page_width=100
+        page_width=100,
+        wrap_style=WRAP_FILL,
+        remove_unused=False,
     ):
         """
         Reorganizes all imports-blocks.
@@ -214,13 +458,48 @@ class TerraFormer(object):
         :param int page_width:
             The page-width to format the import statements.
 
+        :param unicode wrap_style:
+            How to wrap import statements that don't fit in the page-width. One of
+            _wrap.WRAP_STYLES: 'fill', 'hanging' or 'grid'.
+
+        :param bool remove_unused:
+            Removes the unused import-symbols (see GetUnusedImports) from the module level
+            import-blocks.
+
         :return boolean:
             Returns True if any changes were made.
         """
+        remove = self.GetUnusedImports() if remove_unused else ()
         for i_import_block in self.import_blocks:
-            i_import_block.Reorganize(page_width, refactor, self.filename)
+            replacements = i_import_block.Reorganize(
+                page_width, refactor, self.filename, wrap_style, remove)
+            self._ReplaceSymbols(replacements)
         return self.__original_source != self.GenerateSource()
 
+    def RenameSymbolUsages(self, renames):
+        """
+        Renames the usages of the given symbols in the whole module.
+
+        All renames are applied at once (see SymbolUsage.RenameMany), so renaming many usages takes
+        linear time.
+
+        :param dict(unicode,unicode) renames:
+            Maps the current symbol names to the new ones.
+            Ex.: {'cStringIO.StringIO': 'StringIO'}
+
+        :return int:
+            The number of renamed usages.
+        """
+        from ._symbol import SymbolUsage
+
+        usages = [
+            (i_symbol, renames[i_symbol.name])
+            for i_symbol in self.module.Walk()
+            if i_symbol.PREFIX == SymbolUsage.PREFIX and i_symbol.name in renames
+        ]
+        SymbolUsage.RenameMany(usages)
+        return len(usages)
+
     def Save(self):
         """
         Saves the filename applying the changes made by previous method calls.
@@ -258,4 +537,4 @@ class TerraFormer(object):
         symbol = import_block.ObtainImportSymbol(
             import_symbol, kind=ImportSymbol.KIND_IMPORT_FROM)
         if symbol:
-            self.symbols.add(symbol)
+            self._AddSymbol(symbol)
@@ -58,6 +58,10 @@ class ASTVisitor(object):
         self.symbols = set()
         self.__assignment = False
 
+        # The (symbol, node) to index by the node line span. See EvVisitEnd.
+        self._symbol_nodes = []
+        self.symbol_spans = []
+
 
     def _RegisterPattern(self, method, pattern):
         """
@@ -109,6 +113,7 @@ class ASTVisitor(object):
         # Module scope.
         self._module = ModuleScope(None, 'module', tree)
         self._scope_stack.append(self._module)
+        self._symbol_nodes.append((self._module, tree))
 
 
     def _CreateImportBlock(self, parent, code_position, code_replace, lineno, indent=0):
@@ -152,8 +157,34 @@ class ASTVisitor(object):
         """
         Event associated with the end of the AST visiting.
 
+        Computes the symbol_spans and shares the strings of the symbols names.
+
+        The spans are computed now, while the nodes are as parsed, but the symbol-index itself is
+        only built when queried (see TerraFormer._GetSymbolIndex).
+
         :param lib2to3.Node tree:
         """
+        from ._symbol import InternNames
+        from ._symbol_index import GetNodeLineSpan
+
+        InternNames(self._module)
+
+        # Import-blocks first: they come before their import-symbols when spanning the same lines.
+        spans = []
+        for i_import_block in self.import_blocks:
+            nodes = i_import_block.code_replace
+            if nodes:
+                first = GetNodeLineSpan(nodes[0])[0]
+                last = max(GetNodeLineSpan(i)[1] for i in nodes)
+                spans.append((first, last, i_import_block))
+            else:
+                spans.append((i_import_block.lineno, i_import_block.lineno, i_import_block))
+
+        for i_symbol, i_node in self._symbol_nodes:
+            first, last = GetNodeLineSpan(i_node)
+            spans.append((first, last, i_symbol))
+
+        self.symbol_spans = spans
 
 
     def EvVisitLeaf(self, leaf):
@@ -172,7 +203,9 @@ class ASTVisitor(object):
             if code_position.type == token.STRING:
                 return
 
-            if code_position.type == token.NEWLINE and not code_position.prefix:
+            # The EOL (and inline comment) of the previous statement, as in a docstring followed by
+            # a comment.
+            if code_position.type == token.NEWLINE:
                 return
 
             lineno = self._GetImportBlockLineNumber(code_position)
@@ -209,9 +242,9 @@ class ASTVisitor(object):
         symbol = body.value
 
         if self._assignment == 1:  # Assignee
-            current_scope.AddSymbolDefinition(symbol, body)
+            self._symbol_nodes.append((current_scope.AddSymbolDefinition(symbol, body), body))
         if self._assignment == 2:  # Value
-            current_scope.AddSymbolUsage(symbol, body)
+            self._symbol_nodes.append((current_scope.AddSymbolUsage(symbol, body), body))
 
 
     def EvVisitImport(self, names, import_from, body):
@@ -257,6 +290,7 @@ class ASTVisitor(object):
         symbols = self._CreateImportSymbols(names, import_from, inline_comment, lineno)
 
         self.symbols.update(set(symbols))
+        self._symbol_nodes += [(i, body) for i in symbols]
 
 
     def _CreateImportSymbols(self, names, import_from, inline_comment, lineno):
@@ -303,9 +337,10 @@ class ASTVisitor(object):
         """
         current_scope = self._scope_stack[-1]
         if self._assignment == 1:  # Assignee
-            current_scope.AddSymbolDefinition(symbol, body)
+            result = current_scope.AddSymbolDefinition(symbol, body)
         else:
-            current_scope.AddSymbolUsage(symbol, body, code_replace=nodes)
+            result = current_scope.AddSymbolUsage(symbol, body, code_replace=nodes)
+        self._symbol_nodes.append((result, body))
 
 
     def EvVisitAssignment(self, name, value, body):
@@ -352,12 +387,13 @@ class ASTVisitor(object):
 
         # Add this class bases uses
         for i_base in bases:
-            parent.AddSymbolUsage(i_base, body)
+            self._symbol_nodes.append((parent.AddSymbolUsage(i_base, body), self._GetFirstLeaf(body)))
 
         # NOTE: nodes should point to the class name node (for renaming), not the entire code.
         scope = ClassScope(parent, name, None)
         if parent.nested or isinstance(parent, FunctionScope):
             scope.nested = 1
+        self._symbol_nodes.append((scope, body))
 
         self._klass_stack.append(scope)
         self._scope_stack.append(scope)
@@ -382,8 +418,10 @@ class ASTVisitor(object):
         scope = FunctionScope(parent, name, body)  # NOTE: We should have the function name as body.
         if parent.nested or isinstance(parent, FunctionScope):
             scope.nested = 1
+        self._symbol_nodes.append((scope, body))
 
         scope.HandleArgs(args, body)
+        self._symbol_nodes += [(i, i.code) for i in scope._children]
 
         self._scope_stack.append(scope)
         self._Visit(body.children)
@@ -0,0 +1,133 @@
+"""
+Wrapping engine for the names of import-from statements.
+"""
+from __future__ import unicode_literals
+
+
+# Wrap styles:
+#
+# fill: Fills the lines with as many names as possible, breaking with a hanging indent.
+#     from alpha import (bravo, charlie,
+#         delta)
+#
+# hanging: One name per line, hanging indent.
+#     from alpha import (
+#         bravo,
+#         charlie,
+#         delta,
+#     )
+#
+# grid: Fills the lines with as many names as possible, aligned with the first name.
+#     from alpha import (bravo, charlie,
+#                        delta)
+WRAP_FILL = 'fill'
+WRAP_HANGING = 'hanging'
+WRAP_GRID = 'grid'
+
+WRAP_STYLES = (WRAP_FILL, WRAP_HANGING, WRAP_GRID)
+
+
+def WrapPrefixes(parts, max_width, indent, column, style=WRAP_FILL):
+    """
+    Computes the prefixes for the given parts so they fit in max-width.
+
+    Works in a single pass over the parts widths. A part starts a new name when it is the first
+    one or its prefix contains a comma; the other parts (Ex.: "as" and alias) continue the
+    current name.
+
+    :param list(tuple(unicode,unicode)) parts:
+        The (prefix, value) parts to wrap. Ex.: [('', 'alpha'), (', ', 'bravo')]
+
+    :param int max_width:
+        The number of columns to wrap the text.
+
+    :param int indent:
+        The text indentation in number of characters, not in number of "tabs".
+
+    :param int column:
+        The column where the first part starts (after the open parenthesis).
+
+    :param unicode style:
+        One of WRAP_STYLES.
+
+    :return tuple(list(unicode),unicode):
+        The new prefixes for each part and the new prefix for the closing parenthesis.
+    """
+    if style not in WRAP_STYLES:
+        raise ValueError('Unknown wrap style: %r' % (style,))
+
+    if style == WRAP_GRID:
+        continuation = '\n' + ' ' * column
+    else:
+        continuation = '\n' + ' ' * (4 + indent)
+    continuation_len = len(continuation) - 1
+
+    widths = [len(i_value) for _i_prefix, i_value in parts]
+
+    # For the grid style we need the width of each name (including its "as" part), stored in the
+    # index of its first part.
+    name_widths = None
+    if style == WRAP_GRID:
+        name_widths = [0] * len(parts)
+        width = 0
+        for i in range(len(parts) - 1, -1, -1):
+            i_prefix = parts[i][0]
+            width += widths[i]
+            if i == 0 or ',' in i_prefix:
+                name_widths[i] = width
+                width = 0
+            else:
+                width += len(i_prefix)
+
+    result = []
+    cumulative_len = column
+    for i, (i_prefix, i_value) in enumerate(parts):
+        comma = ',' if ',' in i_prefix else ''
+        name_start = i == 0 or comma
+
+        if style == WRAP_HANGING:
+            if name_start:
+                i_prefix = comma + continuation
+            cumulative_len = continuation_len + widths[i]
+
+        elif style == WRAP_GRID:
+            # Plus one for the following comma or closing parenthesis.
+            if i > 0 and name_start and \
+                    cumulative_len + len(i_prefix) + name_widths[i] + 1 > max_width:
+                i_prefix = comma + continuation
+                cumulative_len = continuation_len + widths[i]
+            else:
+                cumulative_len += len(i_prefix) + widths[i]
+
+        else:
+            cumulative_len += len(i_prefix) + widths[i]
+            if cumulative_len >= max_width:
+                i_prefix = comma + continuation
+                cumulative_len = continuation_len + widths[i]
+
+        result.append(i_prefix)
+
+    closing_prefix = ''
+    if style == WRAP_HANGING:
+        closing_prefix = ',\n' + ' ' * indent
+
+    return result, closing_prefix
+
+
+def WrapParts(parts, max_width, indent, column, style=WRAP_FILL):
+    """
+    Joins the given (prefix, value) parts wrapping them so they fit in max-width.
+
+    See WrapPrefixes for the parameters.
+
+    :return unicode:
+        The wrapped text, including the prefix of the closing parenthesis (but not the parenthesis
+        itself).
+    """
+    prefixes, closing_prefix = WrapPrefixes(parts, max_width, indent, column, style)
+    result = []
+    for i_prefix, (_i_prefix, i_value) in zip(prefixes, parts):
+        result.append(i_prefix)
+        result.append(i_value)
+    result.append(closing_prefix)
+    return ''.join(result)
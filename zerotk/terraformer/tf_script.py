@@ -9,6 +9,8 @@ from zerotk.clikit.app import App
 from zerotk.easyfs import (
     EOL_STYLE_UNIX, FindFiles, IsDir, StandardizePath)
 
+from ._wrap import WRAP_FILL, WRAP_STYLES
+
 app = App('terraformer')
 
 
@@ -23,18 +25,57 @@ PYTHON_EXT = '.py'
 
 
 @app
-def Symbols(console_, filename):
+def Symbols(console_, single_job=False, *sources):
     """
     List all symbols in the given python source code. Currently only lists IMPORTS.
 
-    :param filename: Python source code.
+    When more than one file is given (or a directory), each line is prefixed by the filename.
+    The files are listed in alphabetical order.
+
+    :param single_job: Avoid using multithread (for testing purposes).
+    :param sources: Python source code files or directories.
     """
-    from zerotk.terraformer import TerraFormer
+    filenames = _GetFilenames(sources, [PYTHON_EXT])
+    show_filename = len(sources) > 1 or any(IsDir(i) for i in sources)
+    partial_symbols = partial(_Symbols, show_filename=show_filename)
+    # The results come in the order they complete: sorting the output (each file's lines start
+    # with its filename) lists the files in alphabetical order.
+    _Map(console_, partial_symbols, filenames, True, single_job)
 
-    terra = TerraFormer.Factory(filename)
-    for i_import_symbol in sorted(terra.symbols, key=lambda x: (x.lineno, x.column, x.name)):
-        console_.Print('%d: IMPORT %s' %
-                       (i_import_symbol.lineno, i_import_symbol.name))
+
+@app
+def ExportSymbols(console_, output=None, output_format='ndjson', single_job=False, *sources):
+    """
+    Exports the symbols of many python modules in a machine-readable format.
+
+    The symbols of each file are written as soon as they are available.
+
+    :param output: The output filename. Prints to the console if not given (ndjson only).
+    :param output_format: The export format (ndjson or binary).
+    :param single_job: Avoid using multithread (for testing purposes).
+    :param sources: Source directories or files.
+    """
+    from ._symbol_export import DumpBinary, DumpNdjson, FORMAT_BINARY, FORMAT_NDJSON
+
+    dump = {FORMAT_NDJSON: DumpNdjson, FORMAT_BINARY: DumpBinary}.get(output_format)
+    if dump is None:
+        console_.PrintError('Unknown format: %s' % output_format)
+        return 1
+    if output is None and output_format != FORMAT_NDJSON:
+        console_.PrintError('The %s format requires an output file.' % output_format)
+        return 1
+
+    filenames = _GetFilenames(sources, [PYTHON_EXT])
+    imap = _GetIMap(single_job)
+    if output is None:
+        for i_data in imap(dump, filenames):
+            for j_line in i_data.decode('UTF-8').splitlines():
+                console_.Print(j_line)
+    else:
+        with open(output, 'wb') as oss:
+            for i_data in imap(dump, filenames):
+                oss.write(i_data)
+                oss.flush()
 
 
 @app
@@ -46,6 +87,10 @@ def FixFormat(
         sorted=False,
         inverted_refactor=False,
         traceback_limit=None,
+        wrap_style=WRAP_FILL,
+        remove_unused_imports=False,
+        import_index=None,
+        python_path=None,
         *sources
     ):
     """
@@ -74,6 +119,10 @@ def FixFormat(
     :param sorted: Sort the output.
     :param inverted_refactor: Invert refactor names and values loaded from refactor file.
     :param traceback_limit: The limit for detailed traceback. Used for testing.
+    :param wrap_style: How to wrap long import statements (fill, hanging or grid).
+    :param remove_unused_imports: Remove the unused imports from module level import statements.
+    :param import_index: Imports graph filename (see graph command) used to process only the files affected by the refactor. The imports of the other files are not reorganized.
+    :param python_path: Directories (separated by the os path separator) used as python-path to build the import index when it doesn't exist. Defaults to the python-path stored in the index.
     :param sources: Source directories or files.
     """
     from functools import partial
@@ -92,14 +141,47 @@ def FixFormat(
         except:
             return None
 
+    if wrap_style not in WRAP_STYLES:
+        console_.PrintError(
+            'Unknown wrap style: %s (expected one of: %s)' % (wrap_style, ', '.join(WRAP_STYLES)))
+        return 1
+
     traceback_limit = or_none(int, traceback_limit)
     extensions = _GetExtensions(python_only)
     filenames = _GetFilenames(sources, extensions)
     refactor = GetRefactorDict(refactor, inverted_refactor)
+    if refactor is not None and import_index is not None:
+        import os
+
+        # The index python-path (the module names) doesn't depend on the sources being fixed, that
+        # may be just some files.
+        graph = _LoadImportGraph(import_index)
+        if python_path is not None:
+            python_path = [os.path.abspath(i) for i in python_path.split(os.pathsep)]
+            if graph is not None and graph.python_path != python_path:
+                console_.PrintError(
+                    'The import index %s was built with another python-path: %s' % (
+                        import_index, os.pathsep.join(graph.python_path)))
+                return 1
+        elif graph is not None:
+            python_path = graph.python_path
+        else:
+            console_.PrintError(
+                'Import index not found: %s (build it with the graph command or pass '
+                '--python-path)' % import_index)
+            return 1
+
+        # Only the files affected by the refactor are processed (reorganizing their imports): unlike
+        # the refactor prefilter (see _RefactorMayChange), the other files are not even read.
+        graph, _scanned = _UpdateImportGraph(console_, import_index, single_job, python_path, graph)
+        affected = set(graph.GetRefactorFilenames(refactor))
+        filenames = [i for i in filenames if os.path.abspath(i) in affected]
     partial_fix_format = partial(
         _FixFormat,
         refactor=refactor,
-        traceback_limit=traceback_limit
+        traceback_limit=traceback_limit,
+        wrap_style=wrap_style,
+        remove_unused=remove_unused_imports,
     )
     _Map(console_, partial_fix_format, filenames, sorted, True)
 
@@ -321,7 +403,7 @@ def FixStringio(console_, *sources):
 
     :param sources: List of directories or files to process.
     """
-    from terraformer import FileTooBigError, TerraFormer
+    from zerotk.terraformer import FileTooBigError, TerraFormer
 
     for i_filename in _GetFilenames(sources, [PYTHON_EXT]):
         try:
@@ -336,14 +418,144 @@ def FixStringio(console_, *sources):
             )
             if changed:
                 console_.Item('%s: FIXED' % i_filename)
-                for i_symbol in terra.module.Walk():
-                    if i_symbol.PREFIX == 'USE' and i_symbol.name in ('cStringIO.StringIO', 'StringIO.StringIO'):
-                        i_symbol.Rename('StringIO')
+                terra.RenameSymbolUsages(
+                    {
+                        'cStringIO.StringIO': 'StringIO',
+                        'StringIO.StringIO': 'StringIO',
+                    }
+                )
                 terra.Save()
         except FileTooBigError:
             console_.Item('%s: FileTooBig (for TerraFormer)' % i_filename)
 
 
+@app
+def UnusedImports(console_, *sources):
+    """
+    Lists the imports not used by the python modules.
+
+    :param sources: Source directories or files.
+    """
+    from zerotk.terraformer import FileTooBigError, TerraFormer
+
+    filenames = _GetFilenames(sources, [PYTHON_EXT])
+    for i_filename in filenames:
+        try:
+            terra = TerraFormer.Factory(i_filename)
+        except FileTooBigError:
+            console_.Item('%s: FileTooBig (for TerraFormer)' % i_filename)
+            continue
+        except Exception as e:
+            console_.Item('%s: ERROR: %s: %s' % (i_filename, e.__class__.__name__, e))
+            continue
+        for j_import_symbol in terra.GetUnusedImports():
+            console_.Print('%s:%d: %s' % (i_filename, j_import_symbol.lineno, j_import_symbol.name))
+
+
+@app
+def Graph(console_, output='.terraformer.graph', single_job=False, *sources):
+    """
+    Builds the graph of imports between all python modules in the given directories.
+
+    The imports are extracted in parallel and the graph is saved in a compact binary format. If
+    the output file already exists only the files changed since it was saved are re-scanned.
+
+    :param output: The graph filename.
+    :param single_job: Avoid using multithread (for testing purposes).
+    :param sources: Source directories, used as python-path to obtain the modules names.
+    """
+    graph, scanned = _UpdateImportGraph(
+        console_, output, single_job, _GetPythonPath(sources), _LoadImportGraph(output))
+    console_.Print(
+        '%d modules, %d imports (%d of %d files scanned)' % (
+            len(graph.modules), len(graph.edges), scanned, len(graph.files)
+        )
+    )
+
+
+@app
+def Cycles(console_, output='.terraformer.graph', single_job=False, *sources):
+    """
+    Lists the import cycles between the python modules in the given directories.
+
+    Updates the imports graph (see "graph" command) and reports one minimal cycle for each group
+    of modules importing each other, with the import statements causing it.
+
+    :param output: The graph filename.
+    :param single_job: Avoid using multithread (for testing purposes).
+    :param sources: Source directories, used as python-path to obtain the modules names.
+    """
+    graph, _scanned = _UpdateImportGraph(
+        console_, output, single_job, _GetPythonPath(sources), _LoadImportGraph(output))
+    cycles = graph.FindCycles()
+    for i_cycle in cycles:
+        console_.Print(' -> '.join([i for i, _j, _k in i_cycle] + [i_cycle[0][0]]))
+        for j_module, j_imported, j_lineno in i_cycle:
+            filename = graph.module_filenames[graph.GetModuleId(j_module)]
+            console_.Item('%s:%d: %s' % (filename, j_lineno, j_imported))
+    console_.Print('%d cycles' % len(cycles))
+
+
+def _GetPythonPath(sources):
+    """
+    :param list(unicode) sources:
+        The source directories given in the command line.
+    :return list(unicode):
+        The python-path of the imports graph.
+    """
+    import os
+
+    return [os.path.abspath(i) for i in sources]
+
+
+def _LoadImportGraph(filename):
+    """
+    Loads the imports graph saved in the given file.
+
+    :param unicode filename:
+    :return ImportGraph|None:
+        The graph or None if the file doesn't exist or can't be loaded (Ex.: saved by another
+        version).
+    """
+    import os
+    from ._import_graph import ImportGraph
+
+    if not os.path.isfile(filename):
+        return None
+    try:
+        return ImportGraph.Load(filename)
+    except Exception:
+        return None
+
+
+def _UpdateImportGraph(console_, output, single_job, python_path, graph=None):
+    """
+    Updates the imports graph with the python modules in the python-path and saves it in the
+    output file.
+
+    :param list(unicode) python_path:
+        The directories with the python modules, used to obtain their names.
+    :param ImportGraph|None graph:
+        The graph to update, usually loaded from the output file. A new graph is created if None or
+        built with another python-path.
+    :return tuple(ImportGraph,int):
+        The graph and the number of scanned files.
+    """
+    from ._import_graph import ImportGraph
+
+    if graph is None or graph.python_path != python_path:
+        graph = ImportGraph(python_path)
+
+    filenames = _GetFilenames(python_path, [PYTHON_EXT])
+    scanned = graph.Update(filenames, imap=_GetIMap(single_job))
+    graph.Save(output)
+
+    for i_filename, (_mtime, _size, _imports, i_error) in sorted(graph.files.items()):
+        if i_error is not None:
+            console_.Item('%s: ERROR: %s' % (i_filename, i_error))
+    return graph, scanned
+
+
 def _GetFilenames(paths, extensions):
     """
     Lists filenames matching the given paths and extensions.
@@ -366,7 +578,7 @@ def _GetFilenames(paths, extensions):
     return result
 
 
-def _reorganize_imports(filename, refactor={}):
+def _reorganize_imports(filename, refactor={}, wrap_style=WRAP_FILL, remove_unused=False):
     """
     Reorganizes all import statements in the given filename, optionally performing a "move"
     refactoring.
@@ -390,22 +602,59 @@ def _reorganize_imports(filename, refactor={}):
         Note that we do not support symbol renaming, only move. This means that the last part of
         the string must be the same. In the example, "Bunch" and "interface".
 
+    :param unicode wrap_style:
+        How to wrap long import statements. See TerraFormer.ReorganizeImports.
+
+    :param bool remove_unused:
+        Removes unused imports. See TerraFormer.ReorganizeImports.
+
     :return boolean:
         Returns True if the file was changed.
     """
     from zerotk.terraformer import TerraFormer
     from zerotk.reraiseit import reraise
 
+    if refactor and not remove_unused and not _RefactorMayChange(filename, refactor, wrap_style):
+        return False
+
     try:
         terra = TerraFormer.Factory(filename)
-        terra.ReorganizeImports(refactor=refactor)
+        terra.ReorganizeImports(
+            refactor=refactor, wrap_style=wrap_style, remove_unused=remove_unused)
         changed = terra.Save()
         return changed
     except Exception as e:
         reraise(e, 'On TerraForming.ReorganizeImports with filename: %s' % filename)
 
 
-def _FixFormat(filename, refactor, traceback_limit=None):
+def _RefactorMayChange(filename, refactor, wrap_style=WRAP_FILL):
+    """
+    Checks the raw contents of the given file, without parsing it, to find out if reorganizing its
+    imports with the given refactor may change it.
+
+    :param unicode filename:
+    :param dict refactor:
+    :param unicode wrap_style:
+
+    :return boolean:
+        Returns False only if the file surely doesn't need changes: none of the refactor names
+        occur in it and its imports are already organized.
+    """
+    import io
+    from ._prefilter import GetRefactorPrefilter, IsReorganized
+
+    with io.open(filename, 'rb') as iss:
+        contents = iss.read()
+    if GetRefactorPrefilter(frozenset(refactor)).Search(contents):
+        return True
+    try:
+        source = contents.decode('UTF-8')
+    except UnicodeDecodeError:
+        return True
+    return not IsReorganized(source, filename, wrap_style=wrap_style)
+
+
+def _FixFormat(filename, refactor, traceback_limit=None, wrap_style=WRAP_FILL, remove_unused=False):
     """
     Perform the operation in a multi-threading friendly global function.
 
@@ -419,7 +668,12 @@ def _FixFormat(filename, refactor, traceback_limit=None):
     try:
         changed = False
         if filename.endswith(PYTHON_EXT):
-            changed = _reorganize_imports(filename, refactor=refactor)
+            changed = _reorganize_imports(
+                filename,
+                refactor=refactor,
+                wrap_style=wrap_style,
+                remove_unused=remove_unused,
+            )
     except Exception as e:
         result = (
             '- %s: ERROR:\n  %s\n--- * ---\n%s' % (
@@ -435,6 +689,29 @@ def _FixFormat(filename, refactor, traceback_limit=None):
     return result
 
 
+def _Symbols(filename, show_filename=False):
+    """
+    Perform the operation in a multi-threading friendly global function.
+
+    The operation is to list the import-symbols of the given filename.
+    """
+    from zerotk.terraformer import TerraFormer
+
+    prefix = filename + ':' if show_filename else ''
+    try:
+        terra = TerraFormer(filename=filename)
+    except Exception as e:
+        return ('- %s: ERROR: %s' % (filename, e), 0)
+
+    result = [
+        '%s%d: IMPORT %s' % (prefix, i.lineno, i.name)
+        for i in sorted(terra.symbols, key=lambda x: (x.lineno, x.column, x.name))
+    ]
+    if not result:
+        return None
+    return '\n'.join(result)
+
+
 def _AddImportSymbol(filename, import_symbol):
     """
     Perform the operation in a multi-threading friendly global function.
@@ -496,6 +773,65 @@ def _GetExtensions(python_only):
         return EXTENSIONS
 
 
+def _GetIMap(single_job):
+    """
+    Returns the map function to execute functions in parallel.
+
+    The parallel map yields the results as soon as they are available (not in the order of the
+    parameters). See _IMapUnordered.
+
+    :param single_job:
+        Do not use multiprocessing algorithm.
+        This is used for debug purposes.
+
+    :return callable:
+    """
+    if single_job:
+        return six.moves.map
+    return _IMapUnordered
+
+
+def _IMapUnordered(func, func_params, max_pending=None):
+    """
+    Executes func in a process pool yielding the results in the order they complete.
+
+    Only max_pending calls are submitted at a time (a new one as each completes), so neither the
+    parameters nor the results of a large run are held in memory at once.
+
+    :param callable func:
+        The function to call. Must be picklable.
+
+    :param iterable func_params:
+        The parameters to execute the function with.
+
+    :param int max_pending:
+        The maximum number of submitted calls not consumed yet. Defaults to twice the number of
+        processes.
+
+    :return iter:
+    """
+    import concurrent.futures
+    import itertools
+    import multiprocessing
+
+    max_workers = multiprocessing.cpu_count()
+    if max_pending is None:
+        max_pending = 2 * max_workers
+
+    func_params = iter(func_params)
+    with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+        pending = set(
+            executor.submit(func, i) for i in itertools.islice(func_params, max_pending)
+        )
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for i_param in itertools.islice(func_params, len(done)):
+                pending.add(executor.submit(func, i_param))
+            for i_future in done:
+                yield i_future.result()
+
+
 def _Map(console_, func, func_params, _sorted, single_job):
     """
     Executes func in parallel considering some options.
@@ -515,15 +851,12 @@ def _Map(console_, func, func_params, _sorted, single_job):
     :return:
     """
 
-    if single_job:
-        imap = six.moves.map
-    else:
-        import concurrent.futures
-        executor = concurrent.futures.ProcessPoolExecutor()
-        imap = executor.map
+    imap = _GetIMap(single_job)
 
     output = []
     for i_result in imap(func, func_params):
+        if i_result is None:
+            continue
         if isinstance(i_result, tuple):
             text, verbosity = i_result
         else:
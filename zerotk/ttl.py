@@ -0,0 +1,162 @@
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+import time
+
+import six
+
+
+class TTL(object):
+    """
+    Time To Live (TTL) cache: items expire after a fixed time since they were set.
+
+    Expired items are ignored when accessed (lazy expiration) and removed when set again or in
+    bulk by sweeps, made periodically when setting items. As the time to live is the same for all
+    items, the items are kept in expiration order, so sweeping only visits the expired items.
+
+    When the maximum size is reached, the items closest to expire (the oldest) are removed first.
+    """
+
+    def __init__(self, ttl, maxsize=None, sweep_interval=None, timer=None):
+        """
+        :param float ttl:
+            The time to live of the items, in seconds.
+
+        :param int maxsize:
+            The maximum number of items. None for no limit.
+
+        :param float sweep_interval:
+            The minimum time between sweeps, in seconds. Defaults to the ttl.
+
+        :param callable timer:
+            Returns the current time, in seconds. Defaults to a monotonic clock (not affected by
+            changes of the system time) when available (python 3), else time.time.
+        """
+        if ttl <= 0:
+            raise ValueError('TTL must be > 0. Found: %s' % (ttl,))
+        if maxsize is not None and maxsize <= 0:
+            raise ValueError('Size must be > 0. Found: %s' % (maxsize,))
+
+        self._ttl = ttl
+        self._maxsize = maxsize
+        if sweep_interval is None:
+            sweep_interval = ttl
+        self._sweep_interval = sweep_interval
+        if timer is None:
+            timer = getattr(time, 'monotonic', None) or time.time
+        self._timer = timer
+
+        # key -> (expiration time, value), in expiration order.
+        self._dict = OrderedDict()
+        self._next_sweep = timer() + sweep_interval
+
+    def Sweep(self):
+        """
+        Removes all expired items.
+        """
+        now = self._timer()
+        self._next_sweep = now + self._sweep_interval
+        items = self._dict
+        while items:
+            key = next(iter(items))
+            if items[key][0] > now:
+                break
+            del items[key]
+
+    def clear(self):
+        self._dict.clear()
+        self._next_sweep = self._timer() + self._sweep_interval
+
+    def __len__(self):
+        """
+        :rtype: int
+        :returns:
+            The number of items in the cache, including the expired items not swept yet.
+        """
+        return len(self._dict)
+
+    def __contains__(self, key):
+        """
+        :rtype: bool
+        :returns:
+            True if the key is in the cache and not expired.
+        """
+        item = self._dict.get(key)
+        return item is not None and item[0] > self._timer()
+
+    def __setitem__(self, key, value):
+        """
+        Sets an item in the cache, with a new expiration time.
+
+        :param object key:
+        :param object value:
+        """
+        now = self._timer()
+        if now >= self._next_sweep:
+            self.Sweep()
+
+        items = self._dict
+        # Re-inserting keeps the expiration order.
+        items.pop(key, None)
+        if self._maxsize is not None:
+            while len(items) >= self._maxsize:
+                items.popitem(last=False)
+        items[key] = (now + self._ttl, value)
+
+    def __getitem__(self, key):
+        """
+        :raises KeyError:
+            If the key is not available or expired.
+        """
+        expiration, value = self._dict[key]
+        if expiration <= self._timer():
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        """
+        :param object key:
+        :param object default:
+            Returned if the key is not available or expired.
+        """
+        item = self._dict.get(key)
+        if item is None:
+            return default
+        if item[0] <= self._timer():
+            return default
+        return item[1]
+
+    def __delitem__(self, key):
+        del self._dict[key]
+
+    _SENTINEL = []
+
+    def pop(self, key, default=_SENTINEL):
+        item = self._dict.pop(key, None)
+        if item is None or item[0] <= self._timer():
+            if default is not self._SENTINEL:
+                return default
+            raise KeyError(key)
+        return item[1]
+
+    def GetCurrentSize(self):
+        """
+        Doesn't change the cache (the expired items are not removed).
+
+        :return int:
+            The number of (not expired) items in the cache.
+        """
+        now = self._timer()
+        expired = 0
+        for i_expiration, _value in six.itervalues(self._dict):
+            if i_expiration > now:
+                break
+            expired += 1
+        return len(self._dict) - expired
+
+    def GetMaxSize(self):
+        """
+        :return int:
+            The maximum number of items in the cache (None for no limit).
+        """
+        return self._maxsize
@@ -0,0 +1,239 @@
+"""
+    2Q module.
+
+    TwoQueue is a scan resistant cache: items accessed only once (Ex.: each file of a full tree
+    scan) don't flush the items that are accessed over and over (Ex.: the package __init__ files).
+
+    Based on "2Q: A Low Overhead High Performance Buffer Management Replacement Algorithm"
+    (Johnson and Shasha, 1994), with items of different sizes.
+"""
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+
+
+DEFAULT_TWO_QUEUE_SIZE = 50
+
+
+class TwoQueue(object):
+    """
+    Two Queues (2Q) cache.
+
+    New items enter a FIFO queue (A1in), bounded by a fraction of the cache size. Items pushed out
+    of A1in are remembered by key only (A1out, the "ghosts"). An item added again while remembered
+    was used at least twice in a short period: it enters the main LRU queue (Am), where it can only
+    be pushed out by other items used more than once.
+
+    A scan (many items accessed once) only cycles A1in and A1out, keeping Am intact.
+    """
+
+    def __init__(self, size=DEFAULT_TWO_QUEUE_SIZE, get_size=lambda x: 1, in_ratio=0.25,
+                 out_ratio=0.5):
+        """
+        :param int size:
+            The maximum size for this cache.
+
+        :param callable get_size:
+            Returns the size of an object.
+
+        :param float in_ratio:
+            The size of A1in, relative to the cache size. While A1in is below it, the items are
+            pruned from Am.
+
+        :param float out_ratio:
+            The sum of the sizes of the items remembered in A1out, relative to the cache size.
+        """
+        if size <= 0:
+            raise ValueError('Size must be > 0. Found: %s' % (size,))
+
+        self._maxsize = size
+        self._get_size = get_size
+        self._in_maxsize = size * in_ratio
+        self._out_maxsize = size * out_ratio
+
+        # key -> [value, size]: A1in in insertion order, Am in access order.
+        self._in = OrderedDict()
+        self._main = OrderedDict()
+        # key -> size, in the order they were pushed out of A1in.
+        self._out = OrderedDict()
+
+        self._in_size = 0
+        self._main_size = 0
+        self._out_size = 0
+
+    def clear(self):
+        """
+        Clears the cache (including the remembered keys).
+        """
+        self._in.clear()
+        self._main.clear()
+        self._out.clear()
+        self._in_size = self._main_size = self._out_size = 0
+
+    def __len__(self):
+        """
+        :rtype: int
+        :returns:
+            The number of items in the cache.
+        """
+        return len(self._in) + len(self._main)
+
+    def GetCurrentSize(self):
+        """
+        :rtype: int
+        :returns:
+            The sum of the sizes (see get_size) of the items in the cache.
+        """
+        return self._in_size + self._main_size
+
+    def GetMaxSize(self):
+        """
+        :rtype: int
+        :returns:
+            The maximum sum of the sizes of the items in the cache.
+        """
+        return self._maxsize
+
+    def __contains__(self, key):
+        """
+        :rtype: bool
+        :returns:
+            True if the key is in the cache and False otherwise (remembered keys are not in the
+            cache).
+        """
+        return key in self._main or key in self._in
+
+    def get(self, key, default=None):
+        """
+        Gets an item from the cache. Items in Am are marked as the most recently used (items in
+        A1in keep their position).
+
+        :param object key:
+        :param object default:
+            Returned if the key is not in the cache.
+        """
+        main = self._main
+        entry = main.pop(key, None)
+        if entry is not None:
+            main[key] = entry
+            return entry[0]
+        entry = self._in.get(key)
+        if entry is not None:
+            return entry[0]
+        return default
+
+    _SENTINEL = []
+
+    def __getitem__(self, key):
+        """
+        :raises KeyError:
+            If the key is not in the cache.
+        """
+        result = self.get(key, self._SENTINEL)
+        if result is self._SENTINEL:
+            raise KeyError(key)
+        return result
+
+    def __setitem__(self, key, value):
+        """
+        Sets an item in the cache, pruning items as needed so that the maximum size is not passed.
+
+        :param object key:
+        :param object value:
+        """
+        add_size = self._get_size(value)
+        if add_size <= 0:
+            raise ValueError('Size for object may not be 0. Key: %s' % (key,))
+
+        if add_size > self._maxsize:
+            # Can't fit in the cache.
+            self.pop(key, None)
+            return
+
+        entry = self._main.pop(key, None)
+        if entry is not None:
+            self._main_size += add_size - entry[1]
+            self._main[key] = [value, add_size]
+        else:
+            entry = self._in.get(key)
+            if entry is not None:
+                self._in_size += add_size - entry[1]
+                entry[0] = value
+                entry[1] = add_size
+            elif key in self._out:
+                # Used again after being pushed out of A1in: promoted to Am.
+                self._out_size -= self._out.pop(key)
+                self._main[key] = [value, add_size]
+                self._main_size += add_size
+            else:
+                self._in[key] = [value, add_size]
+                self._in_size += add_size
+
+        self._Prune(key)
+
+    def _Prune(self, key):
+        """
+        Removes items until the maximum size is respected.
+
+        :param object key:
+            The item just set: never removed (it fits in the cache, so there are always other
+            items to remove).
+        """
+        in_ = self._in
+        main = self._main
+        out = self._out
+        maxsize = self._maxsize
+        while self._in_size + self._main_size > maxsize:
+            # The item just set is the most recently used of Am or anywhere in A1in (when
+            # replaced there, it keeps its position).
+            can_prune_main = len(main) > 1 or (main and key not in main)
+            can_prune_in = len(in_) > 1 or (in_ and key not in in_)
+            if can_prune_main and (self._in_size <= self._in_maxsize or not can_prune_in):
+                # Pop the least recently used: not remembered.
+                _key, (_value, size) = main.popitem(last=False)
+                self._main_size -= size
+            else:
+                # Pop the first item added (other than the item just set), remembering its key.
+                for old_key in in_:
+                    if old_key != key:
+                        break
+                _value, size = in_.pop(old_key)
+                self._in_size -= size
+                out[old_key] = size
+                self._out_size += size
+                while self._out_size > self._out_maxsize:
+                    _key, size = out.popitem(last=False)
+                    self._out_size -= size
+
+    def __delitem__(self, key):
+        """
+        Deletes an item from the cache (and forgets it).
+
+        :raises KeyError:
+            If the key is not in the cache.
+        """
+        self.pop(key)
+
+    def pop(self, key, default=_SENTINEL):
+        entry = self._main.pop(key, None)
+        if entry is not None:
+            self._main_size -= entry[1]
+            return entry[0]
+        entry = self._in.pop(key, None)
+        if entry is not None:
+            self._in_size -= entry[1]
+            return entry[0]
+        size = self._out.pop(key, None)
+        if size is not None:
+            self._out_size -= size
+        if default is not self._SENTINEL:
+            return default
+        raise KeyError(key)
+
+    def keys(self):
+        """
+        :rtype: list
+        :returns:
+            The keys in A1in (in insertion order) and then in Am (least recently used first).
+        """
+        return list(self._in) + list(self._main)